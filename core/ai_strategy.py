@@ -2,9 +2,12 @@ import numpy as np
 import asyncio
 import os
 from core.order_manager import Order, OrderSide, OrderType
-from core.indicators import AdaptiveIndicators
+from core.indicators import AdaptiveIndicators, HistoryIndicators, StreamingIndicators
 from .deep_rl_agent import DeepRLAgent
 
+SIDEWAYS_ADX_THRESHOLD = 0.5
+SIDEWAYS_BB_WIDTH_THRESHOLD = 1.0
+
 class AIStrategy:
     def __init__(self, risk_manager, order_manager, config=None):
         self.risk_manager = risk_manager
@@ -20,6 +23,9 @@ class AIStrategy:
         self.stop_loss_pct = self.config.get('stop_loss_pct', 0.05)
         self.take_profit_pct = self.config.get('take_profit_pct', 0.1)
 
+        # Per-asset incremental indicator state
+        self._indicator_streams = {}
+
         # Safety: default to inference-only in live
         self.inference_only = bool(self.config.get("inference_only", True) or os.getenv("INFERENCE_ONLY", "1") == "1")
 
@@ -41,22 +47,23 @@ class AIStrategy:
             print(f"Insufficient data (length={len(closes)}), holding position")
             return 'hold'
 
-        indicators = AdaptiveIndicators(closes, highs, lows)
-        ema_short = indicators.adaptive_ema(span_base=self.short_window)
-        ema_long = indicators.adaptive_ema(span_base=self.long_window)
-        rsi_array = indicators.compute_rsi(period=self.rsi_period)
-        lower_band, _, upper_band = self.compute_bollinger_bands(closes, self.bollinger_window)
-
-        short_ma = ema_short[-1]
-        long_ma = ema_long[-1]
-        rsi = rsi_array[-1] if rsi_array is not None else None
+        indicators = self._indicator_stream(
+            market_data.get('asset', 'DEFAULT'), closes, highs, lows, getattr(market_data, 'total', None)
+        )
+        short_ma, short_bound = indicators.adaptive_ema_bound(span_base=self.short_window)
+        long_ma, long_bound = indicators.adaptive_ema_bound(span_base=self.long_window)
+        if (short_bound or long_bound) and abs(short_ma - long_ma) <= short_bound + long_bound:
+            # Too close to call from the truncated replays: settle it exactly
+            exact = AdaptiveIndicators(closes, highs if len(highs) else None, lows if len(lows) else None)
+            short_ma = exact.adaptive_ema(span_base=self.short_window)[-1]
+            long_ma = exact.adaptive_ema(span_base=self.long_window)[-1]
+        rsi = indicators.rsi()
+        lower_band, _, upper_band = indicators.bollinger_bands()
         price = closes[-1]
 
         adx = indicators.compute_adx() or 0
-        bb_width = indicators.bb_width(self.bollinger_window) or 0
+        bb_width = indicators.bb_width() or 0
 
-        SIDEWAYS_ADX_THRESHOLD = 0.5
-        SIDEWAYS_BB_WIDTH_THRESHOLD = 1.0
         is_sideways = (adx < SIDEWAYS_ADX_THRESHOLD) and (bb_width < SIDEWAYS_BB_WIDTH_THRESHOLD)
 
         print(f"EMA short: {short_ma:.4f}, EMA long: {long_ma:.4f}")
@@ -80,9 +87,85 @@ class AIStrategy:
         else:
             return 'hold'
 
+    def _indicator_stream(self, asset, closes, highs, lows, total=None):
+        """
+        Advance the asset's indicator state by the bars it has not seen yet.
+
+        `total` is the number of bars the source has ever produced; bounded
+        sources such as BarBuffer only expose the newest len(closes) of them.
+        """
+        total = len(closes) if total is None else total
+        dropped = total - len(closes)
+        stream, base = self._indicator_streams.get(asset, (None, 0))
+        if stream is not None:
+            last = base + stream.count - 1 - dropped
+            if total < base + stream.count or last < 0 or closes[last] != stream.last_close:
+                # History was truncated or replaced; start over from what is visible
+                stream = None
+        if stream is None:
+            stream = StreamingIndicators(rsi_period=self.rsi_period, bb_window=self.bollinger_window)
+            stream.track(self.short_window, self.long_window, 5)
+            base = dropped
+            self._indicator_streams[asset] = (stream, base)
+
+        start = base + stream.count - dropped
+        highs = highs[start:] if highs is not None and len(highs) else None
+        lows = lows[start:] if lows is not None and len(lows) else None
+        stream.extend(closes[start:], highs, lows)
+        return stream
+
     def generate_signal(self, market_data):
         return self.evaluate_market(market_data)
 
+    def generate_signals(self, market_data):
+        """
+        evaluate_market's decision at every bar of a history, in one pass.
+
+        Element t is what evaluate_market returns when given bars 0..t, so a
+        backtest can read the whole signal series up front instead of calling
+        it on n growing prefixes. Returns an array of 'buy'/'sell'/'hold'.
+        """
+        closes = np.asarray(market_data.get('close', []), dtype=float)
+        highs = market_data.get('high', None)
+        lows = market_data.get('low', None)
+        n = len(closes)
+        indicators = HistoryIndicators(closes, highs, lows, rsi_period=self.rsi_period,
+                                       bb_window=self.bollinger_window)
+
+        short_ma, short_bound = indicators.adaptive_ema(span_base=self.short_window)
+        long_ma, long_bound = indicators.adaptive_ema(span_base=self.long_window)
+        short_ma, long_ma = short_ma.copy(), long_ma.copy()
+        # Settle near-ties between approximate EMA values with the exact replay
+        for t in np.flatnonzero(np.abs(short_ma - long_ma) <= short_bound + long_bound):
+            short_ma[t] = self._exact_adaptive_ema(indicators, t, self.short_window, short_bound[t])
+            long_ma[t] = self._exact_adaptive_ema(indicators, t, self.long_window, long_bound[t])
+
+        rsi = indicators.rsi()
+        lower_band, _, upper_band = indicators.bollinger_bands()
+        adx = np.nan_to_num(indicators.compute_adx(), nan=0.0)
+        bb_width = np.nan_to_num(indicators.bb_width(), nan=0.0)
+        is_sideways = (adx < SIDEWAYS_ADX_THRESHOLD) & (bb_width < SIDEWAYS_BB_WIDTH_THRESHOLD)
+
+        # NaN stands for None; a missing or zero band does not block the trade
+        rsi_missing = np.isnan(rsi)
+        no_upper = np.isnan(upper_band) | (upper_band == 0)
+        no_lower = np.isnan(lower_band) | (lower_band == 0)
+        cond_buy = (short_ma > long_ma) & (rsi_missing | (rsi < 70)) & (no_upper | (closes < upper_band))
+        cond_sell = (short_ma < long_ma) & (rsi_missing | (rsi >= 70)) & (no_lower | (closes > lower_band))
+
+        signals = np.full(n, 'hold', dtype=object)
+        signals[cond_sell] = 'sell'
+        signals[cond_buy] = 'buy'
+        signals[is_sideways] = 'hold'
+        signals[:max(self.long_window, self.rsi_period, self.bollinger_window) - 1] = 'hold'
+        return signals
+
+    @staticmethod
+    def _exact_adaptive_ema(indicators, t, span_base, bound):
+        if bound == 0:
+            return indicators.adaptive_ema(span_base)[0][t]
+        return indicators.replay_ema(t, max(5, span_base / indicators.atr()[t]))
+
     async def execute_strategy(self, market_data, asset='DEFAULT'):
         signal = self.evaluate_market(market_data)
 
@@ -1,33 +1,105 @@
 import httpx
 from core.config import TradingConfig
+from core.rate_limiter import RateLimiter
+import importlib.util
 import logging
 import asyncio
 import functools
+import random
 
 logger = logging.getLogger(__name__)
 
-def retry_on_exception(max_retries=5, backoff_in_seconds=1):
+# 429 means the request was never processed; 5xx gateway errors are transient
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# Errors raised before the request reached the server, so even POSTs are safe to resend
+_PRE_SEND_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def _is_retryable(exc, idempotent):
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status in RETRYABLE_STATUS_CODES if idempotent else status == 429
+    if isinstance(exc, _PRE_SEND_ERRORS):
+        return True
+    return idempotent and isinstance(exc, httpx.TransportError)
+
+
+def _retry_after(exc):
+    if isinstance(exc, httpx.HTTPStatusError):
+        try:
+            return float(exc.response.headers.get("Retry-After", ""))
+        except ValueError:
+            return None
+    return None
+
+
+def retry_on_exception(max_retries=3, backoff_in_seconds=0.1, max_backoff=2.0, idempotent=True):
+    """
+    Retry transient failures only: transport errors and retryable HTTP statuses.
+
+    4xx responses (other than 429) and unexpected exceptions propagate
+    immediately. Non-idempotent calls (order placement) are only retried when
+    the server cannot have acted on them. Sleeps are jittered and capped at
+    `max_backoff`; after `max_retries` the last error is re-raised.
+    """
     def decorator_retry(func):
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
-            retries = 0
-            while retries < max_retries:
+            attempt = 0
+            while True:
                 try:
                     return await func(*args, **kwargs)
                 except Exception as e:
-                    wait = backoff_in_seconds * (2 ** retries)
-                    logger.warning(f"Exception {e}, retrying in {wait} seconds...")
+                    if attempt >= max_retries or not _is_retryable(e, idempotent):
+                        raise
+                    wait = _retry_after(e)
+                    if wait is None:
+                        wait = backoff_in_seconds * (2 ** attempt) * (0.5 + random.random() / 2)
+                    wait = min(wait, max_backoff)
+                    attempt += 1
+                    logger.warning(f"Retryable error {e}, retry {attempt}/{max_retries} in {wait:.2f} seconds...")
                     await asyncio.sleep(wait)
-                    retries += 1
-            raise Exception(f"Failed after {max_retries} retries.")
         return wrapper
     return decorator_retry
 
+
+def _endpoint_category(method, endpoint):
+    if method != "GET" and "order" in endpoint:
+        return "multi_order" if "multi" in endpoint else "order"
+    return "standard"
+
+
 class UpstoxApiClient:
-    def __init__(self, config: TradingConfig):
+    def __init__(self, config: TradingConfig, low_latency: bool = False, rate_limiter: RateLimiter = None,
+                 max_connections: int = 50, keepalive_expiry: float = 120.0):
+        """
+        low_latency=True keeps a warm pool of `max_connections` keep-alive
+        connections, uses HTTP/2 when the optional `h2` package is installed,
+        sets tight per-phase timeouts and rate-limits requests client-side to
+        the Upstox per-category limits (see core.rate_limiter).
+        """
         self.config = config
         self.base_url = "https://api.upstox.com/v2"
-        self._client = httpx.AsyncClient(base_url=self.base_url)
+        self.rate_limiter = rate_limiter
+
+        if low_latency:
+            http2 = importlib.util.find_spec("h2") is not None
+            if not http2:
+                logger.warning("h2 not installed; UpstoxApiClient falling back to HTTP/1.1")
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                    keepalive_expiry=keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(connect=2.0, read=5.0, write=2.0, pool=1.0),
+            )
+            if self.rate_limiter is None:
+                self.rate_limiter = RateLimiter()
+        else:
+            self._client = httpx.AsyncClient(base_url=self.base_url)
 
     async def _send_request(self, method, endpoint, **kwargs):
         url = endpoint if endpoint.startswith("http") else f"{self.base_url}{endpoint}"
@@ -35,6 +107,9 @@ class UpstoxApiClient:
         auth_header = {"Authorization": f"Bearer {self.config.UPSTOX_ACCESS_TOKEN}"}
         headers.update(auth_header)
 
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(_endpoint_category(method, endpoint))
+
         try:
             response = await self._client.request(method, url, headers=headers, **kwargs)
             response.raise_for_status()
@@ -53,7 +128,7 @@ class UpstoxApiClient:
     async def get(self, endpoint, params=None):
         return await self._send_request("GET", endpoint, params=params)
 
-    @retry_on_exception()
+    @retry_on_exception(idempotent=False)
     async def post(self, endpoint, data=None, json=None):
         return await self._send_request("POST", endpoint, data=data, json=json)
 
@@ -67,9 +142,13 @@ class UpstoxApiClient:
 
     # Domain Specific Helper Methods
 
-    async def send_order(self, symbol, quantity, side, order_type, price=None):
+    # Upstox accepts at most 25 orders per multi-order request
+    MULTI_ORDER_LIMIT = 25
+
+    @staticmethod
+    def _order_payload(symbol, quantity, side, order_type, price=None):
         """
-        Places an order on Upstox. Adjust payload per Upstox API spec:
+        Order payload per Upstox API spec:
         symbol example: "NSE:RELIANCE"
         """
         exchange, sym = symbol.split(":")
@@ -86,12 +165,53 @@ class UpstoxApiClient:
             if price is None:
                 raise ValueError("Limit order requires price")
             payload["price"] = price
+        return payload
 
+    async def send_order(self, symbol, quantity, side, order_type, price=None):
+        """Places an order on Upstox."""
+        payload = self._order_payload(symbol, quantity, side, order_type, price)
         endpoint = "/orders"
         response = await self.post(endpoint, json=payload)
         logger.debug(f"Placed order {payload} response: {response}")
         return response
 
+    async def send_orders(self, orders):
+        """
+        Places several orders through the multi-order endpoint, MULTI_ORDER_LIMIT
+        per request. `orders` are send_order keyword dicts. Returns one entry per
+        order, in input order: its response data, or the exception explaining
+        why it was not placed.
+        """
+        orders = list(orders)
+        results = [None] * len(orders)
+        for start in range(0, len(orders), self.MULTI_ORDER_LIMIT):
+            chunk = range(start, min(start + self.MULTI_ORDER_LIMIT, len(orders)))
+            payload = []
+            for i in chunk:
+                try:
+                    item = self._order_payload(**{k: v for k, v in orders[i].items() if k != "idempotency_key"})
+                except ValueError as e:
+                    results[i] = e
+                    continue
+                item["correlation_id"] = str(i)
+                payload.append(item)
+            if not payload:
+                continue
+            try:
+                response = await self.post("/orders/multi", json=payload)
+            except Exception as e:
+                for item in payload:
+                    results[int(item["correlation_id"])] = e
+                continue
+            logger.debug(f"Placed {len(payload)} orders response: {response}")
+            for placed in response.get("data", []):
+                results[int(placed["correlation_id"])] = placed
+            for item in payload:
+                i = int(item["correlation_id"])
+                if results[i] is None:
+                    results[i] = RuntimeError(f"Order {orders[i].get('symbol')} not accepted: {response.get('errors')}")
+        return results
+
     async def cancel_order(self, order_id):
         endpoint = f"/orders/{order_id}/cancel"
         response = await self.post(endpoint)
@@ -0,0 +1,273 @@
+"""
+Event-driven backtests on a virtual clock.
+
+Historical bars are replayed through the live path: BarStore ->
+StrategyManager.on_market_data -> strategy -> OrderManager -> PaperBroker.
+The asyncio loop runs on virtual time, so `asyncio.sleep` (order latency,
+strategy pauses) jumps the clock forward instead of waiting, and a replay runs
+as fast as the strategy code allows.
+"""
+import asyncio
+import contextlib
+import heapq
+import importlib.util
+import logging
+import os
+import selectors
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from core.bar_store import BarStore
+from core.broker.order_book import DEFAULT_SPREAD
+from core.broker.paper_broker import PaperBroker
+from core.equity_store import EquityStore
+from core.history_store import to_epochs
+from core.order_manager import OrderManager, OrderSide, OrderStatus
+from core.strategy_manager import StrategyManager
+
+logger = logging.getLogger(__name__)
+
+
+class VirtualClock:
+    """Simulated epoch-seconds clock; only ever moves forward."""
+
+    def __init__(self, start=0.0):
+        self.now = float(start)
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+
+    def advance_to(self, timestamp):
+        if timestamp > self.now:
+            self.now = timestamp
+
+
+class _VirtualTimeSelector(selectors.DefaultSelector):
+    """Polls real fds without blocking; a wait for the next timer becomes a clock jump."""
+
+    def __init__(self, clock):
+        super().__init__()
+        self._clock = clock
+
+    def select(self, timeout=None):
+        if timeout is None:
+            # Nothing scheduled: only another thread can wake the loop
+            return super().select(None)
+        events = super().select(0)
+        if not events:
+            self._clock.advance(timeout)
+        return events
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    """Event loop whose time() is a VirtualClock, so sleeps cost no wall time."""
+
+    def __init__(self, clock=None):
+        self.clock = clock or VirtualClock()
+        super().__init__(_VirtualTimeSelector(self.clock))
+        # Epoch-second floats are only exact to ~0.25us, so jumping the clock by
+        # (deadline - now) can land a hair short of the deadline; treat anything
+        # within 1us as due, or the loop would spin on that timer forever
+        self._clock_resolution = 1e-6
+
+    def time(self):
+        return self.clock.now
+
+
+# -------- Bar sources --------
+def _frame_bars(frame: pd.DataFrame, symbol=None):
+    """(timestamp, symbol, open, high, low, close, volume) tuples from one frame."""
+    if "symbol" in frame:
+        symbols = frame["symbol"].tolist()
+    else:
+        symbols = [symbol] * len(frame)
+    volume = frame["volume"].to_numpy(dtype=float) if "volume" in frame else np.zeros(len(frame))
+    return zip(
+        to_epochs(frame["timestamp"]).tolist(),
+        symbols,
+        frame["open"].to_numpy(dtype=float).tolist(),
+        frame["high"].to_numpy(dtype=float).tolist(),
+        frame["low"].to_numpy(dtype=float).tolist(),
+        frame["close"].to_numpy(dtype=float).tolist(),
+        volume.tolist(),
+    )
+
+
+def _frames(source, chunksize):
+    if isinstance(source, pd.DataFrame):
+        yield source
+        return
+    path = Path(source)
+    if path.suffix == ".parquet":
+        if importlib.util.find_spec("pyarrow") is not None:
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+                yield batch.to_pandas()
+        else:
+            yield pd.read_parquet(path)
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def _source_bars(source, chunksize):
+    symbol = None if isinstance(source, pd.DataFrame) else Path(source).stem
+    for frame in _frames(source, chunksize):
+        yield from _frame_bars(frame, symbol)
+
+
+def iter_bars(sources, chunksize=100_000):
+    """
+    Stream bars from CSV/Parquet files or DataFrames, merged into timestamp order.
+
+    Each source must be sorted by timestamp and have open/high/low/close
+    (volume optional) plus either a `symbol` column or one symbol per file
+    (named by the file stem). Files are read `chunksize` rows at a time.
+    Timestamps may be epoch seconds or anything pandas parses as a datetime.
+    A source with its own `iter_bars(chunksize)` (e.g. core.sweep.SharedBars)
+    is already merged and is streamed as is.
+    """
+    if hasattr(sources, "iter_bars"):
+        return sources.iter_bars(chunksize)
+    if isinstance(sources, (str, os.PathLike, pd.DataFrame)):
+        sources = [sources]
+    streams = [_source_bars(source, chunksize) for source in sources]
+    if len(streams) == 1:
+        return streams[0]
+    return heapq.merge(*streams, key=lambda bar: bar[0])
+
+
+# -------- Engine --------
+class BacktestEngine:
+    """
+    Replays bars through a fresh StrategyManager / OrderManager / PaperBroker
+    stack per run, on a VirtualTimeEventLoop.
+
+    `strategy_factory(risk_manager, order_manager, config)` builds the
+    strategy (default: AIStrategy). Equity is cash plus positions marked at the
+    last close, updated on every bar and every fill; the curve goes to an
+    EquityStore (and to risk_manager.update_equity_curve when one is given).
+    `quiet` silences the strategy's per-bar prints for the duration of a run.
+    The pre-trade daily P&L restarts whenever the bar date (UTC) changes.
+
+    By default PaperBroker fills every order at once at its price. With an
+    `exchange_factory` (e.g. functools.partial(SimulatedExchange, latency=0.05))
+    orders go to a simulated order book instead, and each bar is fed to it
+    as trades down to its low and up to its high followed by a quote at the
+    close -/+ `book_spread`/2 (positive; default one 0.05 tick), so fills
+    depend on the book and queue position.
+    """
+
+    def __init__(self, strategy_factory=None, config=None, risk_manager=None, latency=0.0,
+                 initial_cash=100_000.0, bar_capacity=2048, equity_history_interval=60, quiet=True,
+                 exchange_factory=None, book_spread=DEFAULT_SPREAD):
+        if strategy_factory is None:
+            from core.ai_strategy import AIStrategy
+            strategy_factory = AIStrategy
+        self.strategy_factory = strategy_factory
+        self.config = config or {}
+        self.risk_manager = risk_manager
+        self.latency = latency
+        self.initial_cash = initial_cash
+        self.bar_capacity = bar_capacity
+        self.equity_history_interval = equity_history_interval
+        self.quiet = quiet
+        if exchange_factory is not None and not book_spread > 0:
+            raise ValueError(f"book_spread must be positive, got {book_spread}")
+        self.exchange_factory = exchange_factory
+        self.book_spread = book_spread
+
+    def run(self, sources):
+        loop = VirtualTimeEventLoop()
+        try:
+            if self.quiet:
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    return loop.run_until_complete(self._run(sources, loop.clock))
+            return loop.run_until_complete(self._run(sources, loop.clock))
+        finally:
+            loop.close()
+
+    async def _run(self, sources, clock):
+        wall_start = time.perf_counter()
+        cash = self.initial_cash
+        market_value = 0.0
+        net_qty = {}
+        last_close = {}
+
+        def on_fill(order, qty, price):
+            nonlocal cash, market_value
+            signed = qty if order.side == OrderSide.BUY else -qty
+            cash -= signed * price
+            net_qty[order.symbol] = net_qty.get(order.symbol, 0.0) + signed
+            market_value += signed * last_close.get(order.symbol, price)
+
+        exchange = self.exchange_factory() if self.exchange_factory is not None else None
+        broker = PaperBroker(clock=clock.time, exchange=exchange)
+        order_manager = OrderManager(risk_manager=self.risk_manager, api_client=broker, latency=self.latency,
+                                     config=self.config, clock=clock.time)
+        order_manager.on_fill = on_fill
+        broker.on_order_update = order_manager.apply_order_update
+        strategy = self.strategy_factory(self.risk_manager, order_manager, self.config)
+        manager = StrategyManager(strategy, self.risk_manager, order_manager, portfolio=None, session_rollover=False)
+        bars = BarStore(capacity=self.bar_capacity)
+        equity = EquityStore(history_interval=self.equity_history_interval)
+        update_risk_equity = getattr(self.risk_manager, "update_equity_curve", None)
+
+        count = 0
+        start = None
+        day = None
+        try:
+            for timestamp, symbol, open_, high, low, close, volume in iter_bars(sources):
+                clock.advance_to(timestamp)
+                if timestamp // 86400 != day:
+                    # New bar date: the daily loss limit starts over
+                    day = timestamp // 86400
+                    order_manager.start_trading_day()
+                if exchange is not None:
+                    exchange.on_bar(symbol, open_, high, low, close, volume, now=clock.now, spread=self.book_spread)
+                if start is None:
+                    start = timestamp
+                previous = last_close.get(symbol)
+                if previous is not None:
+                    market_value += net_qty.get(symbol, 0.0) * (close - previous)
+                last_close[symbol] = close
+                order_manager.mark_price(symbol, close)
+
+                await manager.on_market_data(bars.append(symbol, timestamp, open_, high, low, close, volume))
+
+                value = cash + market_value
+                equity.update(timestamp, value)
+                if update_risk_equity is not None:
+                    update_risk_equity(timestamp, value)
+                count += 1
+        finally:
+            await manager.shutdown()
+
+        final_equity = cash + market_value
+        orders = list(order_manager.orders)
+        return {
+            "bars": count,
+            "symbols": len(last_close),
+            "start": start,
+            "end": clock.now,
+            "orders": len(orders),
+            "filled": sum(1 for o in orders if o.status == OrderStatus.FILLED),
+            "final_equity": final_equity,
+            "total_return": final_equity / self.initial_cash - 1 if self.initial_cash else 0.0,
+            "max_drawdown": equity.max_drawdown,
+            "positions": {s: q for s, q in net_qty.items() if q},
+            "equity": equity,
+            "order_manager": order_manager,
+            "wall_seconds": time.perf_counter() - wall_start,
+        }
+
+
+def run_backtest(sources, **kwargs):
+    """Convenience wrapper: BacktestEngine(**kwargs).run(sources)."""
+    return BacktestEngine(**kwargs).run(sources)
@@ -0,0 +1,139 @@
+import logging
+import math
+import time
+
+from core.bar_store import BarStore, to_epoch
+
+logger = logging.getLogger(__name__)
+
+BAR_MODES = ("time", "tick", "volume")
+
+
+class _FormingBar:
+    __slots__ = ("start", "open", "high", "low", "close", "volume", "ticks")
+
+    def __init__(self, start, price, quantity):
+        self.start = start
+        self.open = self.high = self.low = self.close = price
+        self.volume = quantity
+        self.ticks = 1
+
+    def add(self, price, quantity):
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += quantity
+        self.ticks += 1
+
+
+class BarAggregator:
+    """
+    Folds parsed trade events into OHLCV bars, one forming bar per symbol.
+
+    mode="time"   -> bars of `size` seconds, aligned to multiples of `size`
+    mode="tick"   -> bars of `size` trades
+    mode="volume" -> a bar closes once its volume reaches `size`
+
+    Closed bars are appended to `store` and the symbol's BarBuffer is passed to
+    `on_bar`, so strategies run once per bar rather than once per trade.
+    StrategyManager wires this up when given one: every trade reaching
+    StrategyManager.on_trade (e.g. from handler.trade_event_handler) is folded
+    in, and closed bars go to StrategyManager.on_market_data:
+
+        manager = StrategyManager(strategy, risk_manager, order_manager, portfolio,
+                                  bar_aggregator=BarAggregator("time", 60))
+
+    On its own it can also take trade records straight from a dispatcher:
+
+        aggregator = BarAggregator("tick", 100, on_bar=handle_bar)
+        dispatcher.register_handler("trade", aggregator.on_event)
+    """
+
+    def __init__(self, mode="time", size=60, store=None, on_bar=None):
+        if mode not in BAR_MODES:
+            raise ValueError(f"Unknown bar mode {mode!r}; expected one of {BAR_MODES}")
+        if size <= 0:
+            raise ValueError("Bar size must be positive")
+        self.mode = mode
+        self.size = size
+        self.store = store if store is not None else BarStore()
+        self.on_bar = on_bar
+        self._forming = {}
+
+    def add_trade(self, symbol, price, quantity, timestamp=None):
+        """
+        Fold one trade into the symbol's forming bar.
+
+        Returns the symbol's BarBuffer if a bar closed, otherwise None.
+        """
+        ts = time.time() if timestamp is None else to_epoch(timestamp)
+        bar = self._forming.get(symbol)
+
+        if self.mode == "time":
+            start = math.floor(ts / self.size) * self.size
+            if bar is None:
+                self._forming[symbol] = _FormingBar(start, price, quantity)
+                return None
+            if start > bar.start:
+                self._forming[symbol] = _FormingBar(start, price, quantity)
+                return self._close(symbol, bar)
+            # Late prints within (or before) the current bucket update it
+            bar.add(price, quantity)
+            return None
+
+        if bar is None:
+            bar = self._forming[symbol] = _FormingBar(ts, price, quantity)
+        else:
+            bar.add(price, quantity)
+        filled = bar.ticks if self.mode == "tick" else bar.volume
+        if filled >= self.size:
+            del self._forming[symbol]
+            return self._close(symbol, bar)
+        return None
+
+    def _close(self, symbol, bar):
+        return self.store.append(symbol, bar.start, bar.open, bar.high, bar.low, bar.close, bar.volume)
+
+    def expire(self, now=None):
+        """
+        Close time bars whose interval has ended without a following trade.
+
+        Returns the BarBuffers that received a bar. Tick and volume bars only
+        close on trades, so this is a no-op for them.
+        """
+        if self.mode != "time":
+            return []
+        now = time.time() if now is None else now
+        closed = []
+        for symbol, bar in list(self._forming.items()):
+            if bar.start + self.size <= now:
+                del self._forming[symbol]
+                closed.append(self._close(symbol, bar))
+        return closed
+
+    def forming(self, symbol):
+        return self._forming.get(symbol)
+
+    async def on_trade(self, symbol, price, quantity, timestamp=None):
+        buf = self.add_trade(symbol, price, quantity, timestamp)
+        if buf is not None:
+            await self._emit(buf)
+        return buf
+
+    async def on_event(self, event):
+        """EventDispatcher handler for 'trade' records."""
+        return await self.on_trade(event.symbol, event.price, event.quantity or 0, event.timestamp)
+
+    async def flush(self, now=None):
+        for buf in self.expire(now):
+            await self._emit(buf)
+
+    async def _emit(self, buf):
+        if self.on_bar is None:
+            return
+        try:
+            await self.on_bar(buf)
+        except Exception as e:
+            logger.error(f"Error in bar handler for {buf.symbol}: {e}")
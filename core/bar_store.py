@@ -0,0 +1,135 @@
+import math
+
+import numpy as np
+
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+_COL = {name: i for i, name in enumerate(COLUMNS)}
+
+
+def to_epoch(timestamp):
+    if timestamp is None:
+        return math.nan
+    if hasattr(timestamp, "timestamp"):
+        return timestamp.timestamp()
+    return float(timestamp)
+
+
+class BarBuffer:
+    """
+    Fixed-capacity OHLCV ring buffer for one symbol.
+
+    Every bar is written twice, at slot i and i + capacity, so the most recent
+    bars are always one contiguous slice and column reads are zero-copy views.
+    Views alias the buffer: copy them if they must outlive the next append.
+
+    Also answers the market_data dict protocol (`get`, `[]`) so strategies
+    that expect {'close': [...], 'asset': ...} can take a buffer directly.
+    """
+
+    def __init__(self, symbol=None, capacity=2048):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.symbol = symbol
+        self.capacity = capacity
+        self._data = np.full((len(COLUMNS), 2 * capacity), np.nan)
+        self._head = 0
+        self.total = 0  # bars ever appended, including those overwritten
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, timestamp, open, high, low, close, volume=0.0):
+        i = self._head
+        row = (to_epoch(timestamp), open, high, low, close, volume)
+        self._data[:, i] = row
+        self._data[:, i + self.capacity] = row
+        self._head = (i + 1) % self.capacity
+        self.total += 1
+
+    def window(self, n=None):
+        """(columns x n) view of the last n bars, oldest first."""
+        size = len(self)
+        n = size if n is None else min(n, size)
+        end = self._head + self.capacity
+        return self._data[:, end - n:end]
+
+    def column(self, name, n=None):
+        return self.window(n)[_COL[name]]
+
+    @property
+    def timestamp(self):
+        return self.column("timestamp")
+
+    @property
+    def open(self):
+        return self.column("open")
+
+    @property
+    def high(self):
+        return self.column("high")
+
+    @property
+    def low(self):
+        return self.column("low")
+
+    @property
+    def close(self):
+        return self.column("close")
+
+    @property
+    def volume(self):
+        return self.column("volume")
+
+    def last(self):
+        if not self.total:
+            return None
+        i = (self._head - 1) % self.capacity
+        return {name: self._data[_COL[name], i] for name in COLUMNS}
+
+    # -------- market_data dict protocol --------
+    def __getitem__(self, key):
+        if key in _COL:
+            return self.column(key)
+        if key in ("asset", "symbol"):
+            return self.symbol
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in _COL or key in ("asset", "symbol")
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+class BarStore:
+    """Per-symbol BarBuffers with a shared capacity."""
+
+    def __init__(self, capacity=2048):
+        self.capacity = capacity
+        self._buffers = {}
+
+    def buffer(self, symbol):
+        buf = self._buffers.get(symbol)
+        if buf is None:
+            buf = self._buffers[symbol] = BarBuffer(symbol, self.capacity)
+        return buf
+
+    def append(self, symbol, timestamp, open, high, low, close, volume=0.0):
+        buf = self.buffer(symbol)
+        buf.append(timestamp, open, high, low, close, volume)
+        return buf
+
+    def symbols(self):
+        return list(self._buffers)
+
+    def __contains__(self, symbol):
+        return symbol in self._buffers
+
+    def __getitem__(self, symbol):
+        return self._buffers[symbol]
+
+    def __len__(self):
+        return len(self._buffers)
@@ -0,0 +1,453 @@
+# core/broker/order_book.py
+"""
+Simulated exchange for paper trading and backtests.
+
+Each symbol has a price-time-priority limit order book. Our orders and the
+market's displayed liquidity (from quotes, trade prints or bars) rest in the
+same FIFO queues, so an order only fills once the liquidity queued ahead of
+it has traded, and marketable orders walk the book level by level.
+"""
+import heapq
+import itertools
+import logging
+from bisect import bisect_right
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BUY = "BUY"
+SELL = "SELL"
+
+# Quantities within this of zero count as zero (fills are float arithmetic)
+_EPS = 1e-12
+_LIVE = frozenset(("pending", "open", "partial"))
+# Quoted spread for bars replayed without one (one NSE tick)
+DEFAULT_SPREAD = 0.05
+
+
+class SimOrder:
+    """One order on the simulated exchange; `external` orders are market liquidity, not ours."""
+    __slots__ = ("order_id", "symbol", "side", "qty", "price", "filled_qty", "notional", "status",
+                 "timestamp", "external", "fills")
+
+    def __init__(self, order_id, symbol, side, qty, price=None, timestamp=None, external=False):
+        self.order_id = order_id
+        self.symbol = symbol
+        self.side = side
+        self.qty = float(qty)
+        self.price = price
+        self.filled_qty = 0.0
+        self.notional = 0.0
+        self.status = "pending"  # pending -> open / partial / filled / cancelled / rejected
+        self.timestamp = timestamp
+        self.external = external
+        self.fills = []
+
+    @property
+    def remaining(self):
+        return self.qty - self.filled_qty
+
+    @property
+    def avg_price(self):
+        return self.notional / self.filled_qty if self.filled_qty else 0.0
+
+    @property
+    def is_open(self):
+        return self.status in _LIVE
+
+    def report(self) -> dict:
+        """Broker-style response (see PaperBroker.place_order)."""
+        return {
+            "order_id": self.order_id,
+            "status": self.status,
+            "filled_qty": self.filled_qty,
+            "avg_price": self.avg_price,
+            "fills": [{"qty": q, "price": p, "timestamp": t} for q, p, t in self.fills],
+        }
+
+
+class _Side:
+    """
+    One side of a book: FIFO queues per price level plus a heap of level prices.
+
+    The heap holds prices (negated for bids, so the best level is always at
+    the top). Emptied levels are dropped from `levels` only; their heap
+    entries are discarded lazily when they surface, as in OrderIndex.
+    """
+    __slots__ = ("sign", "levels", "depth", "heap")
+
+    def __init__(self, sign):
+        self.sign = sign  # -1 for bids, 1 for asks
+        self.levels: Dict[float, deque] = {}
+        self.depth: Dict[float, float] = {}  # open quantity per level
+        self.heap: List[float] = []
+
+    def best(self) -> Optional[float]:
+        heap = self.heap
+        levels = self.levels
+        while heap:
+            price = heap[0] * self.sign
+            if price in levels:
+                return price
+            heapq.heappop(heap)
+        return None
+
+    def add(self, order):
+        price = order.price
+        queue = self.levels.get(price)
+        if queue is None:
+            queue = self.levels[price] = deque()
+            self.depth[price] = 0.0
+            heap = self.heap
+            if len(heap) > 2 * len(self.levels) + 64:
+                heap[:] = [p * self.sign for p in self.levels]
+                heapq.heapify(heap)
+            else:
+                heapq.heappush(heap, price * self.sign)
+        queue.append(order)
+        self.depth[price] += order.remaining
+
+    def reduce(self, price, qty):
+        depth = self.depth[price] - qty
+        if depth <= _EPS:
+            self.drop(price)
+        else:
+            self.depth[price] = depth
+
+    def drop(self, price):
+        del self.levels[price]
+        del self.depth[price]
+
+    def snapshot(self, n):
+        prices = sorted(self.levels, key=lambda p: p * self.sign)[:n]
+        return [(p, self.depth[p]) for p in prices]
+
+
+class OrderBook:
+    """
+    Price-time-priority limit order book for one symbol.
+
+    Adding a level is O(log L) (heap push); a cancel is O(1) (the order is
+    marked and skipped when it reaches the front of its queue). Matching
+    costs O(1) per fill plus O(log L) per level it empties.
+    """
+
+    def __init__(self, symbol, on_fill: Optional[Callable] = None):
+        self.symbol = symbol
+        self.bids = _Side(-1)
+        self.asks = _Side(1)
+        self.on_fill = on_fill  # (order, qty, price, timestamp), for every order that trades
+
+    def side(self, side) -> _Side:
+        return self.bids if side == BUY else self.asks
+
+    def best_bid(self):
+        return self.bids.best()
+
+    def best_ask(self):
+        return self.asks.best()
+
+    def depth(self, n=5) -> dict:
+        return {"bids": self.bids.snapshot(n), "asks": self.asks.snapshot(n)}
+
+    def submit(self, order: SimOrder, timestamp=None):
+        """
+        Match `order` against the opposite side, then rest any remainder if it
+        is a limit order (price set). Market orders (price None) are
+        immediate-or-cancel: an unfilled remainder is cancelled.
+        """
+        if self._match(order, timestamp) > _EPS:
+            if order.price is None:
+                order.status = "cancelled" if order.filled_qty else "rejected"
+                return order
+            self.side(order.side).add(order)
+            if order.status == "pending":
+                order.status = "open"
+        return order
+
+    def _match(self, order, timestamp):
+        """Fill `order` from the opposite side as far as its limit allows; returns the quantity left."""
+        is_buy = order.side == BUY
+        book = self.asks if is_buy else self.bids
+        levels = book.levels
+        limit = order.price
+        on_fill = self.on_fill
+        left = order.qty - order.filled_qty
+        while left > _EPS:
+            price = book.best()
+            if price is None or (limit is not None and (price > limit if is_buy else price < limit)):
+                break
+            queue = levels[price]
+            traded = 0.0
+            while queue and left > _EPS:
+                maker = queue[0]
+                if maker.status not in _LIVE:
+                    queue.popleft()  # cancelled while queued
+                    continue
+                qty = min(left, maker.qty - maker.filled_qty)
+                left -= qty
+                traded += qty
+                for party in (maker, order):
+                    party.filled_qty += qty
+                    party.notional += qty * price
+                    party.status = "filled" if party.qty - party.filled_qty <= _EPS else "partial"
+                    if not party.external:
+                        party.fills.append((qty, price, timestamp))
+                    if on_fill is not None:
+                        on_fill(party, qty, price, timestamp)
+                if maker.status == "filled":
+                    queue.popleft()
+            if queue:
+                book.reduce(price, traded)
+            elif price in levels:
+                book.drop(price)
+        return left
+
+    def cancel(self, order: SimOrder) -> bool:
+        if not order.is_open:
+            return False
+        if order.status in ("open", "partial") and order.price is not None:
+            book = self.side(order.side)
+            if order.price in book.depth:
+                book.reduce(order.price, order.remaining)
+        order.status = "cancelled"
+        return True
+
+    def queue_position(self, order: SimOrder):
+        """(orders, quantity) resting ahead of `order` at its price level."""
+        queue = self.side(order.side).levels.get(order.price, ())
+        orders = 0
+        qty = 0.0
+        for resting in queue:
+            if resting is order:
+                return orders, qty
+            if resting.is_open:
+                orders += 1
+                qty += resting.remaining
+        return None
+
+    def set_liquidity(self, side, price, qty, timestamp=None):
+        """
+        Make the market's displayed size at (side, price) equal `qty`.
+
+        New size joins the back of the queue (behind our orders already
+        there) and first trades against any of ours it crosses; displayed
+        size it would cross on the other side is withdrawn first, never
+        traded. Removed size is taken from the back of the queue, so our
+        place in line is kept.
+        """
+        book = self.side(side)
+        queue = book.levels.get(price)
+        shown = sum(o.remaining for o in queue if o.external and o.is_open) if queue else 0.0
+        if qty > shown:
+            # The market never trades with itself: opposite displayed size this
+            # price crosses is stale, withdraw it rather than match it
+            opposite = SELL if side == BUY else BUY
+            for crossed in [p for p in self.side(opposite).levels if (p <= price if side == BUY else p >= price)]:
+                self.set_liquidity(opposite, crossed, 0.0)
+            tail = queue[-1] if queue else None
+            if tail is not None and tail.external and tail.is_open:
+                # Already last in line: grow it rather than queue another order
+                tail.qty += qty - shown
+                book.depth[price] += qty - shown
+            else:
+                self.submit(SimOrder(None, self.symbol, side, qty - shown, price, timestamp, external=True),
+                            timestamp)
+            return
+        excess = shown - qty
+        if excess <= _EPS:
+            return
+        # Trim from the back; withdrawn orders at the tail leave the queue at once
+        for resting in reversed(queue):
+            if excess <= _EPS:
+                break
+            if resting.external and resting.is_open:
+                cut = min(excess, resting.remaining)
+                resting.qty -= cut
+                excess -= cut
+                if resting.remaining <= _EPS:
+                    resting.status = "cancelled"
+        while queue and not queue[-1].is_open:
+            queue.pop()
+        book.reduce(price, shown - qty)
+
+    def clear_liquidity(self, side, keep=None):
+        """Withdraw the market's displayed size on `side` at every price except `keep`."""
+        for price in [p for p in self.side(side).levels if p != keep]:
+            self.set_liquidity(side, price, 0.0)
+
+
+class SimulatedExchange:
+    """
+    Order books for every symbol plus order-entry latency.
+
+    `submit`/`cancel` reach the book `latency` seconds after `now`; until
+    then they wait in a time-ordered queue. Market data (`on_quote`,
+    `on_trade`, `on_bar`) first delivers everything due by its timestamp, so
+    orders and market events interleave in time order. Call `process_until`
+    to deliver due orders when no market data arrives.
+
+    `listener(order, qty, price, timestamp)` is called for every fill of our
+    orders (qty 0 for a status change without a fill, e.g. a cancel).
+    """
+
+    def __init__(self, latency=0.0, listener: Optional[Callable] = None):
+        self.latency = latency
+        self.listener = listener
+        self.books: Dict[str, OrderBook] = {}
+        self.orders: Dict[str, SimOrder] = {}
+        # (due, action, order) in due order; with one fixed latency, sends
+        # made in time order arrive in the same order, so this is a FIFO
+        self._pending: deque = deque()
+        self._ids = itertools.count(1)
+        self.now = 0.0
+        self.events = 0
+
+    def book(self, symbol) -> OrderBook:
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(symbol, on_fill=self._on_fill)
+        return book
+
+    def _on_fill(self, order, qty, price, timestamp):
+        if not order.external and self.listener is not None:
+            self.listener(order, qty, price, timestamp)
+
+    def _notify(self, order, timestamp):
+        if self.listener is not None:
+            self.listener(order, 0.0, None, timestamp)
+
+    # -------- Order entry --------
+    def submit(self, symbol, side, qty, price=None, now=None, order_id=None) -> SimOrder:
+        """Send an order; price None makes it a market order. Returns its live SimOrder."""
+        now = self.now if now is None else now
+        order = SimOrder(order_id or f"sim-{next(self._ids)}", symbol, side.upper(), qty, price, now)
+        self.orders[order.order_id] = order
+        self._schedule(now, self._arrive, order)
+        return order
+
+    def cancel(self, order_id, now=None) -> Optional[SimOrder]:
+        order = self.orders.get(order_id)
+        if order is not None:
+            self._schedule(self.now if now is None else now, self._cancel, order)
+        return order
+
+    def _schedule(self, now, action, order):
+        if self.latency:
+            pending = self._pending
+            due = now + self.latency
+            if not pending or pending[-1][0] <= due:
+                pending.append((due, action, order))
+            else:
+                # Sent with an earlier timestamp than the last send: slot it in
+                entries = list(pending)
+                entries.insert(bisect_right([entry[0] for entry in entries], due), (due, action, order))
+                self._pending = deque(entries)
+        else:
+            self.process_until(now)
+            action(order, now)
+
+    def _arrive(self, order, timestamp):
+        self.events += 1
+        if order.status != "pending":
+            return  # cancelled before it reached the book
+        if order.qty <= 0:
+            order.status = "rejected"
+        else:
+            book = self.books.get(order.symbol) or self.book(order.symbol)
+            book.submit(order, timestamp)
+        if order.status != "filled" and order.status != "partial":
+            self._notify(order, timestamp)
+
+    def _cancel(self, order, timestamp):
+        self.events += 1
+        if order.status == "pending" or self.book(order.symbol).cancel(order):
+            order.status = "cancelled"
+            self._notify(order, timestamp)
+
+    def process_until(self, now):
+        """Deliver every order / cancel due by `now`, in arrival order."""
+        pending = self._pending
+        while pending and pending[0][0] <= now:
+            due, action, order = pending.popleft()
+            if due > self.now:
+                self.now = due
+            action(order, due)
+        if now > self.now:
+            self.now = now
+
+    # -------- Market data --------
+    def on_quote(self, symbol, bid, ask, bid_size, ask_size, now=None):
+        """
+        Top of book from the market: external size at bid/ask is set to the
+        quoted sizes and withdrawn from every other price, so the market's
+        side of the book is one level deep. Size that crosses our resting
+        orders trades with them first (at our price).
+        """
+        if bid is not None and ask is not None and bid >= ask:
+            # External size on both sides would trade with itself and empty the book
+            logger.warning(f"Ignoring locked/crossed quote for {symbol}: bid {bid} >= ask {ask}")
+            return
+        now = self.now if now is None else now
+        self.process_until(now)
+        self.events += 1
+        book = self.book(symbol)
+        # Withdraw the old quote on both sides before showing either new one,
+        # so a quote that gaps through the old one never meets it
+        if bid is not None:
+            book.clear_liquidity(BUY, keep=bid)
+        if ask is not None:
+            book.clear_liquidity(SELL, keep=ask)
+        if bid is not None:
+            book.set_liquidity(BUY, bid, bid_size, now)
+        if ask is not None:
+            book.set_liquidity(SELL, ask, ask_size, now)
+
+    def on_trade(self, symbol, price, qty, side=None, now=None):
+        """
+        A trade print: replayed as a market participant's immediate-or-cancel
+        order at `price`, so it consumes the queue ahead of our orders before
+        reaching them. `side` is the aggressor; by default a print at or
+        below the best bid is a sell and anything else a buy.
+        """
+        now = self.now if now is None else now
+        self.process_until(now)
+        self.events += 1
+        book = self.book(symbol)
+        if side is None:
+            best_bid = book.best_bid()
+            side = SELL if best_bid is not None and price <= best_bid else BUY
+        # IOC at a limit price: match, and drop whatever does not trade
+        aggressor = SimOrder(None, symbol, side, qty, price, now, external=True)
+        book._match(aggressor, now)
+
+    def on_bar(self, symbol, open_, high, low, close, volume=0.0, now=None, spread=DEFAULT_SPREAD, depth=None):
+        """
+        Approximate a bar as market events: the previous quote's size is
+        withdrawn (the market has moved through it during the bar), half the
+        volume trades down to the low and half up to the high (reaching our
+        resting orders in price-time order), then the book is quoted at
+        close -/+ spread/2 with `depth` (default: the bar volume) on each side.
+        `spread` must be positive, or the quote would be locked.
+        """
+        if not spread > 0:
+            raise ValueError(f"on_bar needs a positive spread, got {spread}")
+        now = self.now if now is None else now
+        self.process_until(now)
+        book = self.book(symbol)
+        book.clear_liquidity(BUY)
+        book.clear_liquidity(SELL)
+        half = (volume or 0.0) / 2
+        if half > 0:
+            self.on_trade(symbol, low, half, side=SELL, now=now)
+            self.on_trade(symbol, high, half, side=BUY, now=now)
+        size = volume if depth is None else depth
+        self.on_quote(symbol, close - spread / 2, close + spread / 2, size, size, now=now)
+
+    # -------- Introspection --------
+    def queue_position(self, order_id):
+        order = self.orders.get(order_id)
+        if order is None or not order.is_open:
+            return None
+        return self.book(order.symbol).queue_position(order)
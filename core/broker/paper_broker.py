@@ -1,20 +1,35 @@
 # core/broker/paper_broker.py
+import asyncio
 import time
-from typing import Optional
+from typing import Callable, Optional
 from collections import defaultdict
 from .base import IBroker
+from .order_book import SimulatedExchange
 
 
 class PaperBroker(IBroker):
     """
     A simple in-memory paper broker for testing and validation.
     Fills all orders immediately at the provided price.
+
+    With an `exchange` (core.broker.order_book.SimulatedExchange) orders are
+    routed to its order books instead: they wait out the exchange latency,
+    fill against the book (partially, or not at all until the market reaches
+    them) and limit orders rest in the queue. Later fills and cancels are
+    pushed to `on_order_update` as normalised order updates (the
+    core.order_updates format), e.g. OrderManager.apply_order_update.
     """
 
-    def __init__(self):
+    def __init__(self, clock=time.time, exchange: Optional[SimulatedExchange] = None,
+                 on_order_update: Optional[Callable[[dict], object]] = None):
+        self._clock = clock
         self._orders: dict[str, dict] = {}
         self._positions = defaultdict(lambda: {"symbol": "", "qty": 0.0, "avg_price": 0.0})
         self._counter = 0
+        self.exchange = exchange
+        self.on_order_update = on_order_update
+        if exchange is not None:
+            exchange.listener = self._on_exchange_event
 
     # ----------------------------------------------------------------------
     # ✅ Modern IBroker interface
@@ -27,34 +42,24 @@ class PaperBroker(IBroker):
         price: Optional[float] = None,
         idempotency_key: Optional[str] = None,
     ) -> dict:
-        """Implements order placement with instant fills."""
+        """Implements order placement: instant fills, or routed to the simulated exchange."""
         if idempotency_key and idempotency_key in self._orders:
             return self._orders[idempotency_key]
 
         self._counter += 1
         order_id = f"paper-{self._counter}"
-        ts = time.time()
-        fill_qty = float(quantity)
-        fill_price = float(price or 0.0)
-
-        # Update positions
-        pos = self._positions[symbol]
-        pos["symbol"] = symbol
-        if side.upper() == "BUY":
-            total_cost = pos["avg_price"] * pos["qty"] + fill_price * fill_qty
-            pos["qty"] += fill_qty
-            pos["avg_price"] = (total_cost / pos["qty"]) if pos["qty"] else 0.0
-        else:  # SELL
-            pos["qty"] -= fill_qty
-            if pos["qty"] <= 0:
-                pos["qty"] = 0.0
-                pos["avg_price"] = 0.0
-
-        resp = {
-            "order_id": order_id,
-            "status": "filled",
-            "fills": [{"qty": fill_qty, "price": fill_price, "timestamp": ts}],
-        }
+        if self.exchange is not None:
+            resp = await self._route(order_id, symbol, quantity, side, order_type, price)
+        else:
+            ts = self._clock()
+            fill_qty = float(quantity)
+            fill_price = float(price or 0.0)
+            self._update_position(symbol, side, fill_qty, fill_price)
+            resp = {
+                "order_id": order_id,
+                "status": "filled",
+                "fills": [{"qty": fill_qty, "price": fill_price, "timestamp": ts}],
+            }
 
         if idempotency_key:
             self._orders[idempotency_key] = resp
@@ -83,7 +88,59 @@ class PaperBroker(IBroker):
         )
 
     async def cancel_order(self, order_id: str) -> dict:
-        return {"order_id": order_id, "status": "cancelled"}
+        exchange = self.exchange
+        if exchange is None:
+            return {"order_id": order_id, "status": "cancelled"}
+        order = exchange.cancel(order_id, now=self._clock())
+        if order is None:
+            return {"order_id": order_id, "status": "rejected"}
+        await self._wait_for_exchange()
+        return {"order_id": order_id, "status": order.status}
 
     async def get_positions(self) -> list[dict]:
         return list(self._positions.values())
+
+    # ----------------------------------------------------------------------
+    # Simulated exchange routing
+    def _update_position(self, symbol, side, fill_qty, fill_price):
+        pos = self._positions[symbol]
+        pos["symbol"] = symbol
+        if side.upper() == "BUY":
+            total_cost = pos["avg_price"] * pos["qty"] + fill_price * fill_qty
+            pos["qty"] += fill_qty
+            pos["avg_price"] = (total_cost / pos["qty"]) if pos["qty"] else 0.0
+        else:  # SELL
+            pos["qty"] -= fill_qty
+            if pos["qty"] <= 0:
+                pos["qty"] = 0.0
+                pos["avg_price"] = 0.0
+
+    async def _wait_for_exchange(self):
+        # Order entry latency: on a VirtualTimeEventLoop this only moves the clock
+        if self.exchange.latency:
+            await asyncio.sleep(self.exchange.latency)
+            self.exchange.process_until(self._clock())
+
+    async def _route(self, order_id, symbol, quantity, side, order_type, price):
+        limit = price if str(order_type).upper() == "LIMIT" and price else None
+        order = self.exchange.submit(symbol, side, quantity, limit, now=self._clock(), order_id=order_id)
+        await self._wait_for_exchange()
+        resp = order.report()
+        if order.status == "pending":
+            resp["status"] = "open"
+        if not order.fills:
+            # Nothing filled yet: report no fill fields, so it is not booked as one
+            del resp["fills"], resp["filled_qty"], resp["avg_price"]
+        return resp
+
+    def _on_exchange_event(self, order, qty, price, timestamp):
+        if qty:
+            self._update_position(order.symbol, order.side, qty, price)
+        if self.on_order_update is not None:
+            self.on_order_update({
+                "order_id": order.order_id,
+                "status": order.status,
+                "filled_qty": order.filled_qty,
+                "avg_price": order.avg_price,
+                "timestamp": timestamp,
+            })
@@ -1,13 +1,15 @@
 import asyncio
+from core.bar_store import BarStore
 
 class LiveDataManager:
     def __init__(self, config):
         self.config = config
         self._callbacks = []
         self._running = False
+        self.bars = BarStore(capacity=int((config or {}).get("bar_capacity", 2048)))
 
     def subscribe(self, callback):
-        """Register a callback to receive MarketDataSnapshot dicts."""
+        """Register a callback to receive the symbol's BarBuffer on every bar."""
         self._callbacks.append(callback)
 
     async def start(self):
@@ -27,14 +29,14 @@ class LiveDataManager:
         pass
 
     def _convert_to_snapshot(self, raw_data):
-        # Convert raw tick/bar to unified MarketDataSnapshot dict
-        snapshot = {
-            'symbol': raw_data.get('symbol'),
-            'timestamp': raw_data.get('timestamp'),
-            'open': raw_data.get('open_series'),
-            'high': raw_data.get('high_series'),
-            'low': raw_data.get('low_series'),
-            'close': raw_data.get('close_series'),
-            'volume': raw_data.get('volume_series'),
-        }
-        return snapshot
+        # Append the raw bar to the symbol's ring buffer; the buffer itself is the
+        # snapshot (dict-style access to 'close', 'high', ... as zero-copy views)
+        return self.bars.append(
+            raw_data.get('symbol'),
+            raw_data.get('timestamp'),
+            raw_data.get('open'),
+            raw_data.get('high'),
+            raw_data.get('low'),
+            raw_data.get('close'),
+            raw_data.get('volume') or 0.0,
+        )
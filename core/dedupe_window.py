@@ -0,0 +1,61 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict
+
+
+class DedupeWindow:
+    """
+    Keys seen in the last `window_sec` seconds, in insertion-time order.
+
+    Expired keys are evicted lazily from the old end on every call, so each
+    operation is amortised O(1) and the window never holds more than what
+    arrived in one window; `max_size` is a hard cap on top of that.
+    """
+
+    def __init__(self, window_sec: float, max_size: int = 100_000, clock=time.time):
+        self.window_sec = window_sec
+        self.max_size = max_size
+        self._clock = clock
+        self._keys: "OrderedDict[Any, float]" = OrderedDict()
+        self.expired = 0
+        self.overflowed = 0
+
+    def _evict(self, now):
+        keys = self._keys
+        cutoff = now - self.window_sec
+        while keys:
+            key, ts = next(iter(keys.items()))
+            if ts > cutoff:
+                break
+            keys.popitem(last=False)
+            self.expired += 1
+
+    def seen(self, key, now=None) -> bool:
+        """True if `key` was added less than `window_sec` ago."""
+        now = self._clock() if now is None else now
+        self._evict(now)
+        ts = self._keys.get(key)
+        return ts is not None and now - ts < self.window_sec
+
+    def add(self, key, now=None):
+        now = self._clock() if now is None else now
+        self._evict(now)
+        keys = self._keys
+        keys[key] = now
+        keys.move_to_end(key)
+        while len(keys) > self.max_size:
+            keys.popitem(last=False)
+            self.overflowed += 1
+
+    def __contains__(self, key):
+        return self.seen(key)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "size": len(self._keys),
+            "expired": self.expired,
+            "overflowed": self.overflowed,
+        }
@@ -0,0 +1,82 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from core.bar_store import to_epoch
+
+
+class EquityStore:
+    """
+    Append-only equity curve with O(1) running drawdown state.
+
+    `update` keeps current value, running peak and maximum drawdown (as a
+    fraction of the peak) as plain floats, so reading them never rescans the
+    curve. History is kept in a growable float array (doubling, so appends
+    are amortised O(1)):
+
+      history_interval=None -> every update is kept
+      history_interval=s    -> one point per s-second bucket (the bucket's last
+                               value), so per-tick updates cost no more memory
+                               than per-minute ones; drawdown state still sees
+                               every tick
+    """
+
+    def __init__(self, history_interval=None, capacity=1024):
+        self.history_interval = history_interval
+        self._values = np.empty(capacity, dtype=float)
+        self._timestamps = []
+        self._last_bucket = None
+
+        self.current = math.nan
+        self.peak = -math.inf
+        self.max_drawdown = 0.0
+        self.updates = 0
+
+    def update(self, timestamp, value):
+        value = float(value)
+        self.current = value
+        self.updates += 1
+        if value > self.peak:
+            self.peak = value
+        elif self.peak > 0:
+            drawdown = (self.peak - value) / self.peak
+            if drawdown > self.max_drawdown:
+                self.max_drawdown = drawdown
+
+        if self.history_interval:
+            bucket = to_epoch(timestamp) // self.history_interval
+            if bucket == self._last_bucket:
+                self._values[len(self._timestamps) - 1] = value
+                self._timestamps[-1] = timestamp
+                return
+            self._last_bucket = bucket
+        n = len(self._timestamps)
+        if n == len(self._values):
+            grown = np.empty(2 * n, dtype=float)
+            grown[:n] = self._values
+            self._values = grown
+        self._values[n] = value
+        self._timestamps.append(timestamp)
+
+    @property
+    def drawdown(self):
+        """Current drawdown from the running peak, as a fraction."""
+        if self.peak > 0 and self.current == self.current:
+            return (self.peak - self.current) / self.peak
+        return 0.0
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    @property
+    def values(self):
+        """Recorded history values (a view; copy it to keep it past the next update)."""
+        return self._values[:len(self._timestamps)]
+
+    @property
+    def timestamps(self):
+        return list(self._timestamps)
+
+    def to_series(self):
+        return pd.Series(self.values.copy(), index=self.timestamps, dtype=float)
@@ -0,0 +1,272 @@
+import asyncio
+import inspect
+import logging
+from collections import deque
+from typing import Any, Callable, Dict, List, Tuple
+
+from core.market_events import as_record
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "conflate")
+
+
+def _route(event) -> Tuple[Any, Any]:
+    """(event_type, symbol) for market-event records, legacy event dicts and Event objects."""
+    event_type = getattr(event, "event", None)
+    if event_type is not None:
+        return event_type, event.symbol
+    if isinstance(event, dict):
+        return event.get("event"), event.get("symbol")
+    payload = getattr(event, "payload", None)
+    symbol = payload.get("symbol") if payload is not None and hasattr(payload, "get") else None
+    return getattr(event, "type", None), symbol
+
+
+class _QuoteSlot:
+    """Queue placeholder for a symbol's latest pending quote (conflate policy)."""
+    __slots__ = ("symbol",)
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+
+class _Shard:
+    def __init__(self, index, maxsize):
+        self.index = index
+        self.maxsize = maxsize
+        self.items = deque()
+        self.latest_quotes = {}
+        self.not_empty = asyncio.Event()
+        self.not_full = asyncio.Event()
+        self.not_full.set()
+
+        self.published = 0
+        self.processed = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.blocked = 0
+        self.errors = 0
+        self.high_water = 0
+
+    def push(self, item):
+        self.items.append(item)
+        self.published += 1
+        depth = len(self.items)
+        if depth > self.high_water:
+            self.high_water = depth
+        if depth >= self.maxsize:
+            self.not_full.clear()
+        self.not_empty.set()
+
+    def pop_batch(self, limit):
+        batch = []
+        items = self.items
+        while items and len(batch) < limit:
+            item = items.popleft()
+            if isinstance(item, _QuoteSlot):
+                item = self.latest_quotes.pop(item.symbol)
+            batch.append(item)
+        if not items:
+            self.not_empty.clear()
+        self.not_full.set()
+        return batch
+
+    def metrics(self):
+        return {
+            "shard": self.index,
+            "depth": len(self.items),
+            "high_water": self.high_water,
+            "published": self.published,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "conflated": self.conflated,
+            "blocked": self.blocked,
+            "errors": self.errors,
+        }
+
+
+class ShardedEventBus:
+    """
+    Event bus that shards by symbol, with one consumer task per shard.
+
+    Events for a symbol always land on the same shard and are handled in
+    publish order; different shards run concurrently, so a slow handler only
+    delays the symbols that share its shard.
+
+    overflow policy, applied when a shard holds `maxsize` events:
+      "block"       -> publish() waits for space
+      "drop_oldest" -> the shard's oldest event is discarded
+      "conflate"    -> like "block", but a quote for a symbol that already has
+                       a quote pending replaces it in place and never waits
+    """
+
+    def __init__(self, num_shards=8, maxsize=1000, overflow="block", batch_size=64,
+                 conflate_types=("quote",)):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}; expected one of {OVERFLOW_POLICIES}")
+        self.num_shards = num_shards
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self.conflate_types = frozenset(conflate_types)
+
+        self._handlers: Dict[Any, List[Tuple[Callable, bool, bool]]] = {}
+        self._shards = None
+        self._tasks = []
+        self._unfinished = 0
+        self._idle = None
+
+    # -------- Registration --------
+    def register_handler(self, event_type, handler: Callable, batch: bool = False):
+        """
+        Register `handler` for `event_type`. With batch=True the handler gets a
+        list of that type's events from each dequeued batch instead of one
+        event per call.
+        """
+        is_async = inspect.iscoroutinefunction(handler)
+        self._handlers.setdefault(event_type, []).append((handler, is_async, batch))
+        logger.info(f"Handler registered for event type: {event_type}")
+
+    # -------- Lifecycle --------
+    def start(self):
+        if self._tasks:
+            return
+        self._ensure_shards()
+        self._tasks = [asyncio.create_task(self._consume(shard)) for shard in self._shards]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    async def join(self):
+        """Wait until every published event has been handled."""
+        self._ensure_shards()
+        await self._idle.wait()
+
+    def _ensure_shards(self):
+        if self._shards is None:
+            self._shards = [_Shard(i, self.maxsize) for i in range(self.num_shards)]
+            self._idle = asyncio.Event()
+            self._idle.set()
+
+    # -------- Publishing --------
+    def shard_for(self, symbol) -> int:
+        return hash(symbol) % self.num_shards if symbol is not None else 0
+
+    async def publish(self, event):
+        self._ensure_shards()
+        if isinstance(event, dict):
+            # Legacy trade/quote/ohlc dicts travel as records from here on
+            event = as_record(event)
+        event_type, symbol = _route(event)
+        shard = self._shards[self.shard_for(symbol)]
+
+        if self.overflow == "conflate" and event_type in self.conflate_types and symbol is not None:
+            if symbol in shard.latest_quotes:
+                shard.latest_quotes[symbol] = event
+                shard.conflated += 1
+                return
+            item = _QuoteSlot(symbol)
+        else:
+            item = event
+
+        if len(shard.items) >= self.maxsize:
+            if self.overflow == "drop_oldest":
+                dropped = shard.items.popleft()
+                if isinstance(dropped, _QuoteSlot):
+                    shard.latest_quotes.pop(dropped.symbol, None)
+                shard.dropped += 1
+                self._task_done(1)
+            else:
+                shard.blocked += 1
+                while len(shard.items) >= self.maxsize:
+                    await shard.not_full.wait()
+                # A same-symbol quote may have been queued while we waited
+                if isinstance(item, _QuoteSlot) and symbol in shard.latest_quotes:
+                    shard.latest_quotes[symbol] = event
+                    shard.conflated += 1
+                    return
+
+        if isinstance(item, _QuoteSlot):
+            shard.latest_quotes[symbol] = event
+        self._unfinished += 1
+        self._idle.clear()
+        shard.push(item)
+
+    # Drop-in for EventQueue.put
+    put = publish
+
+    # -------- Consuming --------
+    async def _consume(self, shard: _Shard):
+        while True:
+            await shard.not_empty.wait()
+            batch = shard.pop_batch(self.batch_size)
+            try:
+                await self._handle_batch(shard, batch)
+            finally:
+                shard.processed += len(batch)
+                self._task_done(len(batch))
+
+    async def _handle_batch(self, shard: _Shard, batch):
+        batched: Dict[Any, list] = {}
+        for event in batch:
+            event_type, _ = _route(event)
+            handlers = self._handlers.get(event_type)
+            if not handlers:
+                logger.debug(f"No handlers registered for event type: {event_type}")
+                continue
+            has_batch = False
+            for handler, is_async, is_batch in handlers:
+                if is_batch:
+                    has_batch = True
+                    continue
+                try:
+                    if is_async:
+                        await handler(event)
+                    else:
+                        handler(event)
+                except Exception as e:
+                    shard.errors += 1
+                    logger.error(f"Error in handler for event {event_type}: {e}")
+            if has_batch:
+                batched.setdefault(event_type, []).append(event)
+
+        for event_type, events in batched.items():
+            for handler, is_async, is_batch in self._handlers[event_type]:
+                if not is_batch:
+                    continue
+                try:
+                    if is_async:
+                        await handler(events)
+                    else:
+                        handler(events)
+                except Exception as e:
+                    shard.errors += 1
+                    logger.error(f"Error in batch handler for event {event_type}: {e}")
+
+    def _task_done(self, count):
+        self._unfinished -= count
+        if self._unfinished <= 0:
+            self._unfinished = 0
+            self._idle.set()
+
+    # -------- Metrics --------
+    def metrics(self) -> Dict[str, Any]:
+        """Backpressure counters, totalled across shards and per shard."""
+        self._ensure_shards()
+        shards = [shard.metrics() for shard in self._shards]
+        totals = {
+            key: sum(s[key] for s in shards)
+            for key in ("depth", "published", "processed", "dropped", "conflated", "blocked", "errors")
+        }
+        totals["max_depth"] = max(s["depth"] for s in shards)
+        totals["high_water"] = max(s["high_water"] for s in shards)
+        totals["shards"] = shards
+        return totals
@@ -1,34 +1,50 @@
 import asyncio
+import inspect
 import logging
-from typing import Callable, Dict, Any, List
+from typing import Callable, Dict, Any, List, Tuple
+
+from core.market_events import as_record
 
 logger = logging.getLogger(__name__)
 
 class EventDispatcher:
     def __init__(self):
-        self._handlers: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+        self._handlers: Dict[str, List[Tuple[Callable[[Any], None], bool]]] = {}
 
-    def register_handler(self, event_type: str, handler: Callable[[Dict[str, Any]], None]):
+    def register_handler(self, event_type: str, handler: Callable[[Any], None]):
         if event_type not in self._handlers:
             self._handlers[event_type] = []
-        self._handlers[event_type].append(handler)
+        # Decide once whether the handler must be awaited
+        self._handlers[event_type].append((handler, inspect.iscoroutinefunction(handler)))
         logger.info(f"Handler registered for event type: {event_type}")
 
-    async def dispatch(self, event: Dict[str, Any]):
-        event_type = event.get("event")
+    async def dispatch(self, event):
+        """
+        Dispatch a market-event record (TradeEvent, QuoteEvent, ...) or a legacy
+        event dict; trade/quote/ohlc dicts are turned into records first.
+        """
+        if isinstance(event, dict):
+            event = as_record(event)
+        if isinstance(event, dict):
+            event_type = event.get("event")
+        else:
+            event_type = getattr(event, "event", None)
         if not event_type:
             logger.warning("Received event without 'event' key to dispatch")
             return
 
-        handlers = self._handlers.get(event_type, [])
+        handlers = self._handlers.get(event_type)
         if not handlers:
             logger.debug(f"No handlers registered for event type: {event_type}")
             return
 
-        for handler in handlers:
+        for handler, is_async in handlers:
             try:
-                result = handler(event)
-                if asyncio.iscoroutine(result):
-                    await result
+                if is_async:
+                    await handler(event)
+                else:
+                    result = handler(event)
+                    if asyncio.iscoroutine(result):
+                        await result
             except Exception as e:
                 logger.error(f"Error in handler for event {event_type}: {e}")
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set
+
+import websockets
+
+from core import upstox_protobuf_decoder
+
+logger = logging.getLogger(__name__)
+
+
+class FeedConsumer:
+    """
+    Bounded per-consumer queue of decoded frames; async-iterable.
+
+    A consumer that falls behind loses its oldest frames (counted in
+    `dropped`) instead of slowing the socket reader or other consumers.
+    """
+
+    def __init__(self, client, maxsize=10000):
+        self._client = client
+        self._queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def _offer(self, item):
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(item)
+
+    async def get(self):
+        return await self._queue.get()
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def close(self):
+        self._client.remove_consumer(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self._queue.get()
+
+
+class MarketFeedClient:
+    """
+    Single long-lived market-data WebSocket shared by in-process consumers.
+
+    - reconnects with capped exponential backoff (plus jitter) after any
+      error, close or stale period, and replays every active subscription
+    - treats the feed as stale when nothing arrives for `stale_after` seconds;
+      protocol pings keep quiet-but-healthy connections open
+    - subscribes in bulk: one message per mode, whatever the symbol count
+    - fans each decoded frame out to every consumer queue
+
+    `url` may be a string or an async callable returning one, so a freshly
+    authorized URL (Upstox V3 hands out single-use ones) is fetched per attempt.
+    `handshake(ws)`, if given, runs on every connection before the
+    subscriptions are replayed (e.g. to send an authorization message).
+    """
+
+    def __init__(
+        self,
+        url,
+        decoder: Optional[Callable[[Any], Any]] = None,
+        stale_after: float = 30.0,
+        ping_interval: Optional[float] = 10.0,
+        backoff_initial: float = 0.5,
+        backoff_max: float = 30.0,
+        connect_kwargs: Optional[Dict[str, Any]] = None,
+        handshake: Optional[Callable[[Any], Awaitable[None]]] = None,
+    ):
+        self.url = url
+        # Binary V3 frames -> market-event records (new trades only); text -> dict
+        self.decoder = decoder or upstox_protobuf_decoder.FeedDecoder()
+        self.stale_after = stale_after
+        self.ping_interval = ping_interval
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.connect_kwargs = connect_kwargs or {}
+        self.handshake = handshake
+
+        self._subscriptions: Dict[str, Set[str]] = {}
+        self._consumers = []
+        self._ws = None
+        self._task = None
+        self._stopping = False
+        self.connected = asyncio.Event()
+
+        self.connects = 0
+        self.reconnects = 0
+        self.messages = 0
+        self.decode_errors = 0
+        self.last_message_at = None
+
+    # -------- Consumers --------
+    def consumer(self, maxsize=10000) -> FeedConsumer:
+        consumer = FeedConsumer(self, maxsize)
+        self._consumers.append(consumer)
+        return consumer
+
+    def remove_consumer(self, consumer):
+        if consumer in self._consumers:
+            self._consumers.remove(consumer)
+
+    # -------- Subscriptions --------
+    def subscription_message(self, method: str, symbols: Iterable[str], mode: str) -> bytes:
+        """Upstox V3 (un)subscribe request; the feed expects it as a binary frame."""
+        return json.dumps({
+            "guid": uuid.uuid4().hex,
+            "method": method,
+            "data": {"mode": mode, "instrumentKeys": sorted(symbols)},
+        }).encode("utf-8")
+
+    async def subscribe(self, symbols: Iterable[str], mode: str = "full"):
+        current = self._subscriptions.setdefault(mode, set())
+        new = set(symbols) - current
+        if not new:
+            return
+        current.update(new)
+        await self._send_if_connected(self.subscription_message("sub", new, mode))
+
+    async def unsubscribe(self, symbols: Iterable[str], mode: str = "full"):
+        current = self._subscriptions.get(mode, set())
+        gone = current & set(symbols)
+        if not gone:
+            return
+        current.difference_update(gone)
+        await self._send_if_connected(self.subscription_message("unsub", gone, mode))
+
+    @property
+    def subscriptions(self) -> Dict[str, Set[str]]:
+        return {mode: set(symbols) for mode, symbols in self._subscriptions.items() if symbols}
+
+    async def _send_if_connected(self, message):
+        if self._ws is not None and self.connected.is_set():
+            try:
+                await self._ws.send(message)
+            except websockets.ConnectionClosed:
+                # The reconnect path replays it
+                pass
+
+    async def _replay_subscriptions(self, ws):
+        for mode, symbols in list(self._subscriptions.items()):
+            if symbols:
+                await ws.send(self.subscription_message("sub", symbols, mode))
+
+    # -------- Lifecycle --------
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        self._stopping = True
+        if self._ws is not None:
+            await self._ws.close()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        delay = self.backoff_initial
+        while not self._stopping:
+            try:
+                url = self.url if isinstance(self.url, str) else await self.url()
+                async with websockets.connect(url, ping_interval=self.ping_interval, **self.connect_kwargs) as ws:
+                    self._ws = ws
+                    self.connects += 1
+                    if self.connects > 1:
+                        self.reconnects += 1
+                    if self.handshake is not None:
+                        await self.handshake(ws)
+                    # Mark connected before the replay so subscribe() calls racing it are sent too
+                    self.connected.set()
+                    await self._replay_subscriptions(ws)
+                    logger.info(f"Market feed connected ({self.connects} connects)")
+                    delay = self.backoff_initial
+                    await self._receive(ws)
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                logger.warning(f"Market feed stale for {self.stale_after}s; reconnecting")
+            except websockets.ConnectionClosed as e:
+                logger.warning(f"Market feed closed: {e}")
+            except Exception as e:
+                logger.error(f"Market feed error: {e}")
+            finally:
+                self.connected.clear()
+                self._ws = None
+
+            if self._stopping:
+                break
+            sleep_for = delay * (0.5 + random.random() / 2)
+            logger.info(f"Reconnecting market feed in {sleep_for:.2f}s")
+            await asyncio.sleep(sleep_for)
+            delay = min(delay * 2, self.backoff_max)
+
+    async def _receive(self, ws):
+        while True:
+            raw = await asyncio.wait_for(ws.recv(), timeout=self.stale_after)
+            self.messages += 1
+            self.last_message_at = time.time()
+            try:
+                payload = self.decoder(raw)
+            except Exception as e:
+                self.decode_errors += 1
+                logger.error(f"Market feed decode error: {e}")
+                continue
+            if not payload:
+                continue
+            for consumer in self._consumers:
+                consumer._offer(payload)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected.is_set(),
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "messages": self.messages,
+            "decode_errors": self.decode_errors,
+            "last_message_at": self.last_message_at,
+            "consumers": len(self._consumers),
+            "dropped": sum(c.dropped for c in self._consumers),
+        }
@@ -0,0 +1,269 @@
+"""
+Local historical bar/tick store: one directory of raw .npy columns per
+symbol per UTC day, read back through memory maps.
+
+    <root>/<symbol>/<YYYY-MM-DD>/<column>.npy
+    <root>/index.json      symbol -> day -> [rows, first ts, last ts]
+
+Timestamps are float64 epoch seconds and every partition is sorted by them,
+so a time range is two binary searches per day and the result columns are
+views into the mapped files: nothing is read until it is touched, and the
+page cache is shared by every process reading the same history.
+"""
+import heapq
+import json
+import logging
+import os
+import shutil
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from core.bar_store import COLUMNS
+from core.interfaces import IDataManager
+
+logger = logging.getLogger(__name__)
+
+DAY = 86_400
+INDEX_FILE = "index.json"
+# Partitions kept mapped at once; each mapped column holds a file descriptor
+MAX_OPEN_PARTITIONS = 256
+
+
+def to_epochs(values) -> np.ndarray:
+    """Epoch seconds (float64) from epoch numbers or anything pandas parses as a datetime."""
+    values = pd.Series(values) if not isinstance(values, pd.Series) else values
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+    stamps = pd.to_datetime(values, utc=True)
+    return ((stamps - pd.Timestamp(0, tz="UTC")) / pd.Timedelta(seconds=1)).to_numpy(dtype=float)
+
+
+def _day_key(day_number):
+    return (datetime(1970, 1, 1) + timedelta(days=int(day_number))).strftime("%Y-%m-%d")
+
+
+def time_bound(value, end=False):
+    """
+    A range bound as epoch seconds. Bounds are inclusive; a date-only end
+    ("2024-01-31") covers that whole day.
+    """
+    if value is None:
+        return np.inf if end else -np.inf
+    if isinstance(value, (int, float, np.number)):
+        return float(value)
+    stamp = pd.Timestamp(value)
+    stamp = stamp.tz_localize("UTC") if stamp.tzinfo is None else stamp.tz_convert("UTC")
+    epoch = stamp.timestamp()
+    if end and isinstance(value, str) and len(value.strip()) <= 10:
+        epoch = np.nextafter(epoch + DAY, -np.inf)
+    return epoch
+
+
+def as_columns(data):
+    """{column: ndarray} from a DataFrame, a dict of sequences or a BarBuffer."""
+    if isinstance(data, pd.DataFrame):
+        frame = data.reset_index() if "timestamp" not in data and data.index.name == "timestamp" else data
+        return {name: frame[name] for name in frame.columns}
+    if hasattr(data, "window") and hasattr(data, "column"):
+        return {name: np.array(data.column(name)) for name in COLUMNS}
+    return dict(data)
+
+
+class HistoryStore(IDataManager):
+    """
+    Partitioned, memory-mapped history (see the module docstring for the layout).
+
+    `store_data` splits rows by UTC day and merges them into the existing
+    partitions (a timestamp already stored is overwritten). `fetch_data`
+    returns {column: array} for [start, end]; a range inside one day is a set
+    of views into the mapped files, a range over several days is concatenated.
+    `partitions` yields the per-day views without ever concatenating.
+    """
+
+    def __init__(self, root, max_open_partitions=MAX_OPEN_PARTITIONS):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        index_path = self.root / INDEX_FILE
+        self._index = json.loads(index_path.read_text()) if index_path.exists() else {}
+        self.max_open_partitions = max_open_partitions
+        self._maps = OrderedDict()
+
+    # -------- Index --------
+    def symbols(self):
+        return sorted(self._index)
+
+    def days(self, symbol):
+        return sorted(self._index.get(symbol, {}).get("days", {}))
+
+    def columns(self, symbol):
+        return list(self._index.get(symbol, {}).get("columns", ()))
+
+    def _save_index(self):
+        path = self.root / INDEX_FILE
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._index, sort_keys=True))
+        os.replace(tmp, path)
+
+    # -------- Writes --------
+    def store_data(self, symbol: str, data):
+        columns = as_columns(data)
+        if "timestamp" not in columns:
+            raise ValueError("history rows need a 'timestamp' column")
+        columns["timestamp"] = to_epochs(columns["timestamp"])
+        columns = {name: np.asarray(values, dtype=float) for name, values in columns.items()
+                   if name != "symbol"}
+        if not len(columns["timestamp"]):
+            return 0
+
+        entry = self._index.setdefault(symbol, {"columns": list(columns), "days": {}})
+        if set(columns) != set(entry["columns"]):
+            raise ValueError(f"{symbol} is stored with columns {entry['columns']}, got {list(columns)}")
+
+        order = np.argsort(columns["timestamp"], kind="stable")
+        columns = {name: values[order] for name, values in columns.items()}
+        day_numbers = np.floor(columns["timestamp"] / DAY).astype(np.int64)
+        bounds = np.flatnonzero(np.diff(day_numbers)) + 1
+        for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(day_numbers)]):
+            day = _day_key(day_numbers[lo])
+            self._write_partition(symbol, day, {name: values[lo:hi] for name, values in columns.items()})
+        self._save_index()
+        return len(order)
+
+    def _write_partition(self, symbol, day, rows):
+        entry = self._index[symbol]
+        directory = self.root / symbol / day
+        if day in entry["days"]:
+            existing = self._load(symbol, day)
+            # New rows win on equal timestamps: keep the last occurrence after a stable sort
+            merged = {name: np.concatenate([existing[name], rows[name]]) for name in entry["columns"]}
+            order = np.argsort(merged["timestamp"], kind="stable")
+            merged = {name: values[order] for name, values in merged.items()}
+            stamps = merged["timestamp"]
+            keep = np.r_[stamps[1:] != stamps[:-1], True]
+            rows = {name: values[keep] for name, values in merged.items()}
+        else:
+            # Rows are sorted already; drop duplicates within the batch the same way
+            stamps = rows["timestamp"]
+            keep = np.r_[stamps[1:] != stamps[:-1], True]
+            rows = {name: values[keep] for name, values in rows.items()}
+
+        # Write a fresh directory and swap it in, so readers never see half a partition
+        staging = directory.with_name(day + ".tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        for name in entry["columns"]:
+            np.save(staging / f"{name}.npy", np.ascontiguousarray(rows[name]))
+        self._forget(symbol, day)
+        if directory.exists():
+            old = directory.with_name(day + ".old")
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(directory, old)
+            os.replace(staging, directory)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(staging, directory)
+        stamps = rows["timestamp"]
+        entry["days"][day] = [len(stamps), float(stamps[0]), float(stamps[-1])]
+
+    # -------- Reads --------
+    def _load(self, symbol, day):
+        """Memory-mapped columns of one partition (LRU-cached until it is rewritten)."""
+        key = (symbol, day)
+        maps = self._maps.get(key)
+        if maps is None:
+            directory = self.root / symbol / day
+            maps = self._maps[key] = {name: np.load(directory / f"{name}.npy", mmap_mode="r")
+                                      for name in self._index[symbol]["columns"]}
+            if len(self._maps) > self.max_open_partitions:
+                # Views already handed out keep their own mapping alive
+                self._maps.popitem(last=False)
+        else:
+            self._maps.move_to_end(key)
+        return maps
+
+    def _forget(self, symbol, day):
+        self._maps.pop((symbol, day), None)
+
+    def partitions(self, symbol, start=None, end=None):
+        """Yield (day, {column: view}) for each day of [start, end] that has rows in range."""
+        entry = self._index.get(symbol)
+        if entry is None:
+            return
+        lo, hi = time_bound(start), time_bound(end, end=True)
+        if lo > hi:
+            return
+        days = entry["days"]
+        if np.isfinite(lo) and np.isfinite(hi):
+            candidates = (_day_key(n) for n in range(int(lo // DAY), int(hi // DAY) + 1))
+        else:
+            candidates = iter(sorted(days))
+        for day in candidates:
+            meta = days.get(day)
+            if meta is None or meta[2] < lo or meta[1] > hi:
+                continue
+            columns = self._load(symbol, day)
+            stamps = columns["timestamp"]
+            i = 0 if meta[1] >= lo else int(np.searchsorted(stamps, lo, side="left"))
+            j = meta[0] if meta[2] <= hi else int(np.searchsorted(stamps, hi, side="right"))
+            if i < j:
+                yield day, {name: values[i:j] for name, values in columns.items()}
+
+    def fetch_data(self, symbol: str, start=None, end=None):
+        """
+        {column: array} for rows with start <= timestamp <= end (either may be
+        None). Views into the mapped files when the range falls in one day.
+        """
+        parts = [columns for _, columns in self.partitions(symbol, start, end)]
+        names = self.columns(symbol)
+        if not parts:
+            return {name: np.empty(0) for name in names}
+        if len(parts) == 1:
+            return parts[0]
+        return {name: np.concatenate([part[name] for part in parts]) for name in names}
+
+    def to_frame(self, symbol, start=None, end=None):
+        data = self.fetch_data(symbol, start, end)
+        frame = pd.DataFrame({name: np.asarray(values) for name, values in data.items()})
+        frame.insert(0, "symbol", symbol)
+        return frame
+
+    # -------- Backtest source --------
+    def source(self, symbols=None, start=None, end=None):
+        """Bars of `symbols` (default: all) in [start, end], as a BacktestEngine / iter_bars source."""
+        return _StoreSource(self, symbols or self.symbols(), start, end)
+
+
+class _StoreSource:
+    """Streams stored bars merged by time, one mapped day partition at a time per symbol."""
+
+    def __init__(self, store, symbols, start, end):
+        self.store = store
+        self.symbols = list(symbols)
+        self.start = start
+        self.end = end
+
+    def _symbol_bars(self, symbol, chunksize):
+        for _, columns in self.store.partitions(symbol, self.start, self.end):
+            volume = columns.get("volume")
+            for i in range(0, len(columns["timestamp"]), chunksize):
+                chunk = slice(i, i + chunksize)
+                stamps = columns["timestamp"][chunk].tolist()
+                yield from zip(
+                    stamps,
+                    [symbol] * len(stamps),
+                    columns["open"][chunk].tolist(),
+                    columns["high"][chunk].tolist(),
+                    columns["low"][chunk].tolist(),
+                    columns["close"][chunk].tolist(),
+                    volume[chunk].tolist() if volume is not None else [0.0] * len(stamps),
+                )
+
+    def iter_bars(self, chunksize=100_000):
+        streams = [self._symbol_bars(symbol, chunksize) for symbol in self.symbols]
+        if len(streams) == 1:
+            return streams[0]
+        return heapq.merge(*streams, key=lambda bar: bar[0])
@@ -1,32 +1,99 @@
-import requests
+import asyncio
+import logging
+from typing import Iterable, List, Optional
 
-class LiveBroker:
-    def __init__(self, api_key, access_token, base_url):
+import httpx
+
+from core.broker.base import IBroker
+
+logger = logging.getLogger(__name__)
+
+
+class LiveBroker(IBroker):
+    """
+    Asyncio-native REST broker.
+
+    One pooled httpx.AsyncClient is kept for the broker's lifetime, so orders
+    reuse warm keep-alive connections, and every request is bounded by
+    `timeout` seconds. Nothing here blocks the event loop: a slow order call
+    only delays the coroutine awaiting it.
+    """
+
+    def __init__(self, api_key, access_token, base_url, timeout: float = 5.0,
+                 max_connections: int = 20, max_concurrency: int = 10,
+                 client: Optional[httpx.AsyncClient] = None):
         self.api_key = api_key
         self.access_token = access_token
         self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self._client = client or httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 2.0)),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
 
     def headers(self):
         return {"Authorization": f"Bearer {self.access_token}"}
 
-    def place_order(self, symbol, qty, order_type, side, price=None):
+    async def _request(self, method, path, **kwargs):
+        r = await self._client.request(method, f"{self.base_url}{path}", headers=self.headers(), **kwargs)
+        r.raise_for_status()
+        return r.json()
+
+    # -------- IBroker --------
+    async def place_order(
+        self,
+        symbol: str,
+        quantity: float,
+        side: str,
+        order_type: str,
+        price: Optional[float] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> dict:
         order_data = {
             "symbol": symbol,
-            "qty": qty,
+            "qty": quantity,
             "side": side,  # "BUY" or "SELL"
             "order_type": order_type,  # "MARKET" or "LIMIT"
             "price": price
         }
-        r = requests.post(f"{self.base_url}/orders", headers=self.headers(), json=order_data)
-        r.raise_for_status()
-        return r.json()
+        if idempotency_key:
+            order_data["tag"] = idempotency_key
+        return await self._request("POST", "/orders", json=order_data)
 
-    def fetch_order_status(self, order_id):
-        r = requests.get(f"{self.base_url}/orders/{order_id}", headers=self.headers())
-        r.raise_for_status()
-        return r.json()
+    async def cancel_order(self, order_id: str) -> dict:
+        return await self._request("DELETE", f"/orders/{order_id}")
 
-    def get_account_info(self):
-        r = requests.get(f"{self.base_url}/account", headers=self.headers())
-        r.raise_for_status()
-        return r.json()
+    async def get_positions(self) -> List[dict]:
+        return await self._request("GET", "/positions")
+
+    # Backward compatibility with OrderManager's broker.send_order
+    send_order = place_order
+
+    # -------- Concurrent submission --------
+    async def place_orders(self, orders: Iterable[dict]) -> list:
+        """
+        Submit several orders concurrently, at most `max_concurrency` in flight.
+        `orders` are place_order keyword dicts; results come back in input order,
+        with the exception in place of the response for any order that failed.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def submit(order):
+            async with semaphore:
+                return await self.place_order(**order)
+
+        return await asyncio.gather(*(submit(order) for order in orders), return_exceptions=True)
+
+    # OrderManager.place_orders hands whole batches to broker.send_orders
+    send_orders = place_orders
+
+    # -------- Queries --------
+    async def fetch_order_status(self, order_id):
+        return await self._request("GET", f"/orders/{order_id}")
+
+    async def get_account_info(self):
+        return await self._request("GET", "/account")
+
+    async def close(self):
+        await self._client.aclose()
@@ -1,9 +1,8 @@
 import os
-import json
 import asyncio
 import aiohttp
-import websockets
 from dotenv import load_dotenv
+from core.feed_client import MarketFeedClient
 
 class MarketDataManager:
     def __init__(self, config):
@@ -14,6 +13,7 @@ class MarketDataManager:
         self.ws_url = None
         self.subscribed_symbols = set()
         self.config = config
+        self.feed = None
 
     async def fetch_authorized_ws_url(self):
         headers = {
@@ -21,6 +21,8 @@ class MarketDataManager:
             "Accept": "application/json",
         }
         authorize_url = "https://api.upstox.com/api/market-data-feed/authorize/v3"
+        # The previous URL was single-use; never fall back to it after a failure
+        self.ws_url = None
         async with aiohttp.ClientSession() as session:
             async with session.get(authorize_url, headers=headers) as response:
                 text = await response.text()
@@ -35,31 +37,37 @@ class MarketDataManager:
                     print("API endpoint not found; verify the URL.")
                 else:
                     print(f"Failed to authorize WebSocket URI: {response.status}")
-                    self.ws_url = None
 
-    async def start(self):
+    async def _authorized_url(self):
+        # Upstox V3 authorized URLs are single-use, so fetch one per connection attempt
         await self.fetch_authorized_ws_url()
         if not self.ws_url:
-            print("WebSocket URL not available, aborting connection.")
-            return
+            raise ConnectionError("WebSocket URL not available")
+        return self.ws_url
+
+    def _feed_client(self):
+        # Created once: consumers attached before start() must stay on the running client
+        if not self.feed:
+            self.feed = MarketFeedClient(self._authorized_url)
+        return self.feed
+
+    async def start(self):
+        self._feed_client()
+        await self._subscribe_to_symbols()
+        await self.feed.run()
 
-        async with websockets.connect(self.ws_url) as websocket:
-            await self._subscribe_to_symbols(websocket)
-            await self._receive_market_data(websocket)
+    async def stop(self):
+        if self.feed:
+            await self.feed.stop()
 
-    async def _subscribe_to_symbols(self, websocket):
-        for symbol in self.subscribed_symbols:
-            subscribe_packet = json.dumps({
-                "action": "subscribe",
-                "symbol": symbol
-            })
-            await websocket.send(subscribe_packet)
-            print(f"Sent subscribe request for {symbol}")
+    def consumer(self, maxsize=10000):
+        """Queue of decoded feed frames; any number of consumers can attach."""
+        return self._feed_client().consumer(maxsize)
 
-    async def _receive_market_data(self, websocket):
-        async for message in websocket:
-            data = json.loads(message)
-            print(f"Received market data: {data}")
+    async def _subscribe_to_symbols(self):
+        # One bulk request for all symbols; the feed client replays it on reconnect
+        await self.feed.subscribe(self.subscribed_symbols)
+        print(f"Sent subscribe request for {len(self.subscribed_symbols)} symbols")
 
     def subscribe(self, symbol: str):
         self.subscribed_symbols.add(symbol)
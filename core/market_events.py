@@ -0,0 +1,100 @@
+# core/market_events.py
+"""
+Compact typed market-data records.
+
+Slotted classes with no per-instance __dict__, built straight from feed
+frames (see upstox_protobuf_decoder) without going through JSON or dicts.
+Timestamps from the binary decoder are epoch seconds; the JSON parser passes
+the feed's timestamp through unchanged.
+
+Records keep a read-only dict-style `get`/`[]` so code written against the
+old event dicts keeps working, but attribute access is the fast path: the
+dispatchers turn legacy dict events into records once (`as_record`), and the
+hot handlers read attributes only.
+"""
+
+
+class _Record:
+    __slots__ = ()
+    event = None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def to_dict(self):
+        data = {"event": self.event}
+        data.update((name, getattr(self, name)) for name in self.__slots__)
+        return data
+
+
+class TradeEvent(_Record):
+    __slots__ = ("symbol", "price", "quantity", "timestamp", "close_price")
+    event = "trade"
+
+    def __init__(self, symbol, price, quantity, timestamp=None, close_price=None):
+        self.symbol = symbol
+        self.price = price
+        self.quantity = quantity
+        self.timestamp = timestamp
+        self.close_price = close_price
+
+    def __repr__(self):
+        return f"TradeEvent({self.symbol!r}, price={self.price}, quantity={self.quantity}, timestamp={self.timestamp})"
+
+
+class QuoteEvent(_Record):
+    __slots__ = ("symbol", "bid_price", "bid_quantity", "ask_price", "ask_quantity", "timestamp")
+    event = "quote"
+
+    def __init__(self, symbol, bid_price, bid_quantity, ask_price, ask_quantity, timestamp=None):
+        self.symbol = symbol
+        self.bid_price = bid_price
+        self.bid_quantity = bid_quantity
+        self.ask_price = ask_price
+        self.ask_quantity = ask_quantity
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return (f"QuoteEvent({self.symbol!r}, bid={self.bid_price}x{self.bid_quantity}, "
+                f"ask={self.ask_price}x{self.ask_quantity}, timestamp={self.timestamp})")
+
+
+class OhlcEvent(_Record):
+    __slots__ = ("symbol", "open", "high", "low", "close", "volume", "timestamp", "interval")
+    event = "ohlc"
+
+    def __init__(self, symbol, open, high, low, close, volume, timestamp=None, interval=None):
+        self.symbol = symbol
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.timestamp = timestamp
+        self.interval = interval
+
+    def __repr__(self):
+        return (f"OhlcEvent({self.symbol!r}, {self.interval}, o={self.open}, h={self.high}, "
+                f"l={self.low}, c={self.close}, v={self.volume}, timestamp={self.timestamp})")
+
+
+RECORD_TYPES = {cls.event: cls for cls in (TradeEvent, QuoteEvent, OhlcEvent)}
+
+
+def as_record(event):
+    """
+    The record for a legacy market-event dict ({"event": "trade", ...});
+    records and anything that is not a trade/quote/ohlc dict pass through.
+    Missing fields become None.
+    """
+    if isinstance(event, dict):
+        cls = RECORD_TYPES.get(event.get("event"))
+        if cls is not None:
+            return cls(*[event.get(name) for name in cls.__slots__])
+    return event
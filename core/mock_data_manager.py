@@ -1,10 +1,39 @@
-import asyncio
+import numpy as np
+from core.history_store import as_columns, time_bound, to_epochs
 from core.interfaces import IDataManager
 
 class MockDataManager(IDataManager):
-    def fetch_data(self, symbol: str, start: str, end: str):
-        print(f"MockDataManager: fetching data for {symbol} from {start} to {end}")
-        return {}
+    """In-memory stand-in for HistoryStore: same store_data / fetch_data contract, nothing on disk."""
+
+    def __init__(self):
+        self._data = {}
+
+    def fetch_data(self, symbol: str, start=None, end=None):
+        columns = self._data.get(symbol)
+        if columns is None:
+            return {}
+        stamps = columns["timestamp"]
+        i = np.searchsorted(stamps, time_bound(start), side="left")
+        j = np.searchsorted(stamps, time_bound(end, end=True), side="right")
+        return {name: values[i:j] for name, values in columns.items()}
 
     def store_data(self, symbol: str, data):
-        print(f"MockDataManager: storing data for {symbol}")
+        columns = as_columns(data)
+        if "timestamp" not in columns:
+            raise ValueError("history rows need a 'timestamp' column")
+        columns["timestamp"] = to_epochs(columns["timestamp"])
+        columns = {name: np.asarray(values, dtype=float) for name, values in columns.items() if name != "symbol"}
+        stored = len(columns["timestamp"])
+        if not stored:
+            return 0
+        existing = self._data.get(symbol)
+        if existing is not None:
+            if set(columns) != set(existing):
+                raise ValueError(f"{symbol} is stored with columns {list(existing)}, got {list(columns)}")
+            columns = {name: np.concatenate([existing[name], columns[name]]) for name in existing}
+        order = np.argsort(columns["timestamp"], kind="stable")
+        stamps = columns["timestamp"][order]
+        # Later rows win on equal timestamps, as in HistoryStore
+        order = order[np.r_[stamps[1:] != stamps[:-1], True]]
+        self._data[symbol] = {name: values[order] for name, values in columns.items()}
+        return stored
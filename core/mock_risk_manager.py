@@ -11,6 +11,7 @@ class MockRiskManager(IRiskManager):
         self._default_position_size = default_position_size
         self.is_panic = False                   # Panic-stop flag
         self.max_single_order_value = None      # Optional single order cap
+        self.limits_version = 0                 # Bumped by update_risk_limits
 
     def update_risk_limits(self, limits):
         print(f"MockRiskManager: update_risk_limits {limits}")
@@ -18,6 +19,7 @@ class MockRiskManager(IRiskManager):
             self.max_single_order_value = limits["max_single_order_value"]
         if "default_position_size" in limits:
             self._default_position_size = limits["default_position_size"]
+        self.limits_version += 1
 
     def check_risk(self, trade):
         print(f"MockRiskManager: check_risk for trade {trade}")
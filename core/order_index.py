@@ -0,0 +1,121 @@
+import heapq
+import itertools
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+
+class OrderIndex:
+    """
+    Order store indexed by order ID, symbol and status.
+
+    Orders are mutated in place by OrderManager (fills, cancels), so after a
+    change call `refresh(order)` to re-file its status and timestamp.
+
+    Open orders also sit in a min-heap keyed on `last_update`; `pop_stale`
+    pops only the expired entries, so a sweep costs O(k log n) for k stale
+    orders instead of a scan of every order. Heap entries are invalidated
+    lazily: an entry whose order has since been updated, closed or removed is
+    discarded when it surfaces.
+    """
+
+    def __init__(self, open_statuses: Iterable = ()):
+        self.open_statuses = frozenset(open_statuses)
+        self._by_id: Dict[str, object] = {}
+        self._by_symbol: Dict[str, Dict[str, object]] = defaultdict(dict)
+        self._by_status: Dict[object, Dict[str, object]] = defaultdict(dict)
+        # order_id -> (status, last_update) as last filed
+        self._filed: Dict[str, tuple] = {}
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, order_id):
+        return order_id in self._by_id
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def add(self, order):
+        order_id = order.order_id
+        if order_id in self._by_id:
+            self.remove(order_id)
+        self._by_id[order_id] = order
+        self._by_symbol[order.symbol][order_id] = order
+        self._file(order)
+
+    def refresh(self, order):
+        if order.order_id in self._by_id:
+            self._file(order)
+
+    def _file(self, order):
+        order_id = order.order_id
+        filed = self._filed.get(order_id)
+        if filed is not None and filed[0] is not order.status:
+            self._by_status[filed[0]].pop(order_id, None)
+        self._by_status[order.status][order_id] = order
+        if order.status in self.open_statuses and order.last_update is not None and (
+                filed is None or filed[1] != order.last_update or filed[0] not in self.open_statuses):
+            self._push(order)
+        self._filed[order_id] = (order.status, order.last_update)
+
+    def _push(self, order):
+        heap = self._heap
+        if len(heap) > 2 * len(self._by_id) + 64:
+            # Mostly superseded entries: rebuild from the live open orders
+            heap[:] = [(last_update, next(self._seq), order_id)
+                       for order_id, (status, last_update) in self._filed.items()
+                       if status in self.open_statuses and last_update is not None and order_id != order.order_id]
+            heapq.heapify(heap)
+        heapq.heappush(heap, (order.last_update, next(self._seq), order.order_id))
+
+    def remove(self, order_id):
+        order = self._by_id.pop(order_id, None)
+        if order is None:
+            return None
+        status, _ = self._filed.pop(order_id)
+        self._by_status[status].pop(order_id, None)
+        symbol_orders = self._by_symbol[order.symbol]
+        symbol_orders.pop(order_id, None)
+        if not symbol_orders:
+            del self._by_symbol[order.symbol]
+        return order
+
+    def get(self, order_id) -> Optional[object]:
+        return self._by_id.get(order_id)
+
+    def by_symbol(self, symbol) -> List[object]:
+        return list(self._by_symbol.get(symbol, {}).values())
+
+    def by_status(self, status) -> List[object]:
+        return list(self._by_status.get(status, {}).values())
+
+    def open_orders(self, symbol=None) -> List[object]:
+        orders = self.by_symbol(symbol) if symbol is not None else self._by_id.values()
+        return [order for order in orders if order.status in self.open_statuses]
+
+    def pop_stale(self, cutoff) -> List[object]:
+        """Open orders last updated before `cutoff`, oldest first; they leave the heap."""
+        stale = []
+        heap = self._heap
+        while heap and heap[0][0] < cutoff:
+            last_update, _, order_id = heapq.heappop(heap)
+            filed = self._filed.get(order_id)
+            if filed is None or filed[0] not in self.open_statuses or filed[1] != last_update:
+                continue
+            stale.append(self._by_id[order_id])
+        return stale
+
+    def requeue(self, order):
+        """Put an order that pop_stale returned back on the heap, e.g. after a failed cancel."""
+        if order.order_id in self._by_id and order.status in self.open_statuses and order.last_update is not None:
+            self._push(order)
+
+    def metrics(self):
+        return {
+            "orders": len(self._by_id),
+            "symbols": len(self._by_symbol),
+            "heap": len(self._heap),
+            **{getattr(status, "name", str(status)): len(orders) for status, orders in self._by_status.items() if orders},
+        }
@@ -5,6 +5,11 @@ from enum import Enum, auto
 import numpy as np
 import hashlib
 from dataclasses import dataclass
+import itertools
+from collections import OrderedDict
+from core.dedupe_window import DedupeWindow
+from core.order_index import OrderIndex
+from core.pre_trade import SESSION_OPEN, SESSION_TZ, PreTradeCheck, next_session_open
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +21,15 @@ class OrderStatus(Enum):
     REJECTED = auto()
     UNKNOWN = auto()
 
+# Statuses of orders still working at the broker (cancellable, can go stale)
+OPEN_STATUSES = (OrderStatus.PENDING, OrderStatus.PARTIAL, OrderStatus.UNKNOWN)
+
+# Terminal broker statuses in order-update streams that fills alone cannot express
+_STREAM_TERMINAL_STATUSES = {
+    "cancelled": OrderStatus.CANCELLED,
+    "rejected": OrderStatus.REJECTED,
+}
+
 class OrderSide(Enum):
     BUY = "BUY"
     SELL = "SELL"
@@ -31,7 +45,8 @@ class IdempotencyKey:
 
 def _mk_idempotency_key(order_payload: dict) -> IdempotencyKey:
     canon = "|".join(str(order_payload.get(k)) for k in ("symbol","side","qty","order_type","price"))
-    h = hashlib.sha256(canon.encode("utf-8")).hexdigest()
+    # 64-bit BLAKE2b: much cheaper than SHA-256 and short enough for broker order tags
+    h = hashlib.blake2b(canon.encode("utf-8"), digest_size=8).hexdigest()
     return IdempotencyKey(h)
 
 class Order:
@@ -41,6 +56,7 @@ class Order:
         self.side = side
         self.order_type = order_type
         self.price = price
+        self.order_id = None
         self.status = OrderStatus.PENDING
         self.filled_qty = 0
         self.placed_timestamp = None
@@ -85,60 +101,233 @@ class LatencyCompensator:
         return float(np.mean(self.latencies[-self.lookback:])) if self.latencies else 0.0
 
 class OrderManager:
-    def __init__(self, risk_manager=None, api_client=None, slippage=0.0, latency=0.0, config=None):
+    def __init__(self, risk_manager=None, api_client=None, slippage=0.0, latency=0.0, config=None, clock=time.time):
         self.risk_manager = risk_manager
         self.api_client = api_client
         self.slippage = slippage
         self.latency = latency
-        self.active_orders = {}
+        # Every submitted order, by order ID / symbol / status
+        self.orders = OrderIndex(open_statuses=OPEN_STATUSES)
+        self._local_ids = itertools.count(1)
+        # Stream updates that arrived before their send_order response (bounded)
+        self._early_updates = OrderedDict()
         self.positions = {}  # Track positions by symbol with 'long' and 'short'
         self.latency_comp = LatencyCompensator()
         self.config = config or {}
+        # Wall clock by default; backtests pass their virtual clock
+        self._clock = clock
 
-        self._market_depth_lock = asyncio.Lock()
+        # symbol -> latest depth dict. Entries are replaced whole, never mutated, so
+        # readers always see a consistent snapshot without taking a lock.
         self.order_book_cache = {}
 
         # idempotency/dedupe window (seconds)
-        self._recent_keys = {}
         self._dedupe_window_sec = int(self.config.get("order_dedupe_window_sec", 10))
-
-    async def place_order(self, order: Order, avg_spread=0.05, volatility=0.01):
-        # Risk-managed maximum allowed size for symbol (async API)
-        if self.risk_manager:
-            try:
-                max_pos = await self.risk_manager.position_size(order.symbol)  # risk_manager should expose async
-            except TypeError:
-                # fallback if risk_manager.position_size is sync
-                max_pos = self.risk_manager.position_size(order.symbol)
-            if max_pos and order.qty > max_pos:
-                logger.warning(f"Order qty {order.qty} exceeds risk-managed position size {max_pos}. Order rejected.")
-                order.status = OrderStatus.REJECTED
-                return order
-
-            # Panic-stop check
-            if getattr(self.risk_manager, "is_panic", False):
-                logger.error("PANIC STOP active — rejecting all orders")
-                order.status = OrderStatus.REJECTED
-                return order
-
-            # Optional single-order value cap
-            price_for_value = order.price or 0.0
-            if hasattr(self.risk_manager, "max_single_order_value") and self.risk_manager.max_single_order_value:
-                if abs(price_for_value * order.qty) > self.risk_manager.max_single_order_value:
-                    logger.error("Order exceeds single-order value limit")
-                    order.status = OrderStatus.REJECTED
-                    return order
-
-        # Build & check idempotency
-        key = _mk_idempotency_key({
+        self._recent_keys = DedupeWindow(
+            self._dedupe_window_sec, max_size=int(self.config.get("order_dedupe_max_keys", 100_000))
+        )
+        # cap on concurrent broker calls for batch place/cancel
+        self._max_concurrency = int(self.config.get("order_max_concurrency", 10))
+
+        # Risk limits snapshotted, re-read when risk_manager.limits_version moves
+        self.pre_trade = PreTradeCheck(risk_manager) if risk_manager else None
+        # (broker, accepts idempotency_key) for the broker last inspected
+        self._key_support = (None, False)
+        # Optional callback(order, qty, price) for every fill booked into positions
+        self.on_fill = None
+
+    # -------- Pre-trade checks --------
+    async def _max_position(self, symbol):
+        try:
+            return await self.risk_manager.position_size(symbol)  # risk_manager should expose async
+        except TypeError:
+            # fallback if risk_manager.position_size is sync
+            return self.risk_manager.position_size(symbol)
+
+    async def _size_symbols(self, symbols):
+        """Fetch position_size once for symbols the pre-trade check has not sized yet."""
+        missing = [s for s in dict.fromkeys(symbols) if self.pre_trade.needs_size(s)]
+        if missing:
+            sizes = await asyncio.gather(*(self._max_position(s) for s in missing))
+            for symbol, size in zip(missing, sizes):
+                self.pre_trade.set_max_qty(symbol, size)
+
+    def refresh_risk_limits(self):
+        """Re-read risk-manager limits now, e.g. after assigning one directly on the risk manager."""
+        if self.pre_trade is not None:
+            self.pre_trade.refresh()
+
+    def mark_price(self, symbol, price):
+        """Mark the symbol's position for the daily-loss rule (quotes do this through update_market_depth)."""
+        if self.pre_trade is not None:
+            self.pre_trade.mark(symbol, price)
+
+    def start_trading_day(self):
+        """Start a new trading day: the daily-loss rule counts P&L from zero again."""
+        if self.pre_trade is not None:
+            self.pre_trade.start_day()
+
+    async def run_session_rollover(self, open_at=SESSION_OPEN, tz=SESSION_TZ):
+        """
+        Call start_trading_day at every session open, timed on this manager's clock.
+
+        Live setups run this as a background task next to the feed;
+        backtests roll the day per bar date instead.
+        """
+        opening = next_session_open(self._clock(), open_at, tz)
+        while True:
+            await asyncio.sleep(max(0.0, opening - self._clock()))
+            self.start_trading_day()
+            opening = next_session_open(opening, open_at, tz)
+
+    def _order_key(self, order) -> IdempotencyKey:
+        return _mk_idempotency_key({
             "symbol": order.symbol,
             "side": order.side.value,
             "qty": order.qty,
             "order_type": order.order_type.value,
             "price": order.price,
         })
-        now = time.time()
-        if key.value in self._recent_keys and now - self._recent_keys[key.value] < self._dedupe_window_sec:
+
+    def _is_duplicate(self, key, now):
+        return self._recent_keys.seen(key, now)
+
+    # -------- Submission helpers --------
+    def _effective_price(self, order, avg_spread, volatility):
+        slippage_amt = model_slippage(order.qty, avg_spread, volatility) if self.slippage else 0.0
+        eff_price = order.price
+        if order.order_type == OrderType.LIMIT and order.price:
+            if order.side == OrderSide.BUY:
+                eff_price = order.price * (1 + slippage_amt)
+            else:
+                eff_price = order.price * (1 - slippage_amt)
+        return eff_price
+
+    def _accepts_idempotency_key(self):
+        # If broker supports it, pass idempotency key (inspected once per broker)
+        client, accepts = self._key_support
+        if client is not self.api_client:
+            send_order = getattr(self.api_client, "send_order", None)
+            accepts = send_order is not None and "idempotency_key" in send_order.__code__.co_varnames
+            self._key_support = (self.api_client, accepts)
+        return accepts
+
+    def _api_kwargs(self, order, eff_price, key, with_key):
+        api_kwargs = dict(
+            symbol=order.symbol,
+            quantity=order.qty,
+            side=order.side.value,
+            order_type=order.order_type.value,
+            price=eff_price
+        )
+        if with_key:
+            api_kwargs["idempotency_key"] = key.value
+        return api_kwargs
+
+    def _record_response(self, order, api_response, eff_price):
+        fills = api_response.get('fills', [])
+        if fills:
+            for fill in fills:
+                qty = fill.get('qty', 0)
+                price = fill.get('price', eff_price)
+                ts = fill.get('timestamp', self._clock())
+                order.update_fill(qty, price, ts)
+        elif 'filled_qty' in api_response:
+            qty = api_response['filled_qty']
+            price = api_response.get('fill_price', eff_price)
+            order.update_fill(qty, price)
+        else:
+            order.status = OrderStatus.UNKNOWN
+        terminal = _STREAM_TERMINAL_STATUSES.get(api_response.get('status'))
+        if terminal is not None and order.status != OrderStatus.FILLED:
+            order.status = terminal
+
+        order.execution_report.append(api_response)
+        order.order_id = api_response.get('order_id') or f"local-{next(self._local_ids)}"
+        if order.last_update is None:
+            # Unfilled orders age from submission
+            order.last_update = order.placed_timestamp
+        self.orders.add(order)
+
+        if order.filled_qty:
+            self._book_position(order, order.filled_qty, order.avg_fill_price)
+
+        early = self._early_updates.pop(order.order_id, None)
+        if early is not None:
+            self._apply_update(order, early)
+
+    def _book_position(self, order, qty, price):
+        pos = self.positions.get(order.symbol, {'long': 0, 'short': 0})
+        if order.side == OrderSide.BUY:
+            pos['long'] += qty
+        else:
+            pos['short'] += qty
+        self.positions[order.symbol] = pos
+        if self.pre_trade is not None:
+            self.pre_trade.on_fill(order.symbol, order.side == OrderSide.BUY, qty, price)
+        if self.on_fill is not None:
+            self.on_fill(order, qty, price)
+
+    # -------- Order-update stream --------
+    def apply_order_update(self, update):
+        """
+        Apply one normalised order update (see core.order_updates.parse_order_update).
+
+        `filled_qty` is cumulative, so only the increase over what the order
+        already knows is booked as a fill (at the price implied by the new
+        average) and added to `positions`; replays and the fills already read
+        from the send_order response are not double counted. Updates for orders
+        not indexed yet are held until their send_order response lands.
+        Returns the order, or None if it is not (yet) known.
+        """
+        order = self.orders.get(update["order_id"])
+        if order is None:
+            self._early_updates[update["order_id"]] = update
+            if len(self._early_updates) > 1000:
+                self._early_updates.popitem(last=False)
+            return None
+        self._apply_update(order, update)
+        return order
+
+    def _apply_update(self, order, update):
+        timestamp = update.get("timestamp") or self._clock()
+        filled = update.get("filled_qty")
+        if filled is not None and filled > order.filled_qty:
+            delta = filled - order.filled_qty
+            avg_price = update.get("avg_price")
+            if avg_price:
+                price = (avg_price * filled - order.avg_fill_price * order.filled_qty) / delta
+            else:
+                price = order.price or 0.0
+            order.update_fill(delta, price, timestamp)
+            self._book_position(order, delta, price)
+        else:
+            order.last_update = timestamp
+
+        terminal = _STREAM_TERMINAL_STATUSES.get(update.get("status"))
+        if terminal is not None and order.status != OrderStatus.FILLED:
+            order.status = terminal
+        elif order.status == OrderStatus.UNKNOWN:
+            # The broker has acknowledged it, with nothing filled
+            order.status = OrderStatus.PENDING
+        self.orders.refresh(order)
+
+    # -------- Orders --------
+    async def place_order(self, order: Order, avg_spread=0.05, volatility=0.01):
+        if self.pre_trade is not None:
+            self.pre_trade.sync()
+            if self.pre_trade.needs_size(order.symbol):
+                await self._size_symbols([order.symbol])
+            reason = self.pre_trade.check(order.symbol, order.side == OrderSide.BUY, order.qty, order.price)
+            if reason:
+                logger.error(reason)
+                order.status = OrderStatus.REJECTED
+                return order
+
+        # Build & check idempotency
+        key = self._order_key(order)
+        now = self._clock()
+        if self._is_duplicate(key.value, now):
             logger.warning(f"Deduped duplicate order for {order.symbol} (idempotency={key.value})")
             order.status = OrderStatus.REJECTED
             return order
@@ -148,55 +337,14 @@ class OrderManager:
             t0 = time.perf_counter()
             await asyncio.sleep(self.latency)
 
-            slippage_amt = model_slippage(order.qty, avg_spread, volatility) if self.slippage else 0.0
-            eff_price = order.price
-            if order.order_type == OrderType.LIMIT and order.price:
-                if order.side == OrderSide.BUY:
-                    eff_price = order.price * (1 + slippage_amt)
-                else:
-                    eff_price = order.price * (1 - slippage_amt)
-
-            api_kwargs = dict(
-                symbol=order.symbol,
-                quantity=order.qty,
-                side=order.side.value,
-                order_type=order.order_type.value,
-                price=eff_price
-            )
-            # If broker supports it, pass idempotency key
-            if self.api_client and hasattr(self.api_client, "send_order"):
-                if "idempotency_key" in self.api_client.send_order.__code__.co_varnames:
-                    api_kwargs["idempotency_key"] = key.value
-
+            eff_price = self._effective_price(order, avg_spread, volatility)
+            api_kwargs = self._api_kwargs(order, eff_price, key, self._accepts_idempotency_key())
             api_response = await self.api_client.send_order(**api_kwargs)
-
-            fills = api_response.get('fills', [])
-            if fills:
-                for fill in fills:
-                    qty = fill.get('qty', 0)
-                    price = fill.get('price', eff_price)
-                    ts = fill.get('timestamp', time.time())
-                    order.update_fill(qty, price, ts)
-            elif 'filled_qty' in api_response:
-                qty = api_response['filled_qty']
-                price = api_response.get('fill_price', eff_price)
-                order.update_fill(qty, price)
-            else:
-                order.status = OrderStatus.UNKNOWN
-
-            order.execution_report.append(api_response)
-            self.active_orders[order.symbol] = order
-
-            pos = self.positions.get(order.symbol, {'long': 0, 'short': 0})
-            if order.side == OrderSide.BUY:
-                pos['long'] += order.filled_qty
-            else:
-                pos['short'] += order.filled_qty
-            self.positions[order.symbol] = pos
+            self._record_response(order, api_response, eff_price)
 
             elapsed = time.perf_counter() - t0
             self.latency_comp.record(elapsed)
-            self._recent_keys[key.value] = now
+            self._recent_keys.add(key.value, now)
 
         except Exception as e:
             logger.error(f"Order placement failure: {e}")
@@ -205,19 +353,128 @@ class OrderManager:
         logger.info(f"Order for {order.symbol} placed with status {order.status}")
         return order
 
-    async def cancel_order(self, symbol):
-        if symbol not in self.active_orders:
-            logger.warning(f"No active order found to cancel for {symbol}")
-            return False
-        order = self.active_orders[symbol]
-        try:
-            await self.api_client.cancel_order(order_id=order.execution_report[-1].get('order_id'))
+    async def place_orders(self, batch, avg_spread=0.05, volatility=0.01):
+        """
+        Place many orders in one go, e.g. an end-of-day rebalance.
+
+        Risk rules run in one synchronous pass (position_size is fetched only
+        for symbols not sized yet) that counts the orders accepted before each
+        one as filled, so a batch cannot step past a limit one order at a
+        time. Duplicates are rejected against the dedupe window and within the batch,
+        and the survivors go out through the broker's multi-order `send_orders`
+        when it has one, otherwise as concurrent send_order calls capped at
+        `order_max_concurrency`. Returns the orders with their final status.
+        """
+        orders = list(batch)
+        if self.pre_trade is not None:
+            self.pre_trade.sync()
+            await self._size_symbols(order.symbol for order in orders)
+
+        now = self._clock()
+        with_key = self._accepts_idempotency_key()
+        accepted = []
+        batch_keys = set()
+        pending = {}  # symbol -> signed qty accepted so far in this batch
+        for order in orders:
+            is_buy = order.side == OrderSide.BUY
+            if self.pre_trade is not None:
+                reason = self.pre_trade.check(order.symbol, is_buy, order.qty, order.price,
+                                              pending.get(order.symbol, 0.0))
+                if reason:
+                    logger.error(f"{order.symbol}: {reason}")
+                    order.status = OrderStatus.REJECTED
+                    continue
+            key = self._order_key(order)
+            if key.value in batch_keys or self._is_duplicate(key.value, now):
+                logger.warning(f"Deduped duplicate order for {order.symbol} (idempotency={key.value})")
+                order.status = OrderStatus.REJECTED
+                continue
+            batch_keys.add(key.value)
+            pending[order.symbol] = pending.get(order.symbol, 0.0) + (order.qty if is_buy else -order.qty)
+            order.placed_timestamp = now
+            eff_price = self._effective_price(order, avg_spread, volatility)
+            accepted.append((order, key, eff_price, self._api_kwargs(order, eff_price, key, with_key)))
+
+        if not accepted:
+            return orders
+
+        t0 = time.perf_counter()
+        await asyncio.sleep(self.latency)
+        requests = [api_kwargs for _, _, _, api_kwargs in accepted]
+        send_orders = getattr(self.api_client, "send_orders", None)
+        if send_orders is not None:
+            try:
+                responses = await send_orders(requests)
+            except Exception as e:
+                responses = [e] * len(requests)
+        else:
+            semaphore = asyncio.Semaphore(self._max_concurrency)
+
+            async def submit(api_kwargs):
+                async with semaphore:
+                    return await self.api_client.send_order(**api_kwargs)
+
+            responses = await asyncio.gather(*(submit(r) for r in requests), return_exceptions=True)
+        self.latency_comp.record(time.perf_counter() - t0)
+
+        for (order, key, eff_price, _), api_response in zip(accepted, responses):
+            if isinstance(api_response, Exception):
+                logger.error(f"Order placement failure for {order.symbol}: {api_response}")
+                order.status = OrderStatus.REJECTED
+                continue
+            self._record_response(order, api_response, eff_price)
+            self._recent_keys.add(key.value, now)
+
+        logger.info(f"Placed batch of {len(orders)} orders ({len(accepted)} submitted)")
+        return orders
+
+    def _resolve(self, ref):
+        """Open orders an Order, order ID or symbol refers to (a symbol means all its open orders)."""
+        order = ref if isinstance(ref, Order) else self.orders.get(ref)
+        if order is None:
+            return self.orders.open_orders(ref)
+        return [order] if order.status in OPEN_STATUSES else []
+
+    async def cancel_order(self, order_id):
+        """Cancel one order by ID; a symbol cancels every open order on it."""
+        return (await self.cancel_orders([order_id]))[0]
+
+    async def cancel_orders(self, batch):
+        """
+        Cancel many orders (Orders, order IDs or symbols) concurrently, at most
+        `order_max_concurrency` requests in flight, or through the broker's
+        `cancel_orders` when it has one. Returns one success flag per entry.
+        """
+        refs = list(batch)
+        resolved = [self._resolve(ref) for ref in refs]
+        targets = list({id(o): o for orders in resolved for o in orders}.values())
+        for ref, orders in zip(refs, resolved):
+            if not orders:
+                logger.warning(f"No active order found to cancel for {ref}")
+
+        cancel_orders = getattr(self.api_client, "cancel_orders", None)
+        if cancel_orders is not None and targets:
+            try:
+                results = await cancel_orders([order.order_id for order in targets])
+            except Exception as e:
+                results = [e] * len(targets)
+        else:
+            semaphore = asyncio.Semaphore(self._max_concurrency)
+
+            async def cancel(order):
+                async with semaphore:
+                    return await self.api_client.cancel_order(order_id=order.order_id)
+
+            results = await asyncio.gather(*(cancel(o) for o in targets), return_exceptions=True)
+
+        for order, result in zip(targets, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to cancel order {order.order_id} for {order.symbol}: {result}")
+                continue
             order.status = OrderStatus.CANCELLED
-            logger.info(f"Order cancelled for {symbol}")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to cancel order for {symbol}: {e}")
-            return False
+            self.orders.refresh(order)
+            logger.info(f"Order {order.order_id} cancelled for {order.symbol}")
+        return [bool(orders) and all(o.status == OrderStatus.CANCELLED for o in orders) for orders in resolved]
 
     async def hold_positions(self):
         try:
@@ -228,18 +485,46 @@ class OrderManager:
             return []
 
     async def sweep_stale_orders(self, timeout=60):
-        to_cancel = [sym for sym, order in self.active_orders.items() if order.is_stale(timeout)]
-        for symbol in to_cancel:
-            await self.cancel_order(symbol)
-            logger.info(f"{symbol}: Cancelled as stale/partial order")
+        """Cancel open orders with no update for `timeout` seconds."""
+        stale = self.orders.pop_stale(self._clock() - timeout)
+        if not stale:
+            return []
+        for order, cancelled in zip(stale, await self.cancel_orders(stale)):
+            if cancelled:
+                logger.info(f"{order.symbol}: Cancelled as stale/partial order {order.order_id}")
+            else:
+                self.orders.requeue(order)
+        return stale
 
     async def update_market_depth(self, symbol, bid_price, bid_qty, ask_price, ask_qty, timestamp=None):
-        async with self._market_depth_lock:
-            self.order_book_cache[symbol] = {
-                "bid_price": bid_price,
-                "bid_quantity": bid_qty,
-                "ask_price": ask_price,
-                "ask_quantity": ask_qty,
-                "timestamp": timestamp,
+        self.order_book_cache[symbol] = {
+            "bid_price": bid_price,
+            "bid_quantity": bid_qty,
+            "ask_price": ask_price,
+            "ask_quantity": ask_qty,
+            "timestamp": timestamp,
+        }
+        if bid_price and ask_price:
+            self.mark_price(symbol, (bid_price + ask_price) / 2)
+
+    def update_market_depth_batch(self, quotes):
+        """Apply QuoteEvent records (one per symbol) to order_book_cache in a single pass."""
+        cache = self.order_book_cache
+        for quote in quotes:
+            bid, ask = quote.bid_price, quote.ask_price
+            cache[quote.symbol] = {
+                "bid_price": bid,
+                "bid_quantity": quote.bid_quantity,
+                "ask_price": ask,
+                "ask_quantity": quote.ask_quantity,
+                "timestamp": quote.timestamp,
             }
-            logger.debug(f"Updated market depth cache for {symbol}")
+            if bid and ask:
+                self.mark_price(quote.symbol, (bid + ask) / 2)
+
+    def metrics(self):
+        return {
+            "orders": self.orders.metrics(),
+            "dedupe": self._recent_keys.metrics(),
+            "avg_latency": self.latency_comp.avg_latency(),
+        }
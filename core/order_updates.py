@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+from core.bar_store import to_epoch
+from core.feed_client import MarketFeedClient
+from core.pre_trade import SESSION_TZ
+from core.upstox_protobuf_decoder import decode_message
+
+logger = logging.getLogger(__name__)
+
+PORTFOLIO_FEED_AUTHORIZE = "/feed/portfolio-stream-feed/authorize"
+
+
+def _number(value, default=None):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _epoch(value):
+    """Epoch seconds from a number or an ISO datetime string; naive times are exchange (IST) time."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return _number(value)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=SESSION_TZ)
+    return to_epoch(value) if value is not None else None
+
+
+def parse_order_update(message) -> Optional[dict]:
+    """
+    Normalise one order-update message to
+    {"order_id", "status", "filled_qty", "avg_price", "timestamp"}.
+
+    Accepts Upstox portfolio-stream fields (filled_quantity, average_price,
+    exchange_timestamp) and the shorter names the paper/local brokers use.
+    The timestamp is the exchange's, else the message's `timestamp`, else
+    None, in which case OrderManager stamps the update with its own clock
+    (virtual time in backtests). Returns None for anything that is not an
+    order update.
+    """
+    if not isinstance(message, dict) or message.get("order_id") is None:
+        return None
+    if message.get("update_type", "order") != "order":
+        return None
+    filled = message.get("filled_quantity", message.get("filled_qty"))
+    avg_price = message.get("average_price", message.get("avg_fill_price", message.get("fill_price")))
+    return {
+        "order_id": message["order_id"],
+        "status": str(message.get("status", "")).lower(),
+        "filled_qty": _number(filled),
+        "avg_price": _number(avg_price),
+        "timestamp": _epoch(message.get("exchange_timestamp") or message.get("timestamp")),
+    }
+
+
+class OrderUpdateStream:
+    """
+    Broker order-update stream feeding OrderManager.apply_order_update.
+
+    Runs on a MarketFeedClient, so it reconnects with backoff like the market
+    feed; `url` may be a string or an async callable (see `from_api_client`
+    for Upstox's single-use authorized portfolio-feed URLs). Order updates are
+    sparse, so there is no stale timeout: protocol pings keep the socket honest.
+    """
+
+    def __init__(self, order_manager, url, ping_interval: Optional[float] = 10.0, **feed_kwargs):
+        self.order_manager = order_manager
+        self.feed = MarketFeedClient(url, decoder=decode_message, stale_after=None,
+                                     ping_interval=ping_interval, **feed_kwargs)
+        self._consumer = self.feed.consumer()
+        self._task = None
+        self.applied = 0
+        self.unmatched = 0
+
+    @classmethod
+    def from_api_client(cls, order_manager, api_client, **kwargs):
+        async def authorized_url():
+            response = await api_client.get(PORTFOLIO_FEED_AUTHORIZE, params={"update_types": "order"})
+            return response["data"]["authorized_redirect_uri"]
+        return cls(order_manager, authorized_url, **kwargs)
+
+    def on_message(self, message):
+        messages = message if isinstance(message, list) else [message]
+        for item in messages:
+            update = parse_order_update(item)
+            if update is None:
+                continue
+            if self.order_manager.apply_order_update(update) is None:
+                self.unmatched += 1
+            else:
+                self.applied += 1
+
+    async def _pump(self):
+        async for message in self._consumer:
+            try:
+                self.on_message(message)
+            except Exception as e:
+                logger.error(f"Failed to apply order update {message}: {e}")
+
+    def start(self):
+        if self._task is None:
+            self.feed.start()
+            self._task = asyncio.create_task(self._pump())
+        return self._task
+
+    async def stop(self):
+        await self.feed.stop()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,175 @@
+from array import array
+from datetime import datetime, time, timedelta, timezone
+from typing import Dict, Optional
+
+# NSE/BSE cash session: opens 09:15 IST (UTC+5:30, no DST)
+SESSION_TZ = timezone(timedelta(hours=5, minutes=30))
+SESSION_OPEN = time(9, 15)
+
+
+def _limit(risk_manager, name):
+    """Risk-manager limit as a float, 0.0 meaning "no limit" (unset, None or 0)."""
+    return float(getattr(risk_manager, name, None) or 0.0)
+
+
+def next_session_open(now, open_at=SESSION_OPEN, tz=SESSION_TZ) -> float:
+    """Epoch seconds of the first session open strictly after `now` (epoch seconds)."""
+    local = datetime.fromtimestamp(now, tz)
+    opening = local.replace(hour=open_at.hour, minute=open_at.minute, second=open_at.second, microsecond=0)
+    if opening <= local:
+        opening += timedelta(days=1)
+    return opening.timestamp()
+
+
+class PreTradeCheck:
+    """
+    Compiled pre-trade risk rules for the order path.
+
+    Limits (max_position_value, max_daily_loss, max_single_order_value and
+    each symbol's position_size) are read from the risk manager and kept as
+    plain floats. `sync()` re-reads them whenever the risk manager's
+    `limits_version` has moved (every time if it has none); `refresh()`
+    forces it. Per-symbol net quantity, average cost and last price live in
+    flat arrays indexed by a symbol slot, updated by `on_fill` and `mark`.
+    `check` is then a handful of float comparisons with no awaits and no
+    attribute probing.
+
+    daily_pnl is realised P&L (average-cost) since `start_day` plus the change
+    in marked P&L of open positions over the same period; `update_pnl`
+    resets it to an outside figure, later fills and marks move it from there.
+    The owner calls `start_day` at each trading-day boundary
+    (OrderManager.start_trading_day: per bar date in backtests, at session
+    open live), otherwise one bad day blocks new risk for good.
+
+    The panic flag is the one thing read live on every check, so a panic stop
+    takes effect on the very next order.
+    """
+
+    def __init__(self, risk_manager):
+        self.risk_manager = risk_manager
+        self._slots: Dict[str, int] = {}
+        self._max_qty = array("d")
+        self._net_qty = array("d")
+        self._avg_cost = array("d")
+        self._last_price = array("d")
+        self._realised = 0.0
+        self._unrealised = 0.0
+        self._pnl_base = 0.0
+        self.refresh()
+
+    def refresh(self):
+        """Re-snapshot the risk manager's limits; per-symbol sizes are re-read on next use."""
+        rm = self.risk_manager
+        self._version = getattr(rm, "limits_version", None)
+        self.max_position_value = _limit(rm, "max_position_value")
+        self.max_daily_loss = _limit(rm, "max_daily_loss")
+        self.max_single_order_value = _limit(rm, "max_single_order_value")
+        self._sized = set()
+
+    def sync(self):
+        """refresh() if the risk manager's limits changed since the last snapshot."""
+        version = getattr(self.risk_manager, "limits_version", None)
+        if version is None or version != self._version:
+            self.refresh()
+
+    # -------- Per-symbol state --------
+    def _slot(self, symbol) -> int:
+        slot = self._slots.get(symbol)
+        if slot is None:
+            slot = self._slots[symbol] = len(self._slots)
+            self._max_qty.append(0.0)
+            self._net_qty.append(0.0)
+            self._avg_cost.append(0.0)
+            self._last_price.append(0.0)
+        return slot
+
+    def needs_size(self, symbol) -> bool:
+        return symbol not in self._sized
+
+    def set_max_qty(self, symbol, max_qty):
+        self._max_qty[self._slot(symbol)] = float(max_qty or 0.0)
+        self._sized.add(symbol)
+
+    def on_fill(self, symbol, is_buy: bool, qty, price):
+        slot = self._slot(symbol)
+        net = self._net_qty[slot]
+        new_net = net + (qty if is_buy else -qty)
+        price = price or self._last_price[slot]
+        if not price:
+            # No price seen for the symbol yet: nothing to value the fill at
+            self._net_qty[slot] = new_net
+            return
+        cost = self._avg_cost[slot]
+        self._unrealised -= net * (self._last_price[slot] - cost)
+        if net and (net > 0) != is_buy:
+            # Closing (part of) the position realises P&L against its average cost
+            closed = min(qty, abs(net))
+            self._realised += closed * (price - cost) if net > 0 else closed * (cost - price)
+        if not new_net:
+            cost = 0.0
+        elif not net or (net > 0) != (new_net > 0):
+            cost = price  # opened, or flipped through flat
+        elif (net > 0) == is_buy:
+            cost = (cost * abs(net) + price * qty) / abs(new_net)
+        self._net_qty[slot] = new_net
+        self._avg_cost[slot] = cost
+        self._last_price[slot] = price
+        self._unrealised += new_net * (price - cost)
+
+    def mark(self, symbol, price):
+        """Mark the symbol's open position at `price` (e.g. the quote mid)."""
+        slot = self._slots.get(symbol)
+        if slot is None or not price or not self._last_price[slot]:
+            return
+        self._unrealised += self._net_qty[slot] * (price - self._last_price[slot])
+        self._last_price[slot] = price
+
+    @property
+    def daily_pnl(self):
+        return self._realised + self._unrealised - self._pnl_base
+
+    def start_day(self):
+        """Start a new trading day: daily_pnl counts from zero again."""
+        self._realised = 0.0
+        self._pnl_base = self._unrealised
+
+    def update_pnl(self, daily_pnl):
+        self._pnl_base = self._realised + self._unrealised - daily_pnl
+
+    def exposure(self, symbol) -> Dict[str, float]:
+        slot = self._slots.get(symbol)
+        if slot is None:
+            return {"qty": 0.0, "notional": 0.0}
+        qty = self._net_qty[slot]
+        return {"qty": qty, "notional": qty * self._last_price[slot]}
+
+    # -------- The check --------
+    def check(self, symbol, is_buy: bool, qty, price: Optional[float], pending=0.0) -> Optional[str]:
+        """
+        Reason the order breaks a limit, or None if it may go out.
+
+        `pending` is the signed quantity of orders for the symbol accepted
+        earlier in the same batch, counted as if already filled.
+        """
+        slot = self._slots.get(symbol)
+        if slot is None:
+            slot = self._slot(symbol)
+
+        signed = qty if is_buy else -qty
+        max_qty = self._max_qty[slot]
+        if max_qty and abs(pending + signed) > max_qty:
+            return f"Order qty {qty} exceeds risk-managed position size {max_qty}. Order rejected."
+        if getattr(self.risk_manager, "is_panic", False):
+            return "PANIC STOP active — rejecting all orders"
+
+        if self.max_single_order_value and abs((price or 0.0) * qty) > self.max_single_order_value:
+            return "Order exceeds single-order value limit"
+
+        net = self._net_qty[slot] + pending
+        net_after = net + signed
+        if self.max_position_value and abs(net_after * (price or self._last_price[slot])) > self.max_position_value:
+            return "Order would exceed max position value"
+        # Past the daily loss limit only orders that shrink a position may go out
+        if self.max_daily_loss and self.daily_pnl <= -self.max_daily_loss and abs(net_after) >= abs(net):
+            return "Daily loss limit reached — rejecting new orders"
+        return None
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class QuoteConflator:
+    """
+    Keeps only the newest pending quote per symbol and applies them to the
+    order manager's depth cache in batches.
+
+    offer() is synchronous and O(1); a background task drains whatever has
+    accumulated each time it gets to run, so a burst of N quotes for one
+    symbol costs one cache write instead of N.
+    """
+
+    def __init__(self, order_manager, interval=0.0):
+        self.order_manager = order_manager
+        self.interval = interval
+        self._pending = {}
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+        self.received = 0
+        self.conflated = 0
+        self.applied = 0
+        self.batches = 0
+
+    def offer(self, quote):
+        symbol = quote.symbol
+        if symbol in self._pending:
+            self.conflated += 1
+        self._pending[symbol] = quote
+        self.received += 1
+        self._wakeup.set()
+
+    async def on_event(self, event):
+        """EventDispatcher / ShardedEventBus handler for 'quote' records."""
+        self.offer(event)
+
+    def drain(self):
+        """Apply every pending quote now; returns how many symbols were updated."""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        self.order_manager.update_market_depth_batch(pending.values())
+        self.applied += len(pending)
+        self.batches += 1
+        return len(pending)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.drain()
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            if self.interval:
+                await asyncio.sleep(self.interval)
+            self._wakeup.clear()
+            try:
+                self.drain()
+            except Exception as e:
+                logger.error(f"Error applying conflated quotes: {e}")
+
+    def metrics(self):
+        return {
+            "pending": len(self._pending),
+            "received": self.received,
+            "conflated": self.conflated,
+            "applied": self.applied,
+            "batches": self.batches,
+        }
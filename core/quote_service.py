@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Upstox market-quote endpoints accept at most 500 instrument keys per request
+UPSTOX_MAX_QUOTE_SYMBOLS = 500
+
+
+def _index_quotes(data):
+    """Normalise a quotes payload (dict keyed by symbol, or list of quote dicts) to {symbol: quote}."""
+    if isinstance(data, dict):
+        return data
+    indexed = {}
+    for quote in data or []:
+        symbol = quote.get("symbol") or quote.get("instrument_token") or quote.get("instrument_key")
+        if symbol is not None:
+            indexed[symbol] = quote
+    return indexed
+
+
+class QuoteService:
+    """
+    Shared front for UpstoxApiClient.get_live_quotes.
+
+    - fresh quotes (younger than `ttl` seconds) come from a local cache
+    - symbols already being fetched by another caller are awaited, not re-requested
+    - the rest is split into `chunk_size` requests fired concurrently
+
+    Strategies polling overlapping watchlists therefore share one round-trip.
+    Symbols the API does not return map to None.
+    """
+
+    def __init__(self, api_client, ttl: float = 1.0, chunk_size: int = UPSTOX_MAX_QUOTE_SYMBOLS, clock=time.monotonic):
+        self.api_client = api_client
+        self.ttl = ttl
+        self.chunk_size = chunk_size
+        self._clock = clock
+        self._cache: Dict[str, tuple] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._fetches = set()
+
+        self.requests = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+
+    async def get_quotes(self, symbols: Iterable[str]) -> Dict[str, dict]:
+        now = self._clock()
+        result = {}
+        waiting = {}
+        to_fetch = []
+
+        for symbol in dict.fromkeys(symbols):
+            cached = self._cache.get(symbol)
+            if cached is not None and now - cached[0] < self.ttl:
+                result[symbol] = cached[1]
+                self.cache_hits += 1
+            elif symbol in self._inflight:
+                waiting[symbol] = self._inflight[symbol]
+                self.coalesced += 1
+            else:
+                to_fetch.append(symbol)
+
+        if to_fetch:
+            loop = asyncio.get_running_loop()
+            for symbol in to_fetch:
+                future = self._inflight[symbol] = loop.create_future()
+                waiting[symbol] = future
+            # Fetches run as their own tasks: other callers may be waiting on
+            # them, so cancelling this caller must not cancel the request
+            for i in range(0, len(to_fetch), self.chunk_size):
+                task = loop.create_task(self._fetch_chunk(to_fetch[i:i + self.chunk_size]))
+                self._fetches.add(task)
+                task.add_done_callback(self._fetches.discard)
+
+        if waiting:
+            quotes = await asyncio.shield(asyncio.gather(*waiting.values()))
+            result.update(zip(waiting, quotes))
+        return result
+
+    async def get_quote(self, symbol: str):
+        return (await self.get_quotes([symbol]))[symbol]
+
+    async def _fetch_chunk(self, chunk):
+        self.requests += 1
+        try:
+            quotes = _index_quotes(await self.api_client.get_live_quotes(chunk))
+        except asyncio.CancelledError:
+            for symbol in chunk:
+                self._inflight.pop(symbol).cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Quote request for {len(chunk)} symbols failed: {e}")
+            for symbol in chunk:
+                self._inflight.pop(symbol).set_exception(e)
+            return
+
+        fetched_at = self._clock()
+        for symbol in chunk:
+            quote = quotes.get(symbol)
+            if quote is not None:
+                self._cache[symbol] = (fetched_at, quote)
+            self._inflight.pop(symbol).set_result(quote)
+
+    def invalidate(self, symbols: Iterable[str] = None):
+        if symbols is None:
+            self._cache.clear()
+        else:
+            for symbol in symbols:
+                self._cache.pop(symbol, None)
@@ -0,0 +1,73 @@
+import asyncio
+import time
+from typing import Dict, Iterable, Tuple
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        self._refill()
+        return max(0.0, (tokens - self._tokens) / self.rate)
+
+    async def acquire(self, tokens: float = 1.0):
+        while not self.try_acquire(tokens):
+            await asyncio.sleep(self.wait_time(tokens))
+
+
+# Upstox publishes limits per user per API category (requests per second / minute / 30 min).
+# Only the second and minute windows matter at intraday burst time scales.
+UPSTOX_RATE_LIMITS: Dict[str, Tuple[Tuple[float, float], ...]] = {
+    # (tokens per second, burst capacity)
+    "standard": ((50, 50), (500 / 60, 500)),
+    "order": ((50, 50), (500 / 60, 500)),
+    "multi_order": ((4, 4), (40 / 60, 40)),
+}
+
+
+class RateLimiter:
+    """
+    Client-side limiter with one set of token buckets per API category.
+
+    A request must take a token from every bucket of its category, so both the
+    per-second and per-minute budgets hold. Unknown categories are unlimited.
+    """
+
+    def __init__(self, limits: Dict[str, Iterable[Tuple[float, float]]] = None):
+        limits = UPSTOX_RATE_LIMITS if limits is None else limits
+        self._buckets = {
+            category: [TokenBucket(rate, capacity) for rate, capacity in windows]
+            for category, windows in limits.items()
+        }
+        self.waits = 0
+
+    async def acquire(self, category: str):
+        buckets = self._buckets.get(category)
+        if not buckets:
+            return
+        while True:
+            delay = max(bucket.wait_time() for bucket in buckets)
+            if delay <= 0:
+                for bucket in buckets:
+                    bucket.try_acquire()
+                return
+            self.waits += 1
+            await asyncio.sleep(delay)
@@ -0,0 +1,255 @@
+"""
+Online estimators behind RiskManager's streaming VaR / expected shortfall.
+
+Each estimator takes one return per `add` (O(1); RollingTail O(log window))
+and answers its statistic in O(1) (TDigest: O(compression)) without
+revisiting the history.
+"""
+import math
+from collections import deque
+from heapq import heapify, heappop, heappush
+
+
+class Welford:
+    """Running count, mean, population variance (ddof=0, like np.std) and sum."""
+    __slots__ = ("count", "mean", "_m2", "total")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.total = 0.0
+
+    def add(self, x):
+        self.count += 1
+        self.total += x
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+
+    @property
+    def variance(self):
+        return max(self._m2 / self.count, 0.0) if self.count else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class RollingTail:
+    """
+    Exact lower-tail statistics over the last `window` values (all values if
+    window is None):
+
+      quantile   -> the `alpha` quantile, np.quantile(..., method="lower")
+      tail_mean  -> mean of the int(alpha * n) smallest values
+
+    Two heaps split the window: `_low` (a max-heap) holds exactly the
+    int(alpha * n) smallest values and `_high` (a min-heap) the rest, so the
+    quantile is the top of one of them and the tail mean is the running sum
+    of `_low` over its size; both reads are O(1). An add, and the expiry it
+    causes, costs O(log window). Entries are (value, arrival) pairs, so an
+    expiring value is found by its arrival number: it is only marked dead
+    and dropped when it reaches a heap top, and a heap is rebuilt without
+    its dead entries once they outnumber the live ones. The tail sum is
+    recomputed every `window` updates to shed rounding drift.
+    """
+
+    def __init__(self, alpha, window=None):
+        self.alpha = alpha
+        self.window = window
+        self._low = []   # (-value, -arrival): the tail, largest on top
+        self._high = []  # (value, arrival): the rest, smallest on top
+        self._low_size = 0
+        self._high_size = 0
+        self._side = {}  # arrival -> True if in _low (windowed only)
+        self._dead = set()
+        self._arrivals = deque()
+        self._seq = 0
+        self._tail_sum = 0.0
+        self._updates = 0
+
+    def __len__(self):
+        return self._low_size + self._high_size
+
+    def _tail_len(self, n):
+        return int(self.alpha * n)
+
+    def _prune(self, heap):
+        dead = self._dead
+        while heap and abs(heap[0][1]) in dead:
+            dead.discard(abs(heappop(heap)[1]))
+
+    def _compact(self, heap, live):
+        if len(heap) <= 2 * live + 64:
+            return
+        dead = self._dead
+        kept = []
+        for entry in heap:
+            seq = abs(entry[1])
+            if seq in dead:
+                dead.discard(seq)  # each arrival sits in one heap only
+            else:
+                kept.append(entry)
+        heap[:] = kept
+        heapify(heap)
+
+    def _push_low(self, value, seq):
+        heappush(self._low, (-value, -seq))
+        self._low_size += 1
+        self._tail_sum += value
+        if self.window is not None:
+            self._side[seq] = True
+
+    def _push_high(self, value, seq):
+        heappush(self._high, (value, seq))
+        self._high_size += 1
+        if self.window is not None:
+            self._side[seq] = False
+
+    def add(self, x):
+        seq = self._seq = self._seq + 1
+        self._prune(self._low)
+        if self._low and x <= -self._low[0][0]:
+            self._push_low(x, seq)
+        else:
+            self._push_high(x, seq)
+
+        if self.window is not None:
+            self._arrivals.append((x, seq))
+            if len(self._arrivals) > self.window:
+                self._expire(*self._arrivals.popleft())
+
+        self._rebalance()
+
+        self._updates += 1
+        if self._updates >= (self.window or 100_000):
+            self._updates = 0
+            self._tail_sum = math.fsum(-v for v, s in self._low if -s not in self._dead)
+
+    def _expire(self, value, seq):
+        self._dead.add(seq)
+        if self._side.pop(seq):
+            self._low_size -= 1
+            self._tail_sum -= value
+            self._compact(self._low, self._low_size)
+        else:
+            self._high_size -= 1
+            self._compact(self._high, self._high_size)
+
+    def _rebalance(self):
+        k = self._tail_len(len(self))
+        low, high = self._low, self._high
+        while self._low_size > k:
+            self._prune(low)
+            neg, neg_seq = heappop(low)
+            self._low_size -= 1
+            self._tail_sum += neg
+            self._push_high(-neg, -neg_seq)
+        while self._low_size < k:
+            self._prune(high)
+            value, seq = heappop(high)
+            self._high_size -= 1
+            self._push_low(value, seq)
+        # Keep both tops live so reads never have to skip dead entries
+        self._prune(low)
+        self._prune(high)
+
+    @property
+    def quantile(self):
+        n = len(self)
+        if not n:
+            return 0.0
+        if int(self.alpha * (n - 1)) < self._low_size:
+            return -self._low[0][0]
+        return self._high[0][0]
+
+    @property
+    def tail_mean(self):
+        k = self._low_size
+        return self._tail_sum / k if k else None
+
+
+class TDigest:
+    """
+    Merging t-digest (Dunning) for approximate quantiles over unbounded streams.
+
+    Values are buffered and merged into O(`compression`) centroids, kept
+    small near the tails where VaR is read, so memory stays constant however
+    many returns arrive.
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self._centroids = []  # sorted (mean, weight)
+        self._buffer = []
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self._buffer.append(x)
+        self.count += 1
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        if len(self._buffer) >= 5 * self.compression:
+            self._merge()
+
+    def _merge(self):
+        if not self._buffer:
+            return
+        items = sorted(self._centroids + [(x, 1.0) for x in self._buffer])
+        self._buffer = []
+        total = float(self.count)
+        merged = []
+        cumulative = 0.0
+        mean, weight = items[0]
+        for m, w in items[1:]:
+            q = (cumulative + weight + w / 2) / total
+            if weight + w <= max(1.0, 4 * total * q * (1 - q) / self.compression):
+                weight += w
+                mean += (m - mean) * w / weight
+            else:
+                merged.append((mean, weight))
+                cumulative += weight
+                mean, weight = m, w
+        merged.append((mean, weight))
+        self._centroids = merged
+
+    def quantile(self, q):
+        self._merge()
+        centroids = self._centroids
+        if not centroids:
+            return 0.0
+        target = q * self.count
+        cumulative = 0.0
+        prev_mean, prev_mid = self.min, 0.0
+        for mean, weight in centroids:
+            mid = cumulative + weight / 2
+            if target < mid:
+                if mid == prev_mid:
+                    return mean
+                return prev_mean + (mean - prev_mean) * (target - prev_mid) / (mid - prev_mid)
+            cumulative += weight
+            prev_mean, prev_mid = mean, mid
+        if cumulative == prev_mid:
+            return self.max
+        return prev_mean + (self.max - prev_mean) * (target - prev_mid) / (cumulative - prev_mid)
+
+    def tail_mean(self, q):
+        """Approximate mean of the values below the q quantile."""
+        self._merge()
+        target = q * self.count
+        if target < 1:
+            return None
+        taken = 0.0
+        total = 0.0
+        for mean, weight in self._centroids:
+            w = min(weight, target - taken)
+            total += mean * w
+            taken += w
+            if taken >= target:
+                break
+        return total / taken
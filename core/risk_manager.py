@@ -1,7 +1,10 @@
 import os
+from collections import deque
 import numpy as np
 import pandas as pd
 from scipy.stats import norm
+from core.equity_store import EquityStore
+from core.risk_estimators import RollingTail, TDigest, Welford
 
 class RiskManager:
     def __init__(
@@ -12,13 +15,25 @@ class RiskManager:
         max_position_value: float | None = None,
         max_daily_loss: float | None = None,
         max_single_order_value: float | None = None,
+        equity_history_interval: float | None = None,
+        return_window: int | None = 100_000,
+        tdigest_compression: int | None = None,
     ):
         self.initial_capital = initial_capital
         self.max_drawdown_limit = max_drawdown_limit
         self.confidence_level = confidence_level
-        self.equity_curve = pd.Series(dtype=float)
+        # Running peak / drawdown per update; history optionally downsampled
+        self.equity = EquityStore(history_interval=equity_history_interval)
         self.position_sizes = {}
-        self.returns = []
+        # Bumped whenever a limit or position size changes, so cached copies (PreTradeCheck) re-read them
+        self.limits_version = 0
+        # Raw returns are only kept for the last `return_window`; the streaming
+        # estimators below are what risk_report reads
+        self.returns = deque(maxlen=return_window)
+        self._return_stats = Welford()
+        self._return_tail = RollingTail(1 - confidence_level, window=return_window)
+        self._return_digest = TDigest(tdigest_compression) if tdigest_compression else None
+        self._var_z = norm.ppf(1 - confidence_level)
 
         # Safety rails (env overrides allowed)
         self.max_position_value = float(os.getenv("MAX_POSITION_VALUE", max_position_value or 0) or 0)
@@ -29,14 +44,15 @@ class RiskManager:
 
     # -------- Analytics --------
     def update_equity_curve(self, timestamp, portfolio_value):
-        self.equity_curve.at[timestamp] = portfolio_value
+        self.equity.update(timestamp, portfolio_value)
+
+    @property
+    def equity_curve(self) -> pd.Series:
+        """Recorded equity history as a Series (built on demand, for reporting)."""
+        return self.equity.to_series()
 
     def max_drawdown(self):
-        if self.equity_curve.empty:
-            return 0.0
-        running_max = self.equity_curve.cummax()
-        drawdowns = (running_max - self.equity_curve) / running_max
-        return drawdowns.max()
+        return self.equity.max_drawdown
 
     def check_max_drawdown_limit(self):
         return self.max_drawdown() > self.max_drawdown_limit
@@ -62,32 +78,75 @@ class RiskManager:
         risk_amount = self.initial_capital * risk_per_trade
         max_units = risk_amount / (stop_loss_pct * current_price)
         self.position_sizes[symbol] = max_units
+        self.limits_version += 1
         return max_units
 
     async def position_size(self, symbol):
         # Async-compatible for callers awaiting this
         return self.position_sizes.get(symbol, 0)
 
+    def streaming_value_at_risk(self):
+        """Parametric VaR over every return seen, from the running mean/std."""
+        if self._return_stats.count == 0:
+            return 0.0
+        return -(self._return_stats.mean + self._return_stats.std * self._var_z)
+
+    def historical_value_at_risk(self):
+        """Empirical VaR: the loss quantile of the last `return_window` returns."""
+        return -self._return_tail.quantile if len(self._return_tail) else 0.0
+
+    def streaming_expected_shortfall(self):
+        """Mean loss beyond the VaR cutoff over the last `return_window` returns."""
+        tail_mean = self._return_tail.tail_mean
+        return -tail_mean if tail_mean is not None else 0.0
+
     def risk_report(self, current_portfolio_value):
-        returns_array = np.array(self.returns)
+        """
+        Risk snapshot read from the streaming estimators in O(1).
+
+        VaR_95 is parametric over every return seen; VaR_95_historical and
+        Expected_Shortfall_95 cover the last `return_window` returns (all of
+        them when return_window is None), unlike expected_shortfall(returns),
+        which takes whatever series it is given.
+        """
+        max_drawdown = self.max_drawdown()
         report = {
             "current_value": current_portfolio_value,
-            "max_drawdown": self.max_drawdown(),
-            "drawdown_exceeded": self.check_max_drawdown_limit(),
-            "VaR_95": self.value_at_risk(returns_array),
-            "Expected_Shortfall_95": self.expected_shortfall(returns_array),
-            "Total_Returns": np.sum(returns_array),
+            "max_drawdown": max_drawdown,
+            "drawdown_exceeded": max_drawdown > self.max_drawdown_limit,
+            "VaR_95": self.streaming_value_at_risk(),
+            "VaR_95_historical": self.historical_value_at_risk(),
+            "Expected_Shortfall_95": self.streaming_expected_shortfall(),
+            "Total_Returns": self._return_stats.total,
             "panic": self._panic,
             "max_position_value": self.max_position_value,
             "max_daily_loss": self.max_daily_loss,
             "max_single_order_value": self.max_single_order_value,
         }
+        if self._return_digest is not None:
+            alpha = 1 - self.confidence_level
+            tail_mean = self._return_digest.tail_mean(alpha)
+            report["VaR_95_tdigest"] = -self._return_digest.quantile(alpha) if self._return_digest.count else 0.0
+            report["Expected_Shortfall_95_tdigest"] = -tail_mean if tail_mean is not None else 0.0
         return report
 
     def add_return(self, return_value):
+        return_value = float(return_value)
         self.returns.append(return_value)
+        self._return_stats.add(return_value)
+        self._return_tail.add(return_value)
+        if self._return_digest is not None:
+            self._return_digest.add(return_value)
 
     # -------- Safety rails --------
+    def update_risk_limits(self, limits):
+        """Change limits ({name: value}, position_sizes as {symbol: units}); 0 or None lifts a limit."""
+        for name in ("max_position_value", "max_daily_loss", "max_single_order_value"):
+            if name in limits:
+                setattr(self, name, float(limits[name] or 0))
+        self.position_sizes.update(limits.get("position_sizes", {}))
+        self.limits_version += 1
+
     def trigger_panic(self, reason: str):
         self._panic = True
         # in practice: notify + persist event
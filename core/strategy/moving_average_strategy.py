@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class MovingAverageCrossoverStrategy:
     def __init__(self, short_window=5, long_window=20):
         self.short_window = short_window
@@ -9,6 +12,9 @@ class MovingAverageCrossoverStrategy:
         return sum(prices[-window:]) / window
 
     def generate_signal(self, prices):
+        # Accept a BarBuffer (or any market_data mapping) as well as a bare price series
+        if hasattr(prices, "get"):
+            prices = prices.get("close", [])
         short_sma = self.compute_sma(prices, self.short_window)
         long_sma = self.compute_sma(prices, self.long_window)
 
@@ -21,3 +27,28 @@ class MovingAverageCrossoverStrategy:
             return "sell"
         else:
             return "hold"
+
+    def rolling_sma(self, prices, window):
+        """compute_sma for every prefix of prices (NaN until `window` prices exist)."""
+        prices = np.asarray(prices, dtype=float)
+        out = np.full(len(prices), np.nan)
+        if len(prices) < window:
+            return out
+        # Add the window's prices oldest first, as sum() does, so values match exactly
+        total = np.zeros(len(prices) - window + 1)
+        for offset in range(window):
+            total += prices[offset:len(prices) - window + 1 + offset]
+        out[window - 1:] = total / window
+        return out
+
+    def generate_signals(self, prices):
+        """generate_signal for every prefix of prices, as an array of 'buy'/'sell'/'hold'."""
+        if hasattr(prices, "get"):
+            prices = prices.get("close", [])
+        short_sma = self.rolling_sma(prices, self.short_window)
+        long_sma = self.rolling_sma(prices, self.long_window)
+
+        signals = np.full(len(short_sma), "hold", dtype=object)
+        signals[short_sma > long_sma] = "buy"
+        signals[short_sma < long_sma] = "sell"
+        return signals
@@ -1,26 +1,45 @@
 import asyncio
 import logging
-from core.event_queue import EventQueue
+from collections import defaultdict
+from core.bar_aggregator import BarAggregator
+from core.event_bus import ShardedEventBus
 from core.live_broker import LiveBroker
 
 logger = logging.getLogger(__name__)
 
 class StrategyManager:
-    def __init__(self, strategy, risk_manager, order_manager, portfolio, live_broker: LiveBroker = None):
+    def __init__(self, strategy, risk_manager, order_manager, portfolio, live_broker: LiveBroker = None,
+                 event_bus: ShardedEventBus = None, session_rollover=True,
+                 bar_aggregator: BarAggregator = None):
         self.strategy = strategy
         self.risk_manager = risk_manager
         self.order_manager = order_manager
         self.portfolio = portfolio
         self.live_broker = live_broker
 
+        # Optional tick -> bar stage: every trade reaching on_trade is folded into
+        # bars, and each closed bar runs the strategy through on_market_data
+        self.bar_aggregator = bar_aggregator
+        self._bar_flush_task = None
+        if bar_aggregator is not None:
+            bar_aggregator.on_bar = self.on_market_data
+            if bar_aggregator.mode == "time":
+                self._bar_flush_task = asyncio.create_task(self._flush_bars())
+
         self._trade_lock = asyncio.Lock()
         self._trade_queue = asyncio.Queue()
         self._trade_worker_task = asyncio.create_task(self._trade_worker())
+        # Reset the order path's daily loss at each session open (backtests roll per bar date instead)
+        rollover = getattr(order_manager, "run_session_rollover", None) if session_rollover else None
+        self._rollover_task = asyncio.create_task(rollover()) if rollover is not None else None
 
-        self._market_data_lock = asyncio.Lock()
+        # Per-symbol so one symbol's evaluation never waits on another's
+        self._market_data_locks = defaultdict(asyncio.Lock)
 
-        self.event_queue = EventQueue()
-        self._event_task = asyncio.create_task(self._process_events())
+        self.event_queue = event_bus or ShardedEventBus()
+        self.event_queue.register_handler("trade", self._on_trade_event)
+        self.event_queue.register_handler("market_data", self._on_market_data_event)
+        self.event_queue.start()
 
         self._shutdown_event = asyncio.Event()
 
@@ -40,9 +59,9 @@ class StrategyManager:
                     if self.live_broker:
                         response = await self.live_broker.place_order(
                             symbol=event["symbol"],
-                            qty=event["quantity"],
-                            order_type="MARKET",
-                            side="BUY" if event["quantity"] > 0 else "SELL"
+                            quantity=abs(event["quantity"]),
+                            side="BUY" if event["quantity"] > 0 else "SELL",
+                            order_type="MARKET"
                         )
                         logger.info(f"Placed live order: {response}")
                 except Exception as e:
@@ -54,7 +73,15 @@ class StrategyManager:
             except Exception as e:
                 logger.error(f"Unexpected error in trade worker: {e}")
 
+    async def _flush_bars(self):
+        # Close time bars of symbols that stopped trading
+        while True:
+            await asyncio.sleep(self.bar_aggregator.size)
+            await self.bar_aggregator.flush()
+
     async def on_trade(self, symbol, price, quantity, timestamp=None):
+        if self.bar_aggregator is not None:
+            await self.bar_aggregator.on_trade(symbol, price, abs(quantity or 0), timestamp)
         await self._trade_queue.put({
             "symbol": symbol,
             "price": price,
@@ -63,42 +90,36 @@ class StrategyManager:
         })
 
     async def on_market_data(self, market_data_snapshot):
-        async with self._market_data_lock:
+        symbol = market_data_snapshot.get("symbol") or market_data_snapshot.get("asset")
+        async with self._market_data_locks[symbol]:
             try:
                 await self.strategy.on_market_data(market_data_snapshot)
             except Exception as e:
                 logger.error(f"Error processing market data: {e}")
 
-    async def _process_events(self):
-        async def handler(event):
-            if event.type == "trade":
-                payload = event.payload
-                await self.on_trade(
-                    payload.get("symbol"),
-                    payload.get("price"),
-                    payload.get("quantity"),
-                    payload.get("timestamp")
-                )
-            elif event.type == "market_data":
-                await self.on_market_data(event.payload)
-            else:
-                logger.warning(f"Unhandled event in StrategyManager: {event.type}")
+    async def _on_trade_event(self, event):
+        # Event objects carry a payload; parser dicts are their own payload
+        payload = getattr(event, "payload", event)
+        await self.on_trade(
+            payload.get("symbol"),
+            payload.get("price"),
+            payload.get("quantity"),
+            payload.get("timestamp")
+        )
 
-        try:
-            await self.event_queue.process_events(handler)
-        except asyncio.CancelledError:
-            logger.info("Event processing cancelled.")
-        except Exception as e:
-            logger.error(f"Error in event processing: {e}")
+    async def _on_market_data_event(self, event):
+        await self.on_market_data(getattr(event, "payload", event))
 
     async def shutdown(self):
         logger.info("Shutting down StrategyManager...")
         self._shutdown_event.set()
-        self._trade_worker_task.cancel()
-        self._event_task.cancel()
-        try:
-            await self._trade_worker_task
-            await self._event_task
-        except asyncio.CancelledError:
-            pass
+        for task in (self._trade_worker_task, self._rollover_task, self._bar_flush_task):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.event_queue.stop()
         logger.info("StrategyManager shutdown complete.")
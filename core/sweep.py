@@ -0,0 +1,243 @@
+"""
+Parallel parameter sweeps over BacktestEngine runs.
+
+The history is written once to a memory-mapped bar file (SharedBars); each
+worker process maps it read-only, so every task ships only its parameter dict
+and the page cache holds one copy of the data however many cores run.
+Results are appended to one CSV table as runs finish.
+
+Workers are spawned, not forked, so the one-thread limits for the numeric
+libraries are in their environment before numpy or torch load; scripts that
+run a sweep need the usual `if __name__ == "__main__":` guard.
+"""
+import csv
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from core.backtest import BacktestEngine, iter_bars
+
+logger = logging.getLogger(__name__)
+
+RESULT_FIELDS = ("bars", "orders", "filled", "final_equity", "total_return", "max_drawdown", "wall_seconds")
+
+_FIELDS = ("timestamp", "symbol", "open", "high", "low", "close", "volume")
+
+# One process per core: keep each worker's numeric libraries to one thread
+_THREAD_LIMITS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+# -------- Shared history --------
+class SharedBars:
+    """
+    Time-ordered bars in a flat float64 (n x 7) file, opened with np.memmap.
+
+    Columns follow the bar tuple: timestamp, symbol code, open, high, low,
+    close, volume; `symbols` maps codes back to names. Pickling carries only
+    the path, so workers map the same file instead of receiving a copy.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        meta = json.loads(self.path.with_suffix(".json").read_text())
+        self.rows = meta["rows"]
+        self.symbols = meta["symbols"]
+        self._array = None
+
+    @classmethod
+    def create(cls, sources, path, chunksize=100_000):
+        """Write `sources` (anything iter_bars accepts) to `path`, merged by time."""
+        path = Path(path)
+        codes = {}
+        rows = 0
+        bars = iter_bars(sources, chunksize)
+        with open(path, "wb") as out:
+            while True:
+                chunk = list(itertools.islice(bars, chunksize))
+                if not chunk:
+                    break
+                block = np.array(
+                    [(t, codes.setdefault(s, len(codes)), o, h, l, c, v) for t, s, o, h, l, c, v in chunk],
+                    dtype=np.float64,
+                )
+                block.tofile(out)
+                rows += len(block)
+        path.with_suffix(".json").write_text(json.dumps({"rows": rows, "symbols": list(codes)}))
+        return cls(path)
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def array(self):
+        if self._array is None:
+            if self.rows == 0:
+                self._array = np.empty((0, len(_FIELDS)))
+            else:
+                self._array = np.memmap(self.path, dtype=np.float64, mode="r", shape=(self.rows, len(_FIELDS)))
+        return self._array
+
+    def iter_bars(self, chunksize=100_000):
+        """Bar tuples in time order, converted from the map `chunksize` rows at a time."""
+        symbols = self.symbols
+        array = self.array
+        for start in range(0, self.rows, chunksize):
+            for t, code, o, h, l, c, v in array[start:start + chunksize].tolist():
+                yield t, symbols[int(code)], o, h, l, c, v
+
+
+# -------- Search spaces --------
+def param_grid(space):
+    """Every combination of `space` ({name: [values]}), in order."""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def random_search(space, n_iter, seed=None):
+    """
+    `n_iter` random draws from `space`. A list/tuple of values is sampled
+    uniformly; a (low, high) pair given as a 2-tuple of numbers draws from that
+    range (integers if both ends are ints).
+    """
+    rng = random.Random(seed)
+    draws = []
+    for _ in range(n_iter):
+        params = {}
+        for name, values in space.items():
+            if isinstance(values, tuple) and len(values) == 2 and all(isinstance(v, (int, float)) for v in values):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = rng.randint(low, high)
+                else:
+                    params[name] = rng.uniform(low, high)
+            else:
+                params[name] = rng.choice(list(values))
+        draws.append(params)
+    return draws
+
+
+# -------- Workers --------
+_worker_bars = None
+
+
+@contextmanager
+def _single_threaded_children():
+    """Set the thread limits in this process's environment while workers are spawned from it."""
+    saved = {var: os.environ.get(var) for var in _THREAD_LIMITS}
+    os.environ.update((var, "1") for var in _THREAD_LIMITS)
+    try:
+        yield
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def _init_worker(bars):
+    global _worker_bars
+    # BLAS read the limits from the environment at load; torch may have been
+    # pulled in by unpickling the engine arguments, so set it explicitly too
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(1)
+    _worker_bars = bars
+
+
+def _run_one(params, base_config, engine_kwargs):
+    config = {**base_config, **params}
+    try:
+        result = BacktestEngine(config=config, **engine_kwargs).run(_worker_bars)
+    except Exception as e:
+        logger.exception(f"Sweep run failed for {params}")
+        return {**params, "error": repr(e)}
+    return {**params, **{field: result[field] for field in RESULT_FIELDS}, "error": ""}
+
+
+class ParameterSweep:
+    """
+    Runs one backtest per parameter set across a ProcessPoolExecutor.
+
+    `engine_kwargs` go to every BacktestEngine (strategy_factory must then be
+    a module-level callable so it pickles); `base_config` is merged under each
+    parameter set. `run` streams each finished row to `results_path` (CSV, if
+    given) and returns the whole table as a DataFrame.
+    """
+
+    def __init__(self, bars: SharedBars, base_config=None, engine_kwargs=None, max_workers=None):
+        self.bars = bars
+        self.base_config = base_config or {}
+        self.engine_kwargs = engine_kwargs or {}
+        self.max_workers = max_workers or os.cpu_count()
+
+    def run(self, param_sets, results_path=None):
+        param_sets = list(param_sets)
+        names = list(dict.fromkeys(name for params in param_sets for name in params))
+        columns = names + list(RESULT_FIELDS) + ["error"]
+        rows = []
+        started = time.perf_counter()
+
+        out = open(results_path, "w", newline="") if results_path else None
+        try:
+            writer = csv.DictWriter(out, fieldnames=columns, restval="") if out else None
+            if writer:
+                writer.writeheader()
+            context = multiprocessing.get_context("spawn")
+            with _single_threaded_children(), ProcessPoolExecutor(
+                self.max_workers, mp_context=context, initializer=_init_worker, initargs=(self.bars,)
+            ) as pool:
+                futures = [pool.submit(_run_one, params, self.base_config, self.engine_kwargs)
+                           for params in param_sets]
+                for future in as_completed(futures):
+                    row = future.result()
+                    rows.append(row)
+                    if writer:
+                        writer.writerow(row)
+                        out.flush()
+        finally:
+            if out:
+                out.close()
+
+        logger.info(f"Sweep of {len(param_sets)} runs on {self.max_workers} workers "
+                    f"took {time.perf_counter() - started:.1f}s")
+        return pd.DataFrame(rows, columns=columns)
+
+
+def run_sweep(sources, space, n_iter=None, seed=None, workdir=None, results_path=None, **kwargs):
+    """
+    Grid search over `space`, or `n_iter` random draws from it if given.
+
+    `sources` is anything iter_bars accepts, or a SharedBars; other sources are
+    written to `workdir` first (default: a temporary directory, removed
+    afterwards).
+    """
+    param_sets = random_search(space, n_iter, seed) if n_iter else param_grid(space)
+    if isinstance(sources, SharedBars):
+        return ParameterSweep(sources, **kwargs).run(param_sets, results_path)
+
+    scratch = None if workdir else tempfile.mkdtemp(prefix="sweep-")
+    try:
+        bars = SharedBars.create(sources, Path(workdir or scratch) / "bars.f64")
+        return ParameterSweep(bars, **kwargs).run(param_sets, results_path)
+    finally:
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
@@ -1,12 +1,17 @@
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
+
+from core.market_events import OhlcEvent, QuoteEvent, TradeEvent
 
 logger = logging.getLogger(__name__)
 
-def parse_upstox_message(message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+MarketEvent = Union[TradeEvent, QuoteEvent, OhlcEvent]
+
+def parse_upstox_message(message: Dict[str, Any]) -> Optional[MarketEvent]:
     """
     Parses raw JSON streaming message from Upstox WebSocket into 
-    a normalized event dict your trading bot can consume.
+    a normalized event record (TradeEvent / QuoteEvent / OhlcEvent)
+    your trading bot can consume.
 
     Returns None if message is not useful.
     """
@@ -15,41 +20,35 @@ def parse_upstox_message(message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
 
     if msg_type == "trade":
         # Trade message
-        event = {
-            "event": "trade",
-            "symbol": message.get("symbol"),
-            "price": float(message.get("price", 0)),
-            "quantity": int(message.get("quantity", 0)),
-            "timestamp": message.get("timestamp"),
-        }
-        return event
+        return TradeEvent(
+            message.get("symbol"),
+            float(message.get("price", 0)),
+            int(message.get("quantity", 0)),
+            message.get("timestamp"),
+        )
 
     elif msg_type == "quote":
         # Quote / market depth update
-        event = {
-            "event": "quote",
-            "symbol": message.get("symbol"),
-            "bid_price": float(message.get("bidPrice", 0)),
-            "bid_quantity": int(message.get("bidQuantity", 0)),
-            "ask_price": float(message.get("askPrice", 0)),
-            "ask_quantity": int(message.get("askQuantity", 0)),
-            "timestamp": message.get("timestamp"),
-        }
-        return event
+        return QuoteEvent(
+            message.get("symbol"),
+            float(message.get("bidPrice", 0)),
+            int(message.get("bidQuantity", 0)),
+            float(message.get("askPrice", 0)),
+            int(message.get("askQuantity", 0)),
+            message.get("timestamp"),
+        )
 
     elif msg_type == "ohlc":
         # OHLC price update
-        event = {
-            "event": "ohlc",
-            "symbol": message.get("symbol"),
-            "open": float(message.get("open", 0)),
-            "high": float(message.get("high", 0)),
-            "low": float(message.get("low", 0)),
-            "close": float(message.get("close", 0)),
-            "volume": int(message.get("volume", 0)),
-            "timestamp": message.get("timestamp"),
-        }
-        return event
+        return OhlcEvent(
+            message.get("symbol"),
+            float(message.get("open", 0)),
+            float(message.get("high", 0)),
+            float(message.get("low", 0)),
+            float(message.get("close", 0)),
+            int(message.get("volume", 0)),
+            message.get("timestamp"),
+        )
 
     elif msg_type == "heartbeat":
         # Ignore heartbeat
@@ -2,6 +2,9 @@
 
 import json
 import logging
+import struct
+
+from core.market_events import OhlcEvent, QuoteEvent, TradeEvent
 
 logger = logging.getLogger(__name__)
 
@@ -32,3 +35,350 @@ def decode_message(raw_data):
         data = {}
 
     return data
+
+
+# ---------------------------------------------------------------------------
+# Binary MarketDataFeedV3 (protobuf) decoding
+#
+# The V3 feed sends FeedResponse messages:
+#
+#   FeedResponse { Type type = 1; map<string, Feed> feeds = 2; int64 currentTs = 3; ... }
+#   Feed         { oneof { LTPC ltpc = 1; FullFeed fullFeed = 2;
+#                          FirstLevelWithGreeks firstLevelWithGreeks = 3; } ... }
+#   FullFeed     { oneof { MarketFullFeed marketFF = 1; IndexFullFeed indexFF = 2; } }
+#   MarketFullFeed { LTPC ltpc = 1; MarketLevel marketLevel = 2; MarketOHLC marketOHLC = 4; ... }
+#   IndexFullFeed  { LTPC ltpc = 1; MarketOHLC marketOHLC = 2; }
+#   FirstLevelWithGreeks { LTPC ltpc = 1; Quote firstDepth = 2; ... }
+#   LTPC  { double ltp = 1; int64 ltt = 2; int64 ltq = 3; double cp = 4; }
+#   Quote { int64 bidQ = 1; double bidP = 2; int64 askQ = 3; double askP = 4; }
+#   MarketLevel { repeated Quote bidAskQuote = 1; }
+#   MarketOHLC  { repeated OHLC ohlc = 1; }
+#   OHLC  { string interval = 1; double open = 2; double high = 3; double low = 4;
+#           double close = 5; int64 vol = 6; int64 ts = 7; }
+#
+# The wire format is walked directly and each instrument becomes Trade/Quote/
+# Ohlc records; no generated classes, JSON or intermediate dicts are involved.
+# Unknown fields (greeks, OI, deeper book levels, ...) are skipped.
+# ---------------------------------------------------------------------------
+
+FEED_INITIAL = 0
+FEED_LIVE = 1
+FEED_MARKET_INFO = 2
+
+_unpack_double = struct.Struct("<d").unpack_from
+
+_KIND_ALIASES = {
+    "trade": "trade", "trades": "trade", "ltpc": "trade",
+    "quote": "quote", "quotes": "quote",
+    "ohlc": "ohlc", "bar": "ohlc", "bars": "ohlc",
+}
+
+
+class FeedDecodeError(ValueError):
+    pass
+
+
+class FeedFrame:
+    __slots__ = ("type", "current_ts", "records")
+
+    def __init__(self, type, current_ts, records):
+        self.type = type
+        self.current_ts = current_ts
+        self.records = records
+
+
+def _varint(buf, pos):
+    result = buf[pos]
+    pos += 1
+    if result < 0x80:
+        return result, pos
+    result &= 0x7F
+    shift = 7
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _int64(value):
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _skip(buf, pos, wire_type):
+    if wire_type == 0:
+        _, pos = _varint(buf, pos)
+    elif wire_type == 1:
+        pos += 8
+    elif wire_type == 2:
+        length, pos = _varint(buf, pos)
+        pos += length
+    elif wire_type == 5:
+        pos += 4
+    else:
+        raise FeedDecodeError(f"Unsupported wire type {wire_type}")
+    return pos
+
+
+def _ltpc(buf, pos, end):
+    ltp = cp = 0.0
+    ltt = ltq = 0
+    while pos < end:
+        key, pos = _varint(buf, pos)
+        if key == 0x09:  # 1: double ltp
+            ltp = _unpack_double(buf, pos)[0]
+            pos += 8
+        elif key == 0x10:  # 2: int64 ltt
+            ltt, pos = _varint(buf, pos)
+        elif key == 0x18:  # 3: int64 ltq
+            ltq, pos = _varint(buf, pos)
+        elif key == 0x21:  # 4: double cp
+            cp = _unpack_double(buf, pos)[0]
+            pos += 8
+        else:
+            pos = _skip(buf, pos, key & 7)
+    return ltp, _int64(ltt), _int64(ltq), cp
+
+
+def _quote(buf, pos, end):
+    bid_q = ask_q = 0
+    bid_p = ask_p = 0.0
+    while pos < end:
+        key, pos = _varint(buf, pos)
+        if key == 0x08:  # 1: int64 bidQ
+            bid_q, pos = _varint(buf, pos)
+        elif key == 0x11:  # 2: double bidP
+            bid_p = _unpack_double(buf, pos)[0]
+            pos += 8
+        elif key == 0x18:  # 3: int64 askQ
+            ask_q, pos = _varint(buf, pos)
+        elif key == 0x21:  # 4: double askP
+            ask_p = _unpack_double(buf, pos)[0]
+            pos += 8
+        else:
+            pos = _skip(buf, pos, key & 7)
+    return bid_p, _int64(bid_q), ask_p, _int64(ask_q)
+
+
+def _top_of_book(buf, pos, end):
+    """First bidAskQuote of a MarketLevel, or None."""
+    while pos < end:
+        key, pos = _varint(buf, pos)
+        if key == 0x0A:  # 1: repeated Quote bidAskQuote
+            length, pos = _varint(buf, pos)
+            return _quote(buf, pos, pos + length)
+        pos = _skip(buf, pos, key & 7)
+    return None
+
+
+def _ohlc_bars(buf, pos, end, symbol, out):
+    while pos < end:
+        key, pos = _varint(buf, pos)
+        if key != 0x0A:  # 1: repeated OHLC ohlc
+            pos = _skip(buf, pos, key & 7)
+            continue
+        length, pos = _varint(buf, pos)
+        bar_end = pos + length
+        interval = None
+        o = h = lo = c = 0.0
+        vol = ts = 0
+        while pos < bar_end:
+            key, pos = _varint(buf, pos)
+            field = key >> 3
+            if key == 0x0A:  # 1: string interval
+                n, pos = _varint(buf, pos)
+                interval = bytes(buf[pos:pos + n]).decode("utf-8")
+                pos += n
+            elif key & 7 == 1 and 2 <= field <= 5:  # open/high/low/close doubles
+                value = _unpack_double(buf, pos)[0]
+                pos += 8
+                if field == 2:
+                    o = value
+                elif field == 3:
+                    h = value
+                elif field == 4:
+                    lo = value
+                else:
+                    c = value
+            elif key == 0x30:  # 6: int64 vol
+                vol, pos = _varint(buf, pos)
+            elif key == 0x38:  # 7: int64 ts
+                ts, pos = _varint(buf, pos)
+            else:
+                pos = _skip(buf, pos, key & 7)
+        out.append(OhlcEvent(symbol, o, h, lo, c, _int64(vol), _int64(ts) / 1000.0, interval))
+
+
+def _feed(buf, pos, end, symbol, out, want, last_trades, quotes):
+    """
+    Decode one Feed message, appending the record kinds in `want` to `out`.
+    Quote records also go to `quotes`, to be stamped with the frame's currentTs.
+    """
+    ltpc = None
+    quote = None
+    bars = [] if "ohlc" in want else None
+
+    while pos < end:
+        key, pos = _varint(buf, pos)
+        if key & 7 != 2:
+            pos = _skip(buf, pos, key & 7)
+            continue
+        length, pos = _varint(buf, pos)
+        sub_end = pos + length
+        field = key >> 3
+        if field == 1:  # LTPC ltpc
+            ltpc = _ltpc(buf, pos, sub_end)
+        elif field == 2:  # FullFeed: one of marketFF(1) / indexFF(2)
+            while pos < sub_end:
+                inner_key, pos = _varint(buf, pos)
+                if inner_key not in (0x0A, 0x12):
+                    pos = _skip(buf, pos, inner_key & 7)
+                    continue
+                is_index = inner_key == 0x12
+                n, pos = _varint(buf, pos)
+                ff_end = pos + n
+                while pos < ff_end:
+                    ff_key, pos = _varint(buf, pos)
+                    if ff_key & 7 != 2:
+                        pos = _skip(buf, pos, ff_key & 7)
+                        continue
+                    m, pos = _varint(buf, pos)
+                    ff_field = ff_key >> 3
+                    if ff_field == 1:
+                        ltpc = _ltpc(buf, pos, pos + m)
+                    elif ff_field == 2 and not is_index:
+                        if "quote" in want:
+                            quote = _top_of_book(buf, pos, pos + m)
+                    elif (ff_field == 2 and is_index) or (ff_field == 4 and not is_index):
+                        if bars is not None:
+                            _ohlc_bars(buf, pos, pos + m, symbol, bars)
+                    pos += m
+        elif field == 3:  # FirstLevelWithGreeks
+            while pos < sub_end:
+                inner_key, pos = _varint(buf, pos)
+                if inner_key & 7 != 2:
+                    pos = _skip(buf, pos, inner_key & 7)
+                    continue
+                n, pos = _varint(buf, pos)
+                if inner_key == 0x0A:
+                    ltpc = _ltpc(buf, pos, pos + n)
+                elif inner_key == 0x12 and "quote" in want:
+                    quote = _quote(buf, pos, pos + n)
+                pos += n
+        pos = sub_end
+
+    if ltpc is not None and "trade" in want:
+        # LTPC repeats the last trade on every frame; only a new (ltt, ltq) is a trade
+        if last_trades is None or last_trades.get(symbol) != ltpc[1:3]:
+            out.append(TradeEvent(symbol, ltpc[0], ltpc[2], ltpc[1] / 1000.0, ltpc[3]))
+            if last_trades is not None:
+                last_trades[symbol] = ltpc[1:3]
+    if quote is not None:
+        # Stamped by the caller: ltt can be minutes old on an illiquid symbol
+        record = QuoteEvent(symbol, quote[0], quote[1], quote[2], quote[3])
+        out.append(record)
+        quotes.append(record)
+    if bars:
+        out.extend(bars)
+
+
+def decode_feed_response(data, kinds=None, last_trades=None) -> FeedFrame:
+    """
+    Decode one binary FeedResponse frame covering any number of instruments.
+
+    `kinds` optionally limits the records produced to a subset of
+    {"trade", "quote", "ohlc"}. `last_trades` ({symbol: (ltt, ltq)}, updated
+    in place) suppresses trade records that repeat the previous frame's last
+    trade. Trades carry their ltt; quotes carry the frame's currentTs.
+    Raises FeedDecodeError on malformed input.
+    """
+    want = frozenset(kinds) if kinds else frozenset(("trade", "quote", "ohlc"))
+    buf = memoryview(data) if not isinstance(data, memoryview) else data
+    end = len(buf)
+    pos = 0
+    frame_type = FEED_INITIAL
+    current_ts = None
+    records = []
+    quotes = []
+    try:
+        while pos < end:
+            key, pos = _varint(buf, pos)
+            if key == 0x08:  # 1: Type type
+                frame_type, pos = _varint(buf, pos)
+            elif key == 0x12:  # 2: map<string, Feed> feeds
+                length, pos = _varint(buf, pos)
+                entry_end = pos + length
+                symbol = None
+                feed_span = None
+                while pos < entry_end:
+                    entry_key, pos = _varint(buf, pos)
+                    if entry_key == 0x0A:  # map key
+                        n, pos = _varint(buf, pos)
+                        symbol = bytes(buf[pos:pos + n]).decode("utf-8")
+                        pos += n
+                    elif entry_key == 0x12:  # map value
+                        n, pos = _varint(buf, pos)
+                        feed_span = (pos, pos + n)
+                        pos += n
+                    else:
+                        pos = _skip(buf, pos, entry_key & 7)
+                if feed_span is not None:
+                    _feed(buf, feed_span[0], feed_span[1], symbol, records, want, last_trades, quotes)
+                pos = entry_end
+            elif key == 0x18:  # 3: int64 currentTs
+                ts, pos = _varint(buf, pos)
+                current_ts = _int64(ts) / 1000.0
+            else:
+                pos = _skip(buf, pos, key & 7)
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise FeedDecodeError(f"Truncated or malformed FeedResponse: {e}") from e
+    if pos != end:
+        raise FeedDecodeError("FeedResponse field overruns frame")
+    # currentTs is serialised after the feeds, so quotes are stamped once it is known
+    for quote in quotes:
+        quote.timestamp = current_ts
+    return FeedFrame(frame_type, current_ts, records)
+
+
+def decode_upstox_message(raw_data, kind=None, last_trades=None):
+    """
+    Decode a binary V3 feed frame into a list of typed records.
+
+    `kind` filters the result: "trades", "quotes" or "bars" (singular forms
+    and "ltpc"/"ohlc" are accepted too); None keeps everything. See
+    decode_feed_response for `last_trades`. Malformed frames are logged and
+    yield an empty list.
+    """
+    kinds = None
+    if kind is not None:
+        try:
+            kinds = (_KIND_ALIASES[kind],)
+        except KeyError:
+            raise ValueError(f"Unknown record kind {kind!r}") from None
+    try:
+        return decode_feed_response(raw_data, kinds, last_trades).records
+    except FeedDecodeError as e:
+        logger.error(f"Feed decode error: {e}")
+        return []
+
+
+class FeedDecoder:
+    """
+    Frame decoder for one feed connection.
+
+    Every LTPC carries the instrument's last trade, including frames sent only
+    because the quote moved, so a trade record is produced only when the
+    (ltt, ltq) pair differs from the last one seen for that symbol. Text
+    frames go through decode_message.
+    """
+
+    def __init__(self, kind=None):
+        self.kind = kind
+        self.last_trades = {}
+
+    def __call__(self, raw_data):
+        if isinstance(raw_data, (bytes, bytearray, memoryview)):
+            return decode_upstox_message(raw_data, self.kind, self.last_trades)
+        return decode_message(raw_data)
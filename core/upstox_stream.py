@@ -1,50 +1,55 @@
-import asyncio
-import websockets
 import json
 import logging
-from typing import List, AsyncGenerator
+from typing import AsyncGenerator, Iterable, List
 
+from core.feed_client import MarketFeedClient
 
 logger = logging.getLogger(__name__)
 
 
-class UpstoxStreamClient:
-    def __init__(self, access_token: str, ws_url: str = "wss://uat-esocket9.tickertape.in/"):
+class UpstoxStreamClient(MarketFeedClient):
+    """
+    The legacy JSON stream protocol on MarketFeedClient.
+
+    Each connection is authorized with an {"type": "authorization"} message
+    and subscriptions are {"type": "subscribe"} messages; reconnects,
+    subscription replay and fan-out are MarketFeedClient's.
+    """
+
+    def __init__(self, access_token: str, ws_url: str = "wss://uat-esocket9.tickertape.in/", **feed_kwargs):
+        super().__init__(ws_url, decoder=json.loads, handshake=self._authorize, **feed_kwargs)
         self.ws_url = ws_url
         self.access_token = access_token
-        self.ws = None
+        self._messages = self.consumer()
 
-    async def connect(self):
-        self.ws = await websockets.connect(self.ws_url)
-        auth_msg = json.dumps({
+    async def _authorize(self, ws):
+        await ws.send(json.dumps({
             "type": "authorization",
             "access_token": self.access_token
-        })
-        await self.ws.send(auth_msg)
+        }))
         logger.info("Connected to Upstox WebSocket and sent authorization.")
 
-    async def subscribe(self, symbols: List[str]):
+    def subscription_message(self, method: str, symbols: Iterable[str], mode: str) -> str:
         # symbols format: ["NSE:RELIANCE", "NSE:TCS"]
-        sub_msg = json.dumps({
-            "type": "subscribe",
-            "symbol": symbols
+        return json.dumps({
+            "type": "subscribe" if method == "sub" else "unsubscribe",
+            "symbol": sorted(symbols)
         })
-        await self.ws.send(sub_msg)
+
+    async def connect(self):
+        self.start()
+        await self.connected.wait()
+
+    async def subscribe(self, symbols: List[str], mode: str = "full"):
+        await super().subscribe(symbols, mode)
         logger.info(f"Subscribed to symbols: {symbols}")
 
     async def receive(self) -> AsyncGenerator[dict, None]:
-        try:
-            while True:
-                message = await self.ws.recv()
-                data = json.loads(message)
-                logger.debug(f"Received message: {data}")
-                yield data
-        except websockets.ConnectionClosed:
-            logger.warning("WebSocket connection closed.")
-        except Exception as e:
-            logger.error(f"Error receiving WebSocket messages: {e}")
+        """Decoded messages, across reconnects, until disconnect()."""
+        async for data in self._messages:
+            logger.debug(f"Received message: {data}")
+            yield data
 
     async def disconnect(self):
-        if self.ws:
-            await self.ws.close()
-            logger.info("Disconnected WebSocket connection.")
+        await self.stop()
+        logger.info("Disconnected WebSocket connection.")
@@ -1,34 +1,63 @@
 import asyncio
+import logging
 import threading
-import websockets
+
 from core import upstox_protobuf_decoder
+from core.feed_client import MarketFeedClient
+
+logger = logging.getLogger(__name__)
+
 
 class UpstoxWebSocketClient:
-    def __init__(self, ws_url, message_handler):
+    """
+    Blocking callback front end for MarketFeedClient: start() runs the feed
+    on its own event loop (call it from a worker thread) and hands every
+    decoded frame to `message_handler` until stop().
+    """
+
+    def __init__(self, ws_url, message_handler, **feed_kwargs):
         self.ws_url = ws_url
         self.stop_event = threading.Event()
         self.message_handler = message_handler  # Callback to process decoded messages
+        self.feed_kwargs = feed_kwargs
+        self._loop = None
+        self._task = None
 
     async def websocket_consumer(self):
-        async with websockets.connect(self.ws_url) as websocket:
+        # Binary V3 FeedResponse -> list of OhlcEvent records; text -> dict
+        feed = MarketFeedClient(self.ws_url, decoder=upstox_protobuf_decoder.FeedDecoder("bars"),
+                                **self.feed_kwargs)
+        messages = feed.consumer()
+        feed.start()
+        try:
             while not self.stop_event.is_set():
+                decoded_msg = await messages.get()
                 try:
-                    msg_bytes = await websocket.recv()
-                    # For demo assume bars message type, extend logic to determine type as needed
-                    decoded_msg = upstox_protobuf_decoder.decode_upstox_message(msg_bytes, "bars")
                     self.message_handler(decoded_msg)
                 except Exception as e:
-                    print(f"WebSocket error: {e}")
-                    break
+                    logger.error(f"WebSocket message handler error: {e}")
+        finally:
+            await feed.stop()
 
     def start(self):
         self.stop_event.clear()
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
+        self._loop = loop
         try:
-            loop.run_until_complete(self.websocket_consumer())
+            self._task = loop.create_task(self.websocket_consumer())
+            loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
         finally:
+            self._loop = self._task = None
             loop.close()
 
     def stop(self):
         self.stop_event.set()
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # the loop finished on its own meanwhile
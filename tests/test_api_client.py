@@ -0,0 +1,92 @@
+import asyncio
+import json
+import httpx
+import pytest
+from core.api_client import UpstoxApiClient
+from core.config import TradingConfig
+from core.rate_limiter import RateLimiter, TokenBucket
+
+
+def _client(responses, calls):
+    def handler(request):
+        calls.append((request.method, request.url.path))
+        status = responses.pop(0)
+        return httpx.Response(status, json={"data": {"status": status}}, headers={"Retry-After": "0"})
+
+    client = UpstoxApiClient(TradingConfig())
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url=client.base_url)
+    return client
+
+
+def test_retries_only_retryable_statuses():
+    async def run():
+        calls = []
+        client = _client([503, 502, 200], calls)
+        assert (await client.get("/positions"))["data"]["status"] == 200
+        assert len(calls) == 3
+
+        calls.clear()
+        client = _client([400, 200], calls)
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.get("/positions")
+        assert len(calls) == 1
+
+    asyncio.run(run())
+
+
+def test_order_posts_are_not_resent_after_server_errors():
+    async def run():
+        calls = []
+        client = _client([503, 200], calls)
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.post("/orders", json={})
+        assert len(calls) == 1
+
+        calls.clear()
+        client = _client([429, 200], calls)
+        await client.post("/orders", json={})
+        assert len(calls) == 2
+
+    asyncio.run(run())
+
+
+def test_rate_limiter_spaces_out_bursts():
+    async def run():
+        limiter = RateLimiter({"order": [(200, 2)]})
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(6):
+            await limiter.acquire("order")
+        await limiter.acquire("unlisted")
+        return loop.time() - start, limiter.waits
+
+    elapsed, waits = asyncio.run(run())
+    assert elapsed >= 4 / 200 * 0.9
+    assert waits >= 1
+
+    bucket = TokenBucket(rate=1, capacity=1)
+    assert bucket.try_acquire() and not bucket.try_acquire()
+
+
+def test_send_orders_uses_multi_order_endpoint_in_chunks():
+    posted = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        posted.append((request.url.path, len(body)))
+        data = [{"correlation_id": o["correlation_id"], "order_id": f"id-{o['correlation_id']}"}
+                for o in body if o["symbol"] != "BAD"]
+        return httpx.Response(200, json={"status": "success", "data": data})
+
+    client = UpstoxApiClient(TradingConfig())
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url=client.base_url)
+    orders = [dict(symbol=f"NSE:S{i}", quantity=1, side="BUY", order_type="MARKET") for i in range(30)]
+    orders[3] = dict(symbol="NSE:BAD", quantity=1, side="BUY", order_type="MARKET")
+    orders[4] = dict(symbol="NSE:LIM", quantity=1, side="BUY", order_type="LIMIT")
+
+    results = asyncio.run(client.send_orders(orders))
+
+    assert posted == [("/v2/orders/multi", 24), ("/v2/orders/multi", 5)]
+    assert results[0]["order_id"] == "id-0" and results[29]["order_id"] == "id-29"
+    assert isinstance(results[3], RuntimeError)
+    assert isinstance(results[4], ValueError)
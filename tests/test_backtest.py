@@ -0,0 +1,155 @@
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.backtest import BacktestEngine, VirtualTimeEventLoop, iter_bars
+from core.order_manager import Order, OrderSide, OrderStatus, OrderType
+from core.risk_manager import RiskManager
+
+
+def _bars(symbol, n=300, start="2024-01-01 09:15", seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.002, n))
+    return pd.DataFrame({
+        "timestamp": pd.date_range(start, periods=n, freq="min"),
+        "symbol": symbol,
+        "open": close, "high": close * 1.001, "low": close * 0.999, "close": close,
+        "volume": 1000.0,
+    })
+
+
+class AlternatingStrategy:
+    """Buys on every 10th bar of a symbol and sells on the 5th after."""
+
+    def __init__(self, risk_manager, order_manager, config):
+        self.order_manager = order_manager
+        self.seen_times = []
+
+    async def on_market_data(self, market_data):
+        n = market_data.total
+        self.seen_times.append(asyncio.get_running_loop().time())
+        side = OrderSide.BUY if n % 10 == 0 else OrderSide.SELL if n % 10 == 5 else None
+        if side is not None:
+            await self.order_manager.place_order(
+                Order(market_data.symbol, 1, side, OrderType.MARKET, price=float(market_data.close[-1])))
+
+
+class BuyEveryBarStrategy:
+    def __init__(self, risk_manager, order_manager, config):
+        self.order_manager = order_manager
+
+    async def on_market_data(self, market_data):
+        await self.order_manager.place_order(
+            Order(market_data.symbol, 1, OrderSide.BUY, OrderType.MARKET, price=float(market_data.close[-1])))
+
+
+def test_daily_loss_limit_restarts_on_each_bar_date():
+    # Day 1 slides from 100 to 80 while buying: the marked loss passes the 20 limit.
+    # Day 2 drifts up and must trade again
+    close = np.r_[np.linspace(100, 80, 10), np.linspace(80, 82, 5)]
+    stamps = pd.date_range("2024-01-01 09:15", periods=10, freq="min").append(
+        pd.date_range("2024-01-02 09:15", periods=5, freq="min"))
+    bars = pd.DataFrame({"timestamp": stamps, "symbol": "A", "open": close, "high": close,
+                         "low": close, "close": close, "volume": 1000.0})
+
+    result = BacktestEngine(BuyEveryBarStrategy, risk_manager=RiskManager(max_daily_loss=20)).run(bars)
+
+    # Rejected orders are never booked, so only fills show up
+    day2 = stamps[10].timestamp()
+    fills = [o.fills[0][2] for o in result["order_manager"].orders if o.status == OrderStatus.FILLED]
+    assert sum(t < day2 for t in fills) < 10
+    assert sum(t >= day2 for t in fills) == 5
+
+
+def test_virtual_loop_sleeps_cost_no_wall_time():
+    async def sleepers():
+        await asyncio.gather(asyncio.sleep(3600), asyncio.sleep(60))
+
+    loop = VirtualTimeEventLoop()
+    try:
+        t0 = time.perf_counter()
+        loop.run_until_complete(sleepers())
+        assert time.perf_counter() - t0 < 1
+        assert loop.time() == 3600
+    finally:
+        loop.close()
+
+
+def test_iter_bars_merges_csv_files_by_time(tmp_path):
+    a = _bars("A", 5).drop(columns="symbol")
+    b = _bars("B", 5, start="2024-01-01 09:15:30")
+    a.to_csv(tmp_path / "A.csv", index=False)
+    b.to_csv(tmp_path / "B.csv", index=False)
+
+    bars = list(iter_bars([tmp_path / "A.csv", tmp_path / "B.csv"], chunksize=2))
+
+    assert [bar[1] for bar in bars] == ["A", "B"] * 5
+    assert bars[0][0] == pd.Timestamp("2024-01-01 09:15", tz="UTC").timestamp()
+    assert all(x[0] <= y[0] for x, y in zip(bars, bars[1:]))
+
+
+def test_engine_replays_through_order_path_on_virtual_time():
+    data = [_bars("A", 300, seed=1), _bars("B", 300, seed=2)]
+    strategies = []
+
+    def factory(risk_manager, order_manager, config):
+        strategies.append(AlternatingStrategy(risk_manager, order_manager, config))
+        return strategies[0]
+
+    t0 = time.perf_counter()
+    result = BacktestEngine(factory, latency=5.0).run(data)
+
+    assert time.perf_counter() - t0 < 30  # 120 orders x 5s latency would be 10 minutes of wall time
+    assert result["bars"] == 600 and result["symbols"] == 2
+    assert result["orders"] == result["filled"] == 120
+    assert result["positions"] == {}
+    # Each order's latency pushed the virtual clock forward
+    assert result["end"] >= result["start"] + 299 * 60 + 5.0
+    # Equity = initial cash + realised round-trip PnL
+    om = result["order_manager"]
+    pnl = sum((1 if o.side == OrderSide.SELL else -1) * o.avg_fill_price * o.filled_qty for o in om.orders)
+    assert abs(result["final_equity"] - (100_000 + pnl)) < 1e-6
+
+
+def test_engine_runs_ai_strategy():
+    result = BacktestEngine(config={"trade_quantity": 1}).run(_bars("A", 200, seed=3))
+
+    assert result["bars"] == 200
+    assert result["orders"] > 0
+    assert np.isfinite(result["final_equity"])
+
+
+def test_ai_strategy_indicator_work_per_bar_stays_flat(monkeypatch):
+    import core.ai_strategy as ai_strategy
+    import core.indicators as indicators
+
+    # Closes each evaluate_market call feeds through an EMA replay or an exact rebuild
+    work = []
+    ema_prefix = indicators._ema_prefix
+
+    def counting_ema_prefix(closes, span):
+        work[-1] += len(closes)
+        return ema_prefix(closes, span)
+
+    class CountingAdaptiveIndicators(ai_strategy.AdaptiveIndicators):
+        def __init__(self, closes, *args, **kwargs):
+            work[-1] += len(closes)
+            super().__init__(closes, *args, **kwargs)
+
+    evaluate_market = ai_strategy.AIStrategy.evaluate_market
+
+    def counting_evaluate_market(self, market_data):
+        work.append(0)
+        return evaluate_market(self, market_data)
+
+    monkeypatch.setattr(indicators, "_ema_prefix", counting_ema_prefix)
+    monkeypatch.setattr(ai_strategy, "AdaptiveIndicators", CountingAdaptiveIndicators)
+    monkeypatch.setattr(ai_strategy.AIStrategy, "evaluate_market", counting_evaluate_market)
+
+    BacktestEngine(config={"trade_quantity": 1}).run(_bars("A", 6000, seed=4))
+
+    # Replays over the whole history made the late bars cost about 3.7x the early ones
+    assert len(work) == 6000
+    assert np.mean(work[5000:]) < 1.25 * np.mean(work[1000:2000])
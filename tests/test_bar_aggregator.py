@@ -0,0 +1,91 @@
+import asyncio
+import functools
+
+import pytest
+from core.bar_aggregator import BarAggregator
+from core.event_dispatcher import EventDispatcher
+
+
+def test_time_bars_close_on_next_bucket():
+    agg = BarAggregator("time", 60)
+    assert agg.add_trade("TCS", 100.0, 5, 0) is None
+    assert agg.add_trade("TCS", 102.0, 1, 30) is None
+    assert agg.add_trade("TCS", 99.0, 2, 59) is None
+    buf = agg.add_trade("TCS", 101.0, 3, 61)
+    assert buf is not None and len(buf) == 1
+    bar = buf.last()
+    assert (bar["timestamp"], bar["open"], bar["high"], bar["low"], bar["close"], bar["volume"]) == (0, 100, 102, 99, 99, 8)
+    assert agg.forming("TCS").start == 60
+
+
+def test_tick_and_volume_bars():
+    ticks = BarAggregator("tick", 3)
+    closed = [ticks.add_trade("INFY", p, 1, i) for i, p in enumerate([1, 2, 3, 4, 5, 6])]
+    assert [c is not None for c in closed] == [False, False, True, False, False, True]
+    assert list(ticks.store["INFY"].close) == [3, 6]
+
+    volume = BarAggregator("volume", 100)
+    assert volume.add_trade("INFY", 10.0, 60, 0) is None
+    buf = volume.add_trade("INFY", 11.0, 50, 1)
+    assert buf.last()["volume"] == 110
+
+
+def test_expire_closes_idle_time_bars():
+    agg = BarAggregator("time", 60)
+    agg.add_trade("TCS", 100.0, 1, 10)
+    assert agg.expire(now=59) == []
+    assert len(agg.expire(now=60)) == 1
+    assert agg.forming("TCS") is None
+
+
+def test_dispatcher_feeds_strategy_once_per_bar():
+    seen = []
+
+    async def on_bar(buf):
+        seen.append(buf.get("close")[-1])
+
+    async def run():
+        agg = BarAggregator("tick", 2, on_bar=on_bar)
+        dispatcher = EventDispatcher()
+        dispatcher.register_handler("trade", agg.on_event)
+        for i, price in enumerate([1.0, 2.0, 3.0, 4.0, 5.0]):
+            await dispatcher.dispatch({"event": "trade", "symbol": "X", "price": price, "quantity": 1, "timestamp": i})
+
+    asyncio.run(run())
+    assert seen == [2.0, 4.0]
+
+
+def test_strategy_manager_runs_strategy_once_per_aggregated_bar():
+    from core.handler import trade_event_handler
+    from core.strategy_manager import StrategyManager
+
+    class Strategy:
+        def __init__(self):
+            self.bars = []
+            self.trades = 0
+
+        async def on_market_data(self, market_data):
+            self.bars.append((market_data.symbol, float(market_data.close[-1]), float(market_data.volume[-1])))
+
+        async def on_trade(self, symbol, price, quantity, timestamp=None):
+            self.trades += 1
+
+    async def run():
+        strategy = Strategy()
+        manager = StrategyManager(strategy, None, None, None, bar_aggregator=BarAggregator("tick", 2))
+        dispatcher = EventDispatcher()
+        dispatcher.register_handler("trade", functools.partial(trade_event_handler, strategy_manager=manager))
+        for i, price in enumerate([1.0, 2.0, 3.0, 4.0, 5.0]):
+            await dispatcher.dispatch({"event": "trade", "symbol": "X", "price": price, "quantity": 2, "timestamp": i})
+        await manager._trade_queue.join()
+        await manager.shutdown()
+        return strategy
+
+    strategy = asyncio.run(run())
+    assert strategy.bars == [("X", 2.0, 4.0), ("X", 4.0, 4.0)]
+    assert strategy.trades == 5
+
+
+def test_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        BarAggregator("dollar", 10)
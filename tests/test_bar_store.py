@@ -0,0 +1,37 @@
+import numpy as np
+from core.bar_store import BarBuffer, BarStore
+from core.strategy.moving_average_strategy import MovingAverageCrossoverStrategy
+
+
+def _fill(buf, closes):
+    for i, c in enumerate(closes):
+        buf.append(i, c, c + 1, c - 1, c, 10)
+
+
+def test_ring_buffer_wraps_and_keeps_latest_bars():
+    buf = BarBuffer("NSE:TCS", capacity=8)
+    _fill(buf, range(20))
+    assert len(buf) == 8
+    assert buf.total == 20
+    np.testing.assert_array_equal(buf.close, np.arange(12, 20))
+    np.testing.assert_array_equal(buf.column("high", 3), [18, 19, 20])
+    assert buf.last()["timestamp"] == 19
+
+
+def test_columns_are_views_not_copies():
+    buf = BarBuffer(capacity=16)
+    _fill(buf, range(5))
+    closes = buf["close"]
+    assert np.shares_memory(closes, buf._data)
+    assert closes.flags["C_CONTIGUOUS"]
+
+
+def test_buffer_answers_market_data_protocol():
+    store = BarStore(capacity=32)
+    for c in range(25):
+        store.append("NSE:INFY", c, c, c, c, c)
+    buf = store["NSE:INFY"]
+    assert buf.get("asset") == "NSE:INFY"
+    assert buf.get("missing", []) == []
+    strat = MovingAverageCrossoverStrategy()
+    assert strat.generate_signal(buf) == strat.generate_signal(list(range(25)))
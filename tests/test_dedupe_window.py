@@ -0,0 +1,37 @@
+from core.dedupe_window import DedupeWindow
+
+
+def test_keys_expire_after_window():
+    window = DedupeWindow(10)
+    window.add("a", now=0.0)
+    window.add("b", now=5.0)
+
+    assert window.seen("a", now=9.9)
+    assert not window.seen("a", now=10.0)
+    assert window.seen("b", now=10.0)
+    assert window.metrics() == {"size": 1, "expired": 1, "overflowed": 0}
+
+
+def test_readding_refreshes_key():
+    window = DedupeWindow(10)
+    window.add("a", now=0.0)
+    window.add("b", now=1.0)
+    window.add("a", now=8.0)
+
+    assert not window.seen("b", now=12.0)
+    assert window.seen("a", now=12.0)
+
+
+def test_size_stays_flat_over_a_long_run():
+    window = DedupeWindow(10, max_size=50)
+    for i in range(100_000):
+        window.add(i, now=i * 0.5)
+
+    assert len(window) == 20
+    assert window.expired == 100_000 - 20
+    assert window.overflowed == 0
+
+    burst = DedupeWindow(10, max_size=50)
+    for i in range(200):
+        burst.add(i, now=0.0)
+    assert len(burst) == 50 and burst.overflowed == 150 and not burst.seen(0, now=0.0)
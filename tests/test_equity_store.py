@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from core.equity_store import EquityStore
+from core.risk_manager import RiskManager
+
+
+def _batch_max_drawdown(values):
+    curve = pd.Series(values, dtype=float)
+    running_max = curve.cummax()
+    return ((running_max - curve) / running_max).max()
+
+
+def test_running_drawdown_matches_batch():
+    rng = np.random.default_rng(7)
+    values = 100_000 * np.cumprod(1 + rng.normal(0, 0.01, 5000))
+    store = EquityStore()
+    for i, value in enumerate(values):
+        store.update(i, value)
+
+    assert abs(store.max_drawdown - _batch_max_drawdown(values)) < 1e-12
+    assert store.peak == values.max()
+    assert store.current == values[-1]
+    np.testing.assert_array_equal(store.values, values)
+
+
+def test_downsampled_history_keeps_last_value_per_bucket_but_sees_every_tick():
+    store = EquityStore(history_interval=60)
+    ticks = [(0, 100.0), (10, 120.0), (59, 90.0), (60, 95.0), (61, 96.0), (185, 97.0)]
+    for ts, value in ticks:
+        store.update(ts, value)
+
+    assert store.timestamps == [59, 61, 185]
+    assert list(store.values) == [90.0, 96.0, 97.0]
+    assert store.max_drawdown == 0.25  # the 120 -> 90 dip inside the first minute
+    assert abs(store.drawdown - (120 - 97) / 120) < 1e-12
+
+
+def test_risk_manager_uses_equity_store():
+    rm = RiskManager(max_drawdown_limit=0.1)
+    for ts, value in zip(pd.date_range("2024-01-01", periods=4, freq="min"), [100, 110, 95, 105]):
+        rm.update_equity_curve(ts, value)
+
+    assert abs(rm.max_drawdown() - 15 / 110) < 1e-12
+    assert rm.check_max_drawdown_limit()
+    assert rm.risk_report(105)["drawdown_exceeded"]
+    assert list(rm.equity_curve) == [100, 110, 95, 105]
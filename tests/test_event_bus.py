@@ -0,0 +1,120 @@
+import asyncio
+from core.event_bus import ShardedEventBus
+from core.event_queue import Event
+
+
+def _trade(symbol, price):
+    return {"event": "trade", "symbol": symbol, "price": price}
+
+
+def _quote(symbol, bid):
+    return {"event": "quote", "symbol": symbol, "bid_price": bid}
+
+
+def test_per_symbol_order_is_preserved_across_shards():
+    seen = {}
+
+    async def handler(event):
+        await asyncio.sleep(0)
+        seen.setdefault(event["symbol"], []).append(event["price"])
+
+    async def run():
+        bus = ShardedEventBus(num_shards=4, batch_size=3)
+        bus.register_handler("trade", handler)
+        bus.start()
+        for i in range(20):
+            for sym in ("A", "B", "C"):
+                await bus.publish(_trade(sym, i))
+        await bus.join()
+        await bus.stop()
+        return bus.metrics()
+
+    metrics = asyncio.run(run())
+    assert seen == {sym: list(range(20)) for sym in ("A", "B", "C")}
+    assert metrics["processed"] == 60 and metrics["depth"] == 0
+
+
+def test_slow_symbol_does_not_stall_other_shards():
+    done = []
+
+    async def run():
+        gate = asyncio.Event()
+        bus = ShardedEventBus(num_shards=2)
+        bus.shard_for = lambda symbol: 0 if symbol == "SLOW" else 1
+
+        async def handler(event):
+            if event["symbol"] == "SLOW":
+                await gate.wait()
+            done.append(event["symbol"])
+
+        bus.register_handler("trade", handler)
+        bus.start()
+        await bus.publish(_trade("SLOW", 1))
+        await bus.publish(_trade("FAST", 1))
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert done == ["FAST"]
+        gate.set()
+        await bus.join()
+        await bus.stop()
+
+    asyncio.run(run())
+    assert done == ["FAST", "SLOW"]
+
+
+def test_drop_oldest_and_conflate_policies():
+    async def run(policy, events):
+        received = []
+        bus = ShardedEventBus(num_shards=1, maxsize=2, overflow=policy)
+        bus.register_handler("quote", received.append)
+        bus.register_handler("trade", received.append)
+        for event in events:
+            await bus.publish(event)
+        metrics = bus.metrics()
+        bus.start()
+        await bus.join()
+        await bus.stop()
+        return received, metrics
+
+    received, metrics = asyncio.run(run("drop_oldest", [_trade("A", i) for i in range(5)]))
+    assert [e["price"] for e in received] == [3, 4]
+    assert metrics["dropped"] == 3
+
+    quotes = [_quote("A", 1), _quote("B", 1), _quote("A", 2), _quote("A", 3), _quote("B", 2)]
+    received, metrics = asyncio.run(run("conflate", quotes))
+    assert [(e["symbol"], e["bid_price"]) for e in received] == [("A", 3), ("B", 2)]
+    assert metrics["conflated"] == 3
+
+
+def test_batch_handler_and_event_objects():
+    batches = []
+
+    async def run():
+        bus = ShardedEventBus(num_shards=1, batch_size=10)
+        bus.register_handler("market_data", batches.append, batch=True)
+        for i in range(5):
+            await bus.put(Event("market_data", {"symbol": "X", "close": [i]}))
+        bus.start()
+        await bus.join()
+        await bus.stop()
+
+    asyncio.run(run())
+    assert [len(b) for b in batches] == [5]
+
+
+def test_each_batch_handler_gets_each_event_once():
+    first, second, single = [], [], []
+
+    async def run():
+        bus = ShardedEventBus(num_shards=1, batch_size=10)
+        bus.register_handler("market_data", first.extend, batch=True)
+        bus.register_handler("market_data", second.extend, batch=True)
+        bus.register_handler("market_data", single.append)
+        for i in range(3):
+            await bus.put(Event("market_data", {"symbol": "X", "close": [i]}))
+        bus.start()
+        await bus.join()
+        await bus.stop()
+
+    asyncio.run(run())
+    assert len(first) == len(second) == len(single) == 3
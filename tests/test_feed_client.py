@@ -0,0 +1,208 @@
+import asyncio
+import json
+import websockets
+from core.feed_client import MarketFeedClient
+
+
+async def _serve(handler):
+    server = await websockets.serve(handler, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"ws://127.0.0.1:{port}"
+
+
+def test_reconnects_replays_bulk_subscription_and_fans_out():
+    received_subs = []
+    connections = []
+
+    async def handler(ws):
+        connections.append(ws)
+        received_subs.append(json.loads(await ws.recv()))
+        await ws.send(json.dumps({"n": len(connections)}))
+        if len(connections) == 1:
+            await ws.close()  # drop the first connection after one message
+            return
+        await ws.wait_closed()
+
+    async def run():
+        server, url = await _serve(handler)
+        client = MarketFeedClient(url, backoff_initial=0.01, ping_interval=None)
+        first, second = client.consumer(), client.consumer()
+        await client.subscribe(["NSE_EQ|A", "NSE_EQ|B", "NSE_EQ|C"])
+        client.start()
+        frames = [await asyncio.wait_for(first.get(), 5) for _ in range(2)]
+        other = [await asyncio.wait_for(second.get(), 5) for _ in range(2)]
+        metrics = client.metrics()
+        await client.stop()
+        server.close()
+        await server.wait_closed()
+        return frames, other, metrics
+
+    frames, other, metrics = asyncio.run(run())
+    assert frames == other == [{"n": 1}, {"n": 2}]
+    assert metrics["reconnects"] == 1
+    # Same single bulk request on the first connection and the replay
+    assert len(received_subs) == 2
+    for sub in received_subs:
+        assert sub["method"] == "sub"
+        assert sub["data"] == {"mode": "full", "instrumentKeys": ["NSE_EQ|A", "NSE_EQ|B", "NSE_EQ|C"]}
+
+
+def test_stale_feed_triggers_reconnect():
+    connections = []
+
+    async def handler(ws):
+        connections.append(ws)
+        await ws.wait_closed()  # never sends anything
+
+    async def run():
+        server, url = await _serve(handler)
+        client = MarketFeedClient(url, stale_after=0.05, backoff_initial=0.01, ping_interval=None)
+        client.start()
+        for _ in range(200):
+            if client.reconnects >= 1:
+                break
+            await asyncio.sleep(0.01)
+        await client.stop()
+        server.close()
+        await server.wait_closed()
+        return client.reconnects
+
+    assert asyncio.run(run()) >= 1
+
+
+def test_market_data_manager_start_keeps_earlier_consumers(monkeypatch):
+    from core.market_data import MarketDataManager
+
+    async def handler(ws):
+        await ws.recv()
+        await ws.send(json.dumps({"hello": 1}))
+        await ws.wait_closed()
+
+    async def run():
+        server, url = await _serve(handler)
+        manager = MarketDataManager({})
+
+        async def authorized():
+            return url
+
+        manager._authorized_url = authorized
+        manager.subscribe("NSE_EQ|A")
+        early = manager.consumer()
+        task = asyncio.ensure_future(manager.start())
+        frame = await asyncio.wait_for(early.get(), 5)
+        await manager.stop()
+        await asyncio.wait_for(task, 5)
+        server.close()
+        await server.wait_closed()
+        return frame
+
+    monkeypatch.setenv("UPSTOX_ACCESS_TOKEN", "token")
+    assert asyncio.run(run()) == {"hello": 1}
+
+
+def test_failed_authorization_clears_single_use_url(monkeypatch):
+    from core import market_data
+
+    class _Response:
+        status = 401
+
+        async def text(self):
+            return "unauthorized"
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    class _Session(_Response):
+        def get(self, url, headers=None):
+            return _Response()
+
+    monkeypatch.setenv("UPSTOX_ACCESS_TOKEN", "token")
+    monkeypatch.setattr(market_data.aiohttp, "ClientSession", _Session)
+    manager = market_data.MarketDataManager({})
+    manager.ws_url = "wss://used-once"
+    asyncio.run(manager.fetch_authorized_ws_url())
+    assert manager.ws_url is None
+
+
+def test_legacy_stream_client_authorizes_and_resubscribes_on_reconnect():
+    from core.upstox_stream import UpstoxStreamClient
+
+    received = []
+    connections = []
+
+    async def handler(ws):
+        connections.append(ws)
+        received.append([json.loads(await ws.recv()), json.loads(await ws.recv())])
+        await ws.send(json.dumps({"n": len(connections)}))
+        if len(connections) == 1:
+            await ws.close()
+            return
+        await ws.wait_closed()
+
+    async def run():
+        server, url = await _serve(handler)
+        client = UpstoxStreamClient("token", url, backoff_initial=0.01, ping_interval=None)
+        await client.subscribe(["NSE:TCS", "NSE:INFY"])
+        await client.connect()
+        messages = client.receive()
+        got = [await asyncio.wait_for(messages.__anext__(), 5) for _ in range(2)]
+        await client.disconnect()
+        server.close()
+        await server.wait_closed()
+        return got
+
+    assert asyncio.run(run()) == [{"n": 1}, {"n": 2}]
+    assert received == [[{"type": "authorization", "access_token": "token"},
+                         {"type": "subscribe", "symbol": ["NSE:INFY", "NSE:TCS"]}]] * 2
+
+
+def test_callback_client_runs_the_feed_until_stopped():
+    import threading
+    from core.upstox_ws_client import UpstoxWebSocketClient
+
+    connections = []
+
+    async def handler(ws):
+        connections.append(ws)
+        await ws.send(json.dumps({"n": len(connections)}))
+        if len(connections) == 1:
+            await ws.close()
+            return
+        await ws.wait_closed()
+
+    server_ready = threading.Event()
+    server_state = {}
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        server, url = loop.run_until_complete(_serve(handler))
+        server_state.update(loop=loop, url=url, server=server)
+        server_ready.set()
+        loop.run_forever()
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+        loop.close()
+
+    server_thread = threading.Thread(target=serve)
+    server_thread.start()
+    server_ready.wait(5)
+
+    seen = []
+    client = UpstoxWebSocketClient(server_state["url"], seen.append, backoff_initial=0.01, ping_interval=None)
+    worker = threading.Thread(target=client.start)
+    worker.start()
+    for _ in range(500):
+        if len(seen) >= 2:
+            break
+        threading.Event().wait(0.01)
+    client.stop()
+    worker.join(5)
+    server_state["loop"].call_soon_threadsafe(server_state["loop"].stop)
+    server_thread.join(5)
+
+    assert not worker.is_alive()
+    # The feed reconnected after the first connection dropped
+    assert seen[:2] == [{"n": 1}, {"n": 2}]
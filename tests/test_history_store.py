@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.backtest import iter_bars
+from core.history_store import HistoryStore
+from core.mock_data_manager import MockDataManager
+
+
+def _bars(start="2024-01-01 23:00", n=180, freq="min", seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.1, n))
+    return pd.DataFrame({
+        "timestamp": pd.date_range(start, periods=n, freq=freq, tz="UTC"),
+        "open": close, "high": close + 0.05, "low": close - 0.05, "close": close, "volume": 10.0,
+    })
+
+
+def test_store_partitions_by_day_and_reads_back_through_memmap(tmp_path):
+    store = HistoryStore(tmp_path)
+    bars = _bars()
+    assert store.store_data("SYM", bars) == 180
+
+    assert store.days("SYM") == ["2024-01-01", "2024-01-02"]
+    assert (tmp_path / "SYM" / "2024-01-02" / "close.npy").exists()
+
+    # A range inside one day is a view of the mapped file
+    day = store.fetch_data("SYM", "2024-01-02 00:30", "2024-01-02 00:39")
+    assert isinstance(day["close"], np.memmap)
+    expected = bars.iloc[90:100]
+    np.testing.assert_array_equal(day["close"], expected["close"].to_numpy())
+    assert day["timestamp"][0] == expected["timestamp"].iloc[0].timestamp()
+
+    # A date-only end covers the whole day; ranges spanning days are stitched together
+    everything = store.fetch_data("SYM", "2024-01-01", "2024-01-02")
+    np.testing.assert_array_equal(everything["close"], bars["close"].to_numpy())
+    assert len(store.fetch_data("SYM", "2024-01-03", "2024-01-04")["close"]) == 0
+
+
+def test_index_persists_and_rewrites_merge(tmp_path):
+    bars = _bars(n=60)
+    HistoryStore(tmp_path).store_data("SYM", bars.iloc[:40])
+
+    store = HistoryStore(tmp_path)
+    before = store.fetch_data("SYM")["close"]
+    overlap = bars.iloc[30:].copy()
+    overlap["close"] += 1.0
+    store.store_data("SYM", overlap)
+
+    data = store.fetch_data("SYM")
+    assert len(data["close"]) == 60
+    np.testing.assert_array_equal(data["close"][:30], bars["close"].to_numpy()[:30])
+    np.testing.assert_array_equal(data["close"][30:], bars["close"].to_numpy()[30:] + 1.0)
+    # Views handed out before the rewrite still see the old partition
+    assert len(before) == 40
+    assert HistoryStore(tmp_path).days("SYM") == store.days("SYM")
+
+
+def test_store_is_a_backtest_source(tmp_path):
+    store = HistoryStore(tmp_path)
+    a, b = _bars(seed=1), _bars(start="2024-01-01 23:00:30", seed=2)
+    store.store_data("A", a)
+    store.store_data("B", b)
+
+    bars = list(iter_bars(store.source(start="2024-01-02", end="2024-01-02 00:09:59"), chunksize=4))
+
+    assert [bar[1] for bar in bars] == ["A", "B"] * 10
+    assert all(x[0] <= y[0] for x, y in zip(bars, bars[1:]))
+    assert bars[0][5] == a["close"].iloc[60]
+
+
+def test_mock_data_manager_matches_store_contract(tmp_path):
+    store, mock = HistoryStore(tmp_path), MockDataManager()
+    bars = _bars()
+    for manager in (store, mock):
+        manager.store_data("SYM", bars.iloc[:100])
+        manager.store_data("SYM", bars.iloc[50:])
+
+    expected = store.fetch_data("SYM", "2024-01-01 23:30", "2024-01-02 01:00")
+    actual = mock.fetch_data("SYM", "2024-01-01 23:30", "2024-01-02 01:00")
+    assert set(actual) == set(expected)
+    for name in expected:
+        np.testing.assert_array_equal(actual[name], expected[name])
+
+
+def test_mock_and_store_reject_a_different_column_set_alike(tmp_path):
+    bars = _bars()
+    for manager in (HistoryStore(tmp_path), MockDataManager()):
+        manager.store_data("SYM", bars.iloc[:10])
+        with pytest.raises(ValueError):
+            manager.store_data("SYM", bars.iloc[10:20].drop(columns="open"))
+        with pytest.raises(ValueError):
+            manager.store_data("SYM", bars.iloc[10:20].drop(columns="timestamp"))
+        assert len(manager.fetch_data("SYM")["close"]) == 10
@@ -0,0 +1,151 @@
+import numpy as np
+import pytest
+from core.indicators import AdaptiveIndicators, BatchIndicators, HistoryIndicators, StreamingIndicators
+
+
+def _random_bars(n, seed=7, scale=1.0):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, scale, n))
+    highs = closes + rng.uniform(0, scale, n)
+    lows = closes - rng.uniform(0, scale, n)
+    return closes.tolist(), highs.tolist(), lows.tolist()
+
+
+@pytest.mark.parametrize("scale", [0.05, 1.0])
+def test_streaming_matches_batch_every_bar(scale):
+    closes, highs, lows = _random_bars(120, scale=scale)
+    stream = StreamingIndicators(atr_period=14, rsi_period=14, bb_window=20)
+    for i in range(len(closes)):
+        stream.update(closes[i], highs[i], lows[i])
+        batch = AdaptiveIndicators(closes[:i + 1], highs[:i + 1], lows[:i + 1])
+
+        assert stream.atr() == batch.atr(14)
+        assert stream.compute_adx() == batch.compute_adx(14)
+        assert stream.bb_width() == batch.bb_width(20)
+
+        rsi = batch.compute_rsi(14)
+        assert stream.rsi() == (rsi[-1] if rsi is not None else None)
+
+        for span_base in (5, 20):
+            value, bound = stream.adaptive_ema_bound(span_base)
+            assert abs(value - batch.adaptive_ema(span_base)[-1]) <= bound
+            if bound == 0:
+                assert value == batch.adaptive_ema(span_base)[-1]
+
+
+def test_adaptive_ema_replays_a_bounded_window():
+    closes, highs, lows = _random_bars(3000, scale=0.3)
+    stream = StreamingIndicators(replay_window=256)
+    stream.track(20)
+    for i in range(len(closes)):
+        stream.update(closes[i], highs[i], lows[i])
+        if i % 250 == 249:
+            batch = AdaptiveIndicators(closes[:i + 1], highs[:i + 1], lows[:i + 1])
+            value, bound = stream.adaptive_ema_bound(20)
+            assert abs(value - batch.adaptive_ema(20)[-1]) <= bound
+    # Only the replay window of closes is retained, however long the history
+    assert len(stream._recent) == 512
+
+
+def test_span_registered_after_window_overflow_reports_decaying_bound():
+    closes, _, _ = _random_bars(600)
+    stream = StreamingIndicators.from_history(closes[:500], replay_window=64)
+    value = stream.ema(40)
+    exact = AdaptiveIndicators(closes[:500])._ema_series(np.array(closes[:500]), 40)[-1]
+    error = stream._ema_error[40]
+    assert abs(value - exact) <= error + stream._rounding_bound(2 / 41)
+    stream.extend(closes[500:])
+    assert stream._ema_error[40] < error * 0.01
+
+
+def test_fixed_span_ema_registered_late_is_replayed():
+    closes, _, _ = _random_bars(50)
+    stream = StreamingIndicators.from_history(closes[:30])
+    stream.ema(9)
+    stream.extend(closes[30:])
+    batch = AdaptiveIndicators(closes)
+    assert stream.ema(9) == batch._ema_series(batch.closes, 9)[-1]
+
+
+def test_closes_only_uses_close_as_high_and_low():
+    closes, _, _ = _random_bars(40)
+    stream = StreamingIndicators.from_history(closes)
+    assert stream.atr() == AdaptiveIndicators(closes).atr()
+
+
+def test_batch_indicators_match_per_symbol_batch():
+    rows = [_random_bars(80, seed=s, scale=sc) for s, sc in ((1, 0.05), (2, 1.0), (3, 5.0))]
+    closes = np.array([r[0] for r in rows])
+    highs = np.array([r[1] for r in rows])
+    lows = np.array([r[2] for r in rows])
+    batch = BatchIndicators(closes, highs, lows)
+
+    atr = batch.atr(14)
+    rsi = batch.compute_rsi(14)
+    bbw = batch.bb_width(20)
+    macd_line, signal, hist = batch.macd()
+    for i, (c, h, l) in enumerate(rows):
+        single = AdaptiveIndicators(c, h, l)
+        np.testing.assert_allclose(batch.adaptive_ema(20)[i], single.adaptive_ema(20))
+        np.testing.assert_allclose(rsi[i], single.compute_rsi(14))
+        np.testing.assert_allclose(hist[i], single.macd()[2])
+        for end in (21, 40, 80):
+            prefix = AdaptiveIndicators(c[:end], h[:end], l[:end])
+            assert atr[i, end - 1] == pytest.approx(prefix.atr(14))
+            assert bbw[i, end - 1] == pytest.approx(prefix.bb_width(20))
+
+
+def test_batch_adaptive_ema_sweeps_columns_for_distinct_spans():
+    rows = [_random_bars(60, seed=s, scale=0.2 + s / 10) for s in range(40)]
+    closes, highs, lows = (np.array([r[k] for r in rows]) for k in range(3))
+    swept = BatchIndicators(closes, highs, lows).adaptive_ema(20)
+    for i, (c, h, l) in enumerate(rows):
+        # Same arithmetic as the per-group lfilter path, so the values are identical
+        assert np.array_equal(swept[i], BatchIndicators(c, h, l).adaptive_ema(20)[0])
+        np.testing.assert_allclose(swept[i], AdaptiveIndicators(c, h, l).adaptive_ema(20))
+
+
+def test_batch_indicators_short_history():
+    batch = BatchIndicators(np.ones((4, 10)))
+    assert batch.atr(14) is None
+    assert batch.compute_rsi(14) is None
+    assert batch.bb_width(20) is None
+    np.testing.assert_allclose(batch.adaptive_ema(20), np.ones((4, 10)))
+
+
+def test_adaptive_indicators_memoizes_and_invalidates_on_append():
+    closes, highs, lows = _random_bars(60)
+    ind = AdaptiveIndicators(closes[:-1], highs[:-1], lows[:-1])
+    ind.macd()
+    assert ind.adaptive_ema(12) is ind.adaptive_ema(12)
+    assert ind.compute_adx() == ind.atr()
+
+    ind.append(closes[-1], highs[-1], lows[-1])
+    fresh = AdaptiveIndicators(closes, highs, lows)
+    assert ind.atr() == fresh.atr()
+    np.testing.assert_array_equal(ind.adaptive_ema(20), fresh.adaptive_ema(20))
+    np.testing.assert_array_equal(ind.compute_rsi(), fresh.compute_rsi())
+
+
+@pytest.mark.parametrize("scale", [0.05, 1.0])
+def test_history_indicators_match_streaming_every_bar(scale):
+    closes, highs, lows = _random_bars(400, scale=scale)
+    history = HistoryIndicators(closes, highs, lows)
+    stream = StreamingIndicators()
+    lower, _, upper = history.bollinger_bands()
+    for i in range(len(closes)):
+        stream.update(closes[i], highs[i], lows[i])
+
+        for value, expected in ((history.atr()[i], stream.atr()), (history.rsi()[i], stream.rsi()),
+                                (lower[i], stream.bollinger_bands()[0]), (upper[i], stream.bollinger_bands()[2])):
+            assert np.isnan(value) if expected is None else value == expected
+
+        for span_base in (5, 20):
+            value, bound = history.adaptive_ema(span_base)
+            streamed, streamed_bound = stream.adaptive_ema_bound(span_base)
+            if bound[i] == 0:
+                assert value[i] == streamed and streamed_bound == 0
+            else:
+                exact = history.replay_ema(i, max(5, span_base / stream.atr()))
+                assert abs(value[i] - exact) <= bound[i]
+                assert abs(streamed - exact) <= streamed_bound
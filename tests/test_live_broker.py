@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+import httpx
+
+from core.broker.base import IBroker
+from core.live_broker import LiveBroker
+from core.order_manager import Order, OrderManager, OrderSide, OrderStatus, OrderType
+
+
+def make_broker(handler, **kwargs):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return LiveBroker("key", "token", "https://broker.test", client=client, **kwargs)
+
+
+def test_place_order_posts_json_with_auth():
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, json={"order_id": "1", "status": "open"})
+
+    broker = make_broker(handler)
+    assert isinstance(broker, IBroker)
+
+    response = asyncio.run(broker.place_order("AAPL", 10, "BUY", "LIMIT", price=101.5, idempotency_key="k1"))
+
+    assert response == {"order_id": "1", "status": "open"}
+    request = seen[0]
+    assert request.method == "POST" and request.url.path == "/orders"
+    assert request.headers["Authorization"] == "Bearer token"
+    assert json.loads(request.content) == {
+        "symbol": "AAPL", "qty": 10, "side": "BUY", "order_type": "LIMIT", "price": 101.5, "tag": "k1",
+    }
+
+
+def test_cancel_and_positions():
+    def handler(request):
+        if request.method == "DELETE":
+            return httpx.Response(200, json={"order_id": request.url.path.rsplit("/", 1)[-1], "status": "cancelled"})
+        return httpx.Response(200, json=[{"symbol": "AAPL", "qty": 5}])
+
+    broker = make_broker(handler)
+
+    assert asyncio.run(broker.cancel_order("42"))["order_id"] == "42"
+    assert asyncio.run(broker.get_positions()) == [{"symbol": "AAPL", "qty": 5}]
+
+
+def test_place_orders_runs_concurrently_with_bounded_in_flight():
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        body = json.loads(request.content)
+        if body["symbol"] == "BAD":
+            return httpx.Response(400, json={"error": "rejected"})
+        return httpx.Response(200, json={"symbol": body["symbol"]})
+
+    broker = make_broker(handler, max_concurrency=3)
+    orders = [dict(symbol=s, quantity=1, side="BUY", order_type="MARKET") for s in ["A", "B", "BAD", "C", "D", "E"]]
+
+    results = asyncio.run(broker.place_orders(orders))
+
+    assert [r["symbol"] for r in results if isinstance(r, dict)] == ["A", "B", "C", "D", "E"]
+    assert isinstance(results[2], httpx.HTTPStatusError)
+    assert peak == 3
+
+
+def test_order_manager_batches_go_through_place_orders():
+    in_flight = 0
+    peak = 0
+    tags = []
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        body = json.loads(request.content)
+        tags.append(body["tag"])
+        return httpx.Response(200, json={"order_id": body["symbol"], "status": "open"})
+
+    broker = make_broker(handler, max_concurrency=2)
+    om = OrderManager(api_client=broker)
+    batch = [Order(s, 1, OrderSide.BUY, OrderType.LIMIT, price=10.0) for s in "ABCDE"]
+
+    orders = asyncio.run(om.place_orders(batch))
+
+    # Bounded by the broker's own max_concurrency: the per-order fallback would run all 5 at once
+    assert peak == 2
+    assert len(tags) == 5 and all(tags)
+    assert [o.order_id for o in orders] == list("ABCDE")
+    assert all(o.status == OrderStatus.UNKNOWN for o in orders)
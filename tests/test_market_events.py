@@ -0,0 +1,65 @@
+import asyncio
+import functools
+from core.event_dispatcher import EventDispatcher
+from core.handler import quote_event_handler, trade_event_handler
+from core.market_events import QuoteEvent, TradeEvent, as_record
+from core.order_manager import OrderManager
+from core.upstox_event_parser import parse_upstox_message
+
+
+class _RecordingStrategyManager:
+    def __init__(self):
+        self.trades = []
+
+    async def on_trade(self, symbol, price, quantity, timestamp=None):
+        self.trades.append((symbol, price, quantity, timestamp))
+
+
+def test_parser_emits_slotted_records():
+    trade = parse_upstox_message({"type": "trade", "symbol": "NSE:TCS", "price": "3500.5", "quantity": "3", "timestamp": 7})
+    assert isinstance(trade, TradeEvent)
+    assert not hasattr(trade, "__dict__")
+    assert (trade.event, trade.price, trade.quantity) == ("trade", 3500.5, 3)
+    # Dict-style reads still work for older consumers
+    assert trade.get("symbol") == trade["symbol"] == "NSE:TCS"
+    assert trade.to_dict()["timestamp"] == 7
+    assert parse_upstox_message({"type": "heartbeat"}) is None
+
+
+def test_records_flow_through_dispatcher_to_handlers():
+    async def run():
+        sm = _RecordingStrategyManager()
+        om = OrderManager()
+        dispatcher = EventDispatcher()
+        dispatcher.register_handler("trade", functools.partial(trade_event_handler, strategy_manager=sm))
+        dispatcher.register_handler("quote", functools.partial(quote_event_handler, order_manager=om))
+        for raw in (
+            {"type": "trade", "symbol": "NSE:TCS", "price": 1, "quantity": 2, "timestamp": 3},
+            {"type": "quote", "symbol": "NSE:TCS", "bidPrice": 9.5, "bidQuantity": 4, "askPrice": 10, "askQuantity": 6},
+        ):
+            await dispatcher.dispatch(parse_upstox_message(raw))
+        return sm, om
+
+    sm, om = asyncio.run(run())
+    assert sm.trades == [("NSE:TCS", 1.0, 2, 3)]
+    assert om.order_book_cache["NSE:TCS"]["ask_quantity"] == 6
+    assert isinstance(parse_upstox_message({"type": "quote", "symbol": "X"}), QuoteEvent)
+
+
+def test_legacy_dict_events_reach_handlers_as_records():
+    async def run():
+        sm = _RecordingStrategyManager()
+        om = OrderManager()
+        dispatcher = EventDispatcher()
+        dispatcher.register_handler("trade", functools.partial(trade_event_handler, strategy_manager=sm))
+        dispatcher.register_handler("quote", functools.partial(quote_event_handler, order_manager=om))
+        await dispatcher.dispatch({"event": "trade", "symbol": "X", "price": 5.0, "quantity": 1, "timestamp": 2})
+        await dispatcher.dispatch({"event": "quote", "symbol": "X", "bid_price": 4.9, "bid_quantity": 3,
+                                   "ask_price": 5.1, "ask_quantity": 7, "timestamp": 2})
+        return sm, om
+
+    sm, om = asyncio.run(run())
+    assert sm.trades == [("X", 5.0, 1, 2)]
+    assert om.order_book_cache["X"]["bid_quantity"] == 3
+    # Non-market dicts are dispatched unchanged
+    assert as_record({"event": "order_update", "id": 1}) == {"event": "order_update", "id": 1}
@@ -0,0 +1,218 @@
+import asyncio
+import functools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.backtest import BacktestEngine
+from core.broker.order_book import BUY, SELL, OrderBook, SimOrder, SimulatedExchange
+from core.broker.paper_broker import PaperBroker
+from core.order_manager import Order, OrderManager, OrderSide, OrderStatus, OrderType
+
+
+def _order(order_id, side, qty, price=None, external=False):
+    return SimOrder(order_id, "SYM", side, qty, price, external=external)
+
+
+def test_price_time_priority_and_partial_fills():
+    book = OrderBook("SYM")
+    for order in (_order("a", SELL, 5, 101.0), _order("b", SELL, 5, 100.0), _order("c", SELL, 5, 100.0)):
+        book.submit(order)
+    assert book.best_ask() == 100.0
+
+    taker = book.submit(_order("t", BUY, 12, 101.0))
+
+    # Best price first, then arrival order within the level
+    assert taker.fills == [(5, 100.0, None), (5, 100.0, None), (2, 101.0, None)]
+    assert taker.status == "filled" and taker.avg_price == (1000 + 202) / 12
+    assert book.depth() == {"bids": [], "asks": [(101.0, 3.0)]}
+
+
+def test_limit_remainder_rests_and_market_remainder_is_cancelled():
+    book = OrderBook("SYM")
+    book.submit(_order("ask", SELL, 3, 100.0))
+
+    rest = book.submit(_order("bid", BUY, 5, 100.0))
+    assert rest.status == "partial" and rest.filled_qty == 3 and book.best_bid() == 100.0
+
+    market = book.submit(_order("mkt", SELL, 10))
+    assert market.status == "cancelled" and market.filled_qty == 2
+    assert book.submit(_order("mkt2", SELL, 1)).status == "rejected"
+
+
+def test_cancel_is_lazy_and_frees_the_level():
+    book = OrderBook("SYM")
+    first, second = _order("1", BUY, 5, 99.0), _order("2", BUY, 5, 99.0)
+    book.submit(first)
+    book.submit(second)
+
+    assert book.queue_position(second) == (1, 5.0)
+    assert book.cancel(first) and not book.cancel(first)
+    assert book.queue_position(second) == (0, 0.0)
+    book.cancel(second)
+    assert book.best_bid() is None
+
+
+def test_queue_position_is_consumed_by_trades_before_our_order_fills():
+    fills = []
+    exchange = SimulatedExchange(listener=lambda order, qty, price, ts: fills.append((order.order_id, qty)))
+    exchange.on_quote("SYM", 99.0, 101.0, 100, 100, now=1.0)
+    ours = exchange.submit("SYM", "buy", 10, 99.0, now=2.0, order_id="ours")
+    exchange.on_quote("SYM", 99.0, 101.0, 150, 100, now=3.0)  # new size queues behind us
+
+    assert exchange.queue_position("ours") == (1, 100.0)
+    exchange.on_trade("SYM", 99.0, 60, now=4.0)
+    assert exchange.queue_position("ours") == (1, 40.0) and ours.filled_qty == 0
+    exchange.on_trade("SYM", 99.0, 45, now=5.0)
+    assert ours.status == "partial" and ours.filled_qty == 5
+    exchange.on_quote("SYM", 99.0, 101.0, 10, 100, now=6.0)  # size withdrawn from the back, not ahead of us
+    assert exchange.queue_position("ours") == (0, 0.0)
+    assert fills == [("ours", 0.0), ("ours", 5.0)]
+
+
+def test_quote_crossing_our_resting_order_fills_it_at_our_price():
+    exchange = SimulatedExchange()
+    ours = exchange.submit("SYM", "sell", 10, 100.5, now=0.0)
+    exchange.on_quote("SYM", 101.0, 101.5, 4, 50, now=1.0)
+
+    assert ours.fills == [(4.0, 100.5, 1.0)]
+    assert exchange.book("SYM").best_bid() is None  # the crossing bid size was used up
+
+
+def test_quote_gapping_past_the_old_quote_keeps_both_sides():
+    exchange = SimulatedExchange()
+    exchange.on_quote("SYM", 100.00, 100.05, 10, 10, now=0.0)
+    exchange.on_quote("SYM", 100.10, 100.15, 10, 10, now=1.0)
+    assert exchange.book("SYM").depth(1) == {"bids": [(100.10, 10.0)], "asks": [(100.15, 10.0)]}
+
+    ours = exchange.submit("SYM", "SELL", 5, 100.2, now=2.0)
+    exchange.on_quote("SYM", 100.3, 100.35, 10, 10, now=3.0)
+    assert ours.fills == [(5.0, 100.2, 3.0)]
+
+    # A one-sided quote through the other side's stale size withdraws it instead of trading
+    exchange.on_quote("SYM", 100.5, None, 10, None, now=4.0)
+    assert exchange.book("SYM").depth(1) == {"bids": [(100.5, 10.0)], "asks": []}
+
+
+def test_latency_delays_arrival_and_cancels():
+    exchange = SimulatedExchange(latency=0.5)
+    exchange.on_quote("SYM", 99.0, 101.0, 100, 100, now=0.0)
+    order = exchange.submit("SYM", "buy", 10, None, now=1.0)
+
+    exchange.process_until(1.4)
+    assert order.status == "pending"
+    exchange.on_quote("SYM", 99.5, 102.0, 100, 100, now=1.5)  # the order arrives first, then the quote moves
+    assert order.fills == [(10.0, 101.0, 1.5)]
+
+    resting = exchange.submit("SYM", "buy", 1, 90.0, now=2.0)
+    exchange.cancel(resting.order_id, now=2.1)
+    exchange.process_until(2.55)
+    assert resting.status == "open"
+    exchange.process_until(2.6)
+    assert resting.status == "cancelled"
+
+
+def test_paper_broker_routes_to_exchange_and_order_manager_reconciles():
+    exchange = SimulatedExchange()
+    broker = PaperBroker(exchange=exchange)
+    om = OrderManager(api_client=broker)
+    broker.on_order_update = om.apply_order_update
+    exchange.on_quote("SYM", 99.0, 100.0, 100, 3, now=0.0)
+
+    async def run():
+        market = await om.place_order(Order("SYM", 5, OrderSide.BUY, OrderType.MARKET, price=100.0))
+        limit = await om.place_order(Order("SYM", 4, OrderSide.SELL, OrderType.LIMIT, price=102.0))
+        return market, limit
+
+    market, limit = asyncio.run(run())
+    # Only 3 were offered: the market order fills 3 and the rest is cancelled
+    assert market.status == OrderStatus.CANCELLED and market.filled_qty == 3 and market.avg_fill_price == 100.0
+    assert limit.status == OrderStatus.PENDING
+
+    exchange.on_trade("SYM", 102.0, 10, now=1.0)
+    assert limit.status == OrderStatus.FILLED and limit.avg_fill_price == 102.0
+    assert om.positions["SYM"] == {"long": 3, "short": 4}
+
+
+def test_order_book_throughput():
+    exchange = SimulatedExchange()
+    rng = np.random.default_rng(0)
+    prices = np.round(100 + rng.normal(0, 0.5, 50_000), 2).tolist()
+    sides = rng.integers(0, 2, 50_000).tolist()
+    ids = []
+    for i, (price, side) in enumerate(zip(prices, sides)):
+        ids.append(exchange.submit("SYM", "buy" if side else "sell", 1 + i % 7, price, now=i).order_id)
+        if i % 3 == 0:
+            exchange.cancel(ids[i // 2], now=i)
+
+    assert exchange.events == 50_000 + len(range(0, 50_000, 3))
+    book = exchange.book("SYM")
+    assert book.best_bid() < book.best_ask()
+
+
+def _bars(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.002, n))
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01 09:15", periods=n, freq="min"), "symbol": "A",
+        "open": close, "high": close * 1.001, "low": close * 0.999, "close": close, "volume": 1000.0,
+    })
+
+
+class RoundTripStrategy:
+    """Buys at market on every 20th bar and sells on the 10th after."""
+
+    def __init__(self, risk_manager, order_manager, config):
+        self.order_manager = order_manager
+
+    async def on_market_data(self, market_data):
+        n = market_data.total
+        side = OrderSide.BUY if n % 20 == 0 else OrderSide.SELL if n % 20 == 10 else None
+        if side is not None:
+            await self.order_manager.place_order(
+                Order(market_data.symbol, 1, side, OrderType.MARKET, price=float(market_data.close[-1])))
+
+
+def test_backtest_fills_against_simulated_book():
+    result = BacktestEngine(RoundTripStrategy, exchange_factory=functools.partial(SimulatedExchange, latency=0.2),
+                            book_spread=0.1).run(_bars())
+
+    om = result["order_manager"]
+    assert result["orders"] == result["filled"] == 20
+    buys = [o for o in om.orders if o.side == OrderSide.BUY]
+    # Market buys pay the ask, half the spread above the close of the bar they were sent on
+    assert all(o.avg_fill_price > o.price for o in buys)
+    assert result["final_equity"] < 100_000
+
+
+def test_backtest_default_spread_keeps_the_book_two_sided():
+    result = BacktestEngine(RoundTripStrategy,
+                            exchange_factory=functools.partial(SimulatedExchange, latency=0.05)).run(_bars())
+
+    assert result["orders"] == result["filled"] == 20
+
+
+def test_bar_trades_reach_resting_orders_past_the_old_quote():
+    fills = []
+    exchange = SimulatedExchange(listener=lambda order, qty, price, ts: qty and fills.append((qty, price)))
+    exchange.on_bar("SYM", 100.0, 100.5, 99.5, 100.0, volume=2000, now=0.0, spread=0.1)
+    assert exchange.book("SYM").depth(1) == {"bids": [(99.95, 2000.0)], "asks": [(100.05, 2000.0)]}
+    order = exchange.submit("SYM", "BUY", 10, 99.0, now=1.0)
+
+    # The market traded down to 95 and back: the stale 99.95 bid does not soak up the selling
+    exchange.on_bar("SYM", 100.0, 100.2, 95.0, 100.0, volume=2000, now=60.0, spread=0.1)
+
+    assert order.status == "filled"
+    assert fills == [(10.0, 99.0)]
+
+
+def test_locked_quotes_and_zero_spread_are_refused():
+    exchange = SimulatedExchange()
+    exchange.on_quote("SYM", 100.0, 101.0, 10, 10, now=0.0)
+    exchange.on_quote("SYM", 100.0, 100.0, 10, 10, now=1.0)  # ignored
+    assert exchange.book("SYM").depth(1) == {"bids": [(100.0, 10.0)], "asks": [(101.0, 10.0)]}
+    with pytest.raises(ValueError):
+        exchange.on_bar("SYM", 100.0, 100.0, 100.0, 100.0, volume=10, spread=0.0)
+    with pytest.raises(ValueError):
+        BacktestEngine(RoundTripStrategy, exchange_factory=SimulatedExchange, book_spread=0.0)
@@ -0,0 +1,60 @@
+from core.order_index import OrderIndex
+from core.order_manager import OPEN_STATUSES, Order, OrderSide, OrderStatus, OrderType
+
+
+def _order(order_id, symbol="AAPL", last_update=0.0):
+    order = Order(symbol, 1, OrderSide.BUY, OrderType.LIMIT, price=1.0)
+    order.order_id = order_id
+    order.last_update = last_update
+    return order
+
+
+def test_lookups_by_id_symbol_and_status():
+    index = OrderIndex(open_statuses=OPEN_STATUSES)
+    a, b, c = _order("a"), _order("b"), _order("c", symbol="MSFT")
+    for order in (a, b, c):
+        index.add(order)
+
+    b.status = OrderStatus.FILLED
+    index.refresh(b)
+
+    assert index.get("b") is b and "c" in index and len(index) == 3
+    assert index.by_symbol("AAPL") == [a, b]
+    assert index.by_status(OrderStatus.PENDING) == [a, c]
+    assert index.by_status(OrderStatus.FILLED) == [b]
+    assert index.open_orders("AAPL") == [a]
+
+    index.remove("a")
+    assert index.by_symbol("AAPL") == [b] and index.by_status(OrderStatus.PENDING) == [c]
+
+
+def test_pop_stale_skips_superseded_and_closed_entries():
+    index = OrderIndex(open_statuses=OPEN_STATUSES)
+    orders = [_order(str(i), last_update=float(i)) for i in range(10)]
+    for order in orders:
+        index.add(order)
+
+    orders[1].last_update = 50.0          # touched since: no longer stale
+    index.refresh(orders[1])
+    orders[2].status = OrderStatus.CANCELLED
+    index.refresh(orders[2])
+    index.remove("3")
+
+    assert [o.order_id for o in index.pop_stale(5.0)] == ["0", "4"]
+    assert index.pop_stale(5.0) == []
+
+    index.requeue(orders[0])
+    assert index.pop_stale(5.0) == [orders[0]]
+    assert [o.order_id for o in index.pop_stale(100.0)] == ["5", "6", "7", "8", "9", "1"]
+
+
+def test_heap_stays_bounded_under_repeated_updates():
+    index = OrderIndex(open_statuses=OPEN_STATUSES)
+    order = _order("x")
+    index.add(order)
+    for t in range(1, 1000):
+        order.last_update = float(t)
+        index.refresh(order)
+
+    assert len(index._heap) < 100
+    assert index.pop_stale(1000.0) == [order]
@@ -0,0 +1,158 @@
+import asyncio
+
+from core.broker.paper_broker import PaperBroker
+from core.mock_risk_manager import MockRiskManager
+from core.order_manager import Order, OrderManager, OrderSide, OrderStatus, OrderType
+
+
+class CountingRiskManager(MockRiskManager):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.size_calls = 0
+
+    async def position_size(self, symbol):
+        self.size_calls += 1
+        return await super().position_size(symbol)
+
+
+class MultiOrderBroker(PaperBroker):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+        self.cancel_batches = []
+
+    async def send_orders(self, orders):
+        self.batches.append(orders)
+        return [await self.place_order(**order) for order in orders]
+
+    async def cancel_orders(self, order_ids):
+        self.cancel_batches.append(order_ids)
+        return [{"order_id": order_id, "status": "cancelled"} for order_id in order_ids]
+
+
+class SlowBroker(PaperBroker):
+    def __init__(self):
+        super().__init__()
+        self.in_flight = 0
+        self.peak = 0
+
+    async def send_order(self, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return await self.place_order(**kwargs)
+
+
+def _orders(n, qty=1):
+    return [Order(f"SYM{i}", qty, OrderSide.BUY, OrderType.MARKET, price=100.0) for i in range(n)]
+
+
+def test_place_orders_uses_multi_order_endpoint_and_checks_risk_once_per_symbol():
+    rm = CountingRiskManager(default_position_size=5)
+    broker = MultiOrderBroker()
+    om = OrderManager(risk_manager=rm, api_client=broker)
+    orders = _orders(3) + [Order("SYM0", 50, OrderSide.BUY, OrderType.MARKET, price=100.0)]
+
+    result = asyncio.run(om.place_orders(orders))
+
+    assert [o.status for o in result] == [OrderStatus.FILLED] * 3 + [OrderStatus.REJECTED]
+    assert rm.size_calls == 3
+    assert len(broker.batches) == 1 and len(broker.batches[0]) == 3
+    assert om.positions["SYM1"]["long"] == 1
+
+
+def test_place_orders_dedupes_within_batch_and_against_recent_keys():
+    om = OrderManager(api_client=PaperBroker(), config={"order_dedupe_window_sec": 60})
+
+    async def run():
+        first = await om.place_order(_orders(1)[0])
+        batch = await om.place_orders(_orders(2) + [_orders(2)[1]])
+        return first, batch
+
+    first, batch = asyncio.run(run())
+
+    assert first.status == OrderStatus.FILLED
+    assert [o.status for o in batch] == [OrderStatus.REJECTED, OrderStatus.FILLED, OrderStatus.REJECTED]
+
+
+def test_place_orders_falls_back_to_bounded_gather():
+    broker = SlowBroker()
+    om = OrderManager(api_client=broker, config={"order_max_concurrency": 4})
+
+    result = asyncio.run(om.place_orders(_orders(20)))
+
+    assert all(o.status == OrderStatus.FILLED for o in result)
+    assert broker.peak == 4
+
+
+def test_panic_rejects_whole_batch():
+    rm = MockRiskManager()
+    rm.is_panic = True
+    broker = MultiOrderBroker()
+    om = OrderManager(risk_manager=rm, api_client=broker)
+
+    result = asyncio.run(om.place_orders(_orders(3)))
+
+    assert all(o.status == OrderStatus.REJECTED for o in result)
+    assert broker.batches == []
+
+
+class OpenOrderBroker(MultiOrderBroker):
+    """Acknowledges orders without filling them."""
+
+    async def place_order(self, symbol, quantity, side, order_type, price=None, idempotency_key=None):
+        self._counter += 1
+        return {"order_id": f"open-{self._counter}", "status": "open"}
+
+
+def test_cancel_orders_batches_and_reports_unknown_refs():
+    broker = OpenOrderBroker()
+    om = OrderManager(api_client=broker)
+
+    async def run():
+        await om.place_orders(_orders(3))
+        return await om.cancel_orders(["open-1", "SYM2", "NOPE"])
+
+    assert asyncio.run(run()) == [True, True, False]
+    assert broker.cancel_batches == [["open-1", "open-3"]]
+    assert om.orders.get("open-1").status == OrderStatus.CANCELLED
+    assert om.orders.get("open-2").status == OrderStatus.UNKNOWN
+
+
+def test_orders_on_same_symbol_are_tracked_separately():
+    broker = OpenOrderBroker()
+    om = OrderManager(api_client=broker)
+    orders = [Order("AAPL", q, OrderSide.BUY, OrderType.LIMIT, price=100.0) for q in (1, 2, 3)]
+
+    async def run():
+        for order in orders:
+            await om.place_order(order)
+        return await om.cancel_order("open-2")
+
+    assert asyncio.run(run()) is True
+    assert [o.order_id for o in om.orders.by_symbol("AAPL")] == ["open-1", "open-2", "open-3"]
+    assert om.orders.by_status(OrderStatus.CANCELLED) == [orders[1]]
+    assert len(om.orders.by_status(OrderStatus.UNKNOWN)) == 2
+
+
+def test_sweep_cancels_only_stale_open_orders():
+    broker = OpenOrderBroker()
+    om = OrderManager(api_client=broker)
+    orders = [Order(f"S{i}", 1, OrderSide.BUY, OrderType.LIMIT, price=10.0 + i) for i in range(4)]
+
+    async def run():
+        for order in orders:
+            await om.place_order(order)
+        orders[0].last_update -= 120
+        orders[1].last_update -= 120
+        orders[1].update_fill(1, 11.0, orders[1].last_update)  # filled: not cancellable
+        orders[2].last_update -= 30
+        for order in orders:
+            om.orders.refresh(order)
+        return await om.sweep_stale_orders(timeout=60)
+
+    assert asyncio.run(run()) == [orders[0]]
+    assert orders[0].status == OrderStatus.CANCELLED
+    assert orders[1].status == OrderStatus.FILLED
+    assert broker.cancel_batches == [["open-1"]]
@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+import websockets
+
+from core.broker.paper_broker import PaperBroker
+from core.order_manager import Order, OrderManager, OrderSide, OrderStatus, OrderType
+from core.order_updates import OrderUpdateStream, parse_order_update
+
+
+class AckBroker(PaperBroker):
+    """Acknowledges orders without filling them, like a real exchange gateway."""
+
+    async def place_order(self, symbol, quantity, side, order_type, price=None, idempotency_key=None):
+        self._counter += 1
+        return {"order_id": f"ack-{self._counter}", "status": "open"}
+
+
+def _update(order_id, status, filled, avg_price, timestamp=1000.0):
+    return {"update_type": "order", "order_id": order_id, "status": status,
+            "filled_quantity": filled, "average_price": avg_price, "timestamp": timestamp}
+
+
+def test_parse_order_update():
+    assert parse_order_update(_update("1", "Complete", "10", "101.5")) == {
+        "order_id": "1", "status": "complete", "filled_qty": 10.0, "avg_price": 101.5, "timestamp": 1000.0,
+    }
+    # Upstox stamps updates with the exchange time (IST) as a datetime string
+    upstox = dict(_update("1", "open", 0, 0), exchange_timestamp="2024-01-02 09:15:30")
+    assert parse_order_update(upstox)["timestamp"] == 1704167130.0
+    # No timestamp at all: left for OrderManager to stamp with its clock
+    assert parse_order_update({"order_id": "1", "status": "open"})["timestamp"] is None
+    assert parse_order_update({"update_type": "position", "order_id": "1"}) is None
+    assert parse_order_update({"status": "open"}) is None
+
+
+def test_cumulative_updates_book_only_new_fills():
+    om = OrderManager(api_client=AckBroker())
+    order = asyncio.run(om.place_order(Order("AAPL", 10, OrderSide.BUY, OrderType.LIMIT, price=100.0)))
+    assert order.status == OrderStatus.UNKNOWN
+
+    om.apply_order_update(parse_order_update(_update("ack-1", "open", 0, 0)))
+    assert order.status == OrderStatus.PENDING
+
+    om.apply_order_update(parse_order_update(_update("ack-1", "open", 4, 100.0)))
+    om.apply_order_update(parse_order_update(_update("ack-1", "open", 4, 100.0)))  # replay
+    om.apply_order_update(parse_order_update(_update("ack-1", "complete", 10, 100.6)))
+
+    assert order.status == OrderStatus.FILLED
+    assert order.filled_qty == 10
+    assert [round(price, 6) for _, price, _ in order.fills] == [100.0, 101.0]
+    assert abs(order.avg_fill_price - 100.6) < 1e-9
+    assert om.positions["AAPL"] == {"long": 10, "short": 0}
+
+
+def test_updates_without_a_timestamp_use_the_order_manager_clock():
+    om = OrderManager(api_client=AckBroker(), clock=lambda: 1234.5)
+    order = asyncio.run(om.place_order(Order("AAPL", 10, OrderSide.BUY, OrderType.LIMIT, price=100.0)))
+
+    om.apply_order_update(parse_order_update({"order_id": "ack-1", "status": "open", "filled_quantity": 4,
+                                              "average_price": 100.0}))
+
+    assert order.fills == [(4.0, 100.0, 1234.5)]
+
+
+def test_partial_then_cancel_and_early_update():
+    om = OrderManager(api_client=AckBroker())
+
+    # Stream beats the send_order response
+    assert om.apply_order_update(parse_order_update(_update("ack-1", "cancelled", 3, 50.0))) is None
+    order = asyncio.run(om.place_order(Order("MSFT", 5, OrderSide.SELL, OrderType.LIMIT, price=50.0)))
+
+    assert order.status == OrderStatus.CANCELLED
+    assert order.filled_qty == 3
+    assert om.positions["MSFT"] == {"long": 0, "short": 3}
+    assert om.orders.open_orders() == []
+
+
+def test_stream_against_local_feed():
+    async def handler(ws):
+        await ws.send(json.dumps(_update("ack-1", "open", 2, 10.0)))
+        await ws.send(json.dumps({"update_type": "position", "symbol": "X"}))
+        await ws.send(json.dumps(_update("ack-1", "complete", 5, 10.0)))
+        await ws.send(json.dumps(_update("unknown", "complete", 1, 1.0)))
+        await ws.wait_closed()
+
+    async def run():
+        server = await websockets.serve(handler, "127.0.0.1", 0)
+        url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+        om = OrderManager(api_client=AckBroker())
+        order = await om.place_order(Order("INFY", 5, OrderSide.BUY, OrderType.LIMIT, price=10.0))
+        stream = OrderUpdateStream(om, url, ping_interval=None, backoff_initial=0.01)
+        stream.start()
+        for _ in range(200):
+            if stream.applied + stream.unmatched >= 3:
+                break
+            await asyncio.sleep(0.01)
+        await stream.stop()
+        server.close()
+        await server.wait_closed()
+        return om, order, stream
+
+    om, order, stream = asyncio.run(run())
+    assert order.status == OrderStatus.FILLED and order.filled_qty == 5
+    assert om.positions["INFY"]["long"] == 5
+    assert (stream.applied, stream.unmatched) == (2, 1)
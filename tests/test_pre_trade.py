@@ -0,0 +1,157 @@
+import asyncio
+
+from core.broker.paper_broker import PaperBroker
+from core.mock_risk_manager import MockRiskManager
+from core.order_manager import Order, OrderManager, OrderSide, OrderStatus, OrderType
+from core.backtest import VirtualTimeEventLoop
+from core.pre_trade import PreTradeCheck, next_session_open
+from core.risk_manager import RiskManager
+
+
+def test_rules():
+    rm = RiskManager(max_position_value=10_000, max_daily_loss=500, max_single_order_value=5_000)
+    check = PreTradeCheck(rm)
+    check.set_max_qty("AAPL", 100)
+
+    assert check.check("AAPL", True, 10, 100.0) is None
+    assert "position size" in check.check("AAPL", True, 101, 1.0)
+    assert "single-order" in check.check("AAPL", True, 60, 100.0)
+
+    check.on_fill("AAPL", True, 40, 100.0)
+    check.on_fill("AAPL", True, 40, 110.0)
+    assert check.exposure("AAPL") == {"qty": 80.0, "notional": 8800.0}
+    assert "position value" in check.check("AAPL", True, 20, 110.0)
+    assert check.check("AAPL", False, 20, 110.0) is None
+
+    check.update_pnl(-600)
+    assert "Daily loss" in check.check("AAPL", True, 1, 110.0)
+    assert check.check("AAPL", False, 10, 110.0) is None  # reducing is still allowed
+
+    rm.trigger_panic("test")
+    assert "PANIC" in check.check("AAPL", False, 10, 110.0)
+
+
+def test_limits_are_snapshotted_until_refresh():
+    rm = MockRiskManager()
+    check = PreTradeCheck(rm)
+    rm.max_single_order_value = 100
+    assert check.check("X", True, 5, 100.0) is None
+    check.refresh()
+    assert check.check("X", True, 5, 100.0) is not None
+
+
+class CountingRiskManager(MockRiskManager):
+    size_calls = 0
+
+    async def position_size(self, symbol):
+        self.size_calls += 1
+        return await super().position_size(symbol)
+
+
+def test_order_manager_sizes_each_symbol_once_and_tracks_exposure():
+    rm = CountingRiskManager(default_position_size=5)
+    rm.max_position_value = 1_000
+    om = OrderManager(risk_manager=rm, api_client=PaperBroker())
+
+    async def run():
+        return [await om.place_order(Order("AAPL", q, OrderSide.BUY, OrderType.MARKET, price=100.0))
+                for q in (3, 4, 5)]
+
+    orders = asyncio.run(run())
+
+    assert [o.status for o in orders] == [OrderStatus.FILLED, OrderStatus.FILLED, OrderStatus.REJECTED]
+    assert rm.size_calls == 1
+    assert om.pre_trade.exposure("AAPL")["qty"] == 7
+
+
+def _order(symbol, qty, side, price):
+    return Order(symbol, qty, side, OrderType.MARKET, price=price)
+
+
+def test_daily_loss_limit_trips_from_fills_and_marks():
+    rm = RiskManager(max_daily_loss=50)
+    om = OrderManager(risk_manager=rm, api_client=PaperBroker())
+
+    async def run():
+        await om.place_order(_order("AAPL", 10, OrderSide.BUY, 100.0))
+        # Marked loss of 40 on the open position: still inside the limit
+        await om.update_market_depth("AAPL", 95.9, 1, 96.1, 1)
+        assert om.pre_trade.daily_pnl == -40
+        allowed = await om.place_order(_order("MSFT", 1, OrderSide.BUY, 10.0))
+        # Closing at 94 realises -60
+        await om.place_order(_order("AAPL", 10, OrderSide.SELL, 94.0))
+        blocked = await om.place_order(_order("MSFT", 2, OrderSide.BUY, 10.0))
+        reducing = await om.place_order(_order("MSFT", 1, OrderSide.SELL, 10.0))
+        return allowed, blocked, reducing
+
+    allowed, blocked, reducing = asyncio.run(run())
+    assert om.pre_trade.daily_pnl == -60
+    assert allowed.status == OrderStatus.FILLED
+    assert blocked.status == OrderStatus.REJECTED
+    assert reducing.status == OrderStatus.FILLED
+    om.pre_trade.start_day()
+    assert om.pre_trade.daily_pnl == 0
+
+
+def test_position_sizes_set_later_are_picked_up():
+    rm = RiskManager()
+    om = OrderManager(risk_manager=rm, api_client=PaperBroker())
+
+    async def run():
+        first = await om.place_order(_order("AAPL", 50, OrderSide.BUY, 100.0))
+        rm.dynamic_position_sizing("AAPL", risk_per_trade=0.005, stop_loss_pct=0.02, current_price=100.0)  # 250 units
+        over = await om.place_order(_order("AAPL", 300, OrderSide.BUY, 100.0))
+        rm.update_risk_limits({"max_single_order_value": 1_000})
+        too_big = await om.place_order(_order("AAPL", 20, OrderSide.BUY, 100.0))
+        return first, over, too_big
+
+    first, over, too_big = asyncio.run(run())
+    assert first.status == OrderStatus.FILLED
+    assert over.status == OrderStatus.REJECTED
+    assert too_big.status == OrderStatus.REJECTED
+
+
+def test_batch_counts_earlier_orders_against_limits():
+    rm = MockRiskManager(default_position_size=10)
+    rm.max_position_value = 1_500
+    om = OrderManager(risk_manager=rm, api_client=PaperBroker())
+
+    batch = [_order("AAPL", 6, OrderSide.BUY, 100.0), _order("AAPL", 6, OrderSide.BUY, 101.0),
+             _order("AAPL", 4, OrderSide.BUY, 102.0),
+             _order("MSFT", 9, OrderSide.BUY, 150.0), _order("MSFT", 1, OrderSide.BUY, 160.0)]
+    orders = asyncio.run(om.place_orders(batch))
+
+    # Each order alone is within limits. 6 + 6 breaks the 10-unit size; 6 + 4 fits it.
+    # 9 + 1 MSFT at 160 is worth 1,600, over the 1,500 position value
+    assert [o.status for o in orders] == [OrderStatus.FILLED, OrderStatus.REJECTED, OrderStatus.FILLED,
+                                          OrderStatus.FILLED, OrderStatus.REJECTED]
+    assert om.pre_trade.exposure("AAPL")["qty"] == 10
+
+
+def test_session_rollover_restarts_daily_pnl_at_each_open():
+    # 2024-01-01 10:00 IST; the next opens are 09:15 IST (03:45 UTC) on the 2nd and 3rd
+    start = 1704083400.0
+    assert next_session_open(start) == 1704167100.0
+    assert next_session_open(1704167100.0) == 1704167100.0 + 86400
+
+    loop = VirtualTimeEventLoop()
+    loop.clock.now = start
+    rm = RiskManager(max_daily_loss=50)
+    om = OrderManager(risk_manager=rm, api_client=PaperBroker(), clock=loop.time)
+
+    async def run():
+        rollover = asyncio.create_task(om.run_session_rollover())
+        await om.place_order(_order("AAPL", 10, OrderSide.BUY, 100.0))
+        om.mark_price("AAPL", 90.0)
+        blocked = await om.place_order(_order("AAPL", 1, OrderSide.BUY, 90.0))
+        await asyncio.sleep(1704167100.0 - loop.time() + 1)
+        allowed = await om.place_order(_order("AAPL", 1, OrderSide.BUY, 90.0))
+        rollover.cancel()
+        return blocked, allowed
+
+    try:
+        blocked, allowed = loop.run_until_complete(run())
+    finally:
+        loop.close()
+    assert blocked.status == OrderStatus.REJECTED
+    assert allowed.status == OrderStatus.FILLED
@@ -0,0 +1,29 @@
+import asyncio
+from core.market_events import QuoteEvent
+from core.order_manager import OrderManager
+from core.quote_conflator import QuoteConflator
+
+
+def _quote(symbol, bid):
+    return QuoteEvent(symbol, bid, 1, bid + 0.05, 1)
+
+
+def test_burst_is_conflated_to_latest_quote_per_symbol():
+    async def run():
+        om = OrderManager()
+        conflator = QuoteConflator(om)
+        conflator.start()
+        for i in range(100):
+            await conflator.on_event(_quote("TCS", 100 + i))
+            await conflator.on_event(_quote("INFY", 200 + i))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        await conflator.stop()
+        return om, conflator.metrics()
+
+    om, metrics = asyncio.run(run())
+    assert om.order_book_cache["TCS"]["bid_price"] == 199
+    assert om.order_book_cache["INFY"]["bid_price"] == 299
+    assert metrics["received"] == 200
+    assert metrics["applied"] == 2
+    assert metrics["conflated"] == 198
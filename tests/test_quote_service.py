@@ -0,0 +1,97 @@
+import asyncio
+
+from core.quote_service import QuoteService
+
+
+class FakeQuotesClient:
+    def __init__(self, delay=0.01, fail=False):
+        self.calls = []
+        self.delay = delay
+        self.fail = fail
+
+    async def get_live_quotes(self, symbols):
+        self.calls.append(list(symbols))
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return {s: {"symbol": s, "ltp": 100.0} for s in symbols if s != "MISSING"}
+
+
+def test_chunks_symbols_to_api_maximum():
+    client = FakeQuotesClient()
+    service = QuoteService(client, chunk_size=2)
+
+    quotes = asyncio.run(service.get_quotes(["A", "B", "C", "D", "E"]))
+
+    assert sorted(quotes) == ["A", "B", "C", "D", "E"]
+    assert client.calls == [["A", "B"], ["C", "D"], ["E"]]
+
+
+def test_concurrent_callers_share_one_round_trip():
+    client = FakeQuotesClient()
+    service = QuoteService(client)
+
+    async def scenario():
+        return await asyncio.gather(*(service.get_quotes(["A", "B"]) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+
+    assert len(client.calls) == 1
+    assert all(r["A"]["ltp"] == 100.0 for r in results)
+    assert service.coalesced == 8
+
+
+def test_ttl_cache_and_expiry():
+    now = [0.0]
+    client = FakeQuotesClient(delay=0)
+    service = QuoteService(client, ttl=1.0, clock=lambda: now[0])
+
+    asyncio.run(service.get_quotes(["A"]))
+    asyncio.run(service.get_quotes(["A"]))
+    assert len(client.calls) == 1 and service.cache_hits == 1
+
+    now[0] = 1.5
+    asyncio.run(service.get_quotes(["A"]))
+    assert len(client.calls) == 2
+
+
+def test_missing_symbols_map_to_none_and_are_not_cached():
+    client = FakeQuotesClient(delay=0)
+    service = QuoteService(client)
+
+    assert asyncio.run(service.get_quotes(["A", "MISSING"]))["MISSING"] is None
+    asyncio.run(service.get_quotes(["MISSING"]))
+    assert len(client.calls) == 2
+
+
+def test_failure_propagates_to_coalesced_callers():
+    client = FakeQuotesClient(fail=True)
+    service = QuoteService(client)
+
+    async def scenario():
+        return await asyncio.gather(service.get_quotes(["A"]), service.get_quote("A"), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(client.calls) == 1
+    assert not service._inflight
+
+
+def test_cancelled_caller_does_not_strand_later_callers():
+    client = FakeQuotesClient(delay=0.05)
+    service = QuoteService(client)
+
+    async def scenario():
+        try:
+            await asyncio.wait_for(service.get_quotes(["A", "B"]), 0.01)
+        except asyncio.TimeoutError:
+            pass
+        # Joins the fetch the cancelled caller started instead of hanging on it
+        quotes = await asyncio.wait_for(service.get_quotes(["A", "B"]), 1)
+        return quotes, dict(service._inflight)
+
+    quotes, inflight = asyncio.run(scenario())
+    assert quotes["A"]["ltp"] == 100.0
+    assert inflight == {}
+    assert len(client.calls) == 1
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from core.risk_estimators import RollingTail, TDigest, Welford
+from core.risk_manager import RiskManager
+
+
+def _returns(n=5000, seed=3):
+    return np.random.default_rng(seed).standard_t(4, n) * 0.01
+
+
+def test_welford_matches_numpy():
+    x = _returns()
+    stats = Welford()
+    for v in x:
+        stats.add(v)
+    assert abs(stats.mean - x.mean()) < 1e-15
+    assert abs(stats.std - x.std()) < 1e-15
+    assert abs(stats.total - x.sum()) < 1e-12
+
+
+def test_rolling_tail_is_exact_over_window():
+    x = _returns()
+    tail = RollingTail(0.05, window=700)
+    for i, v in enumerate(x):
+        tail.add(v)
+        if i % 301 == 0 or i == len(x) - 1:
+            window = x[max(0, i - 699):i + 1]
+            k = int(0.05 * len(window))
+            assert tail.quantile == np.quantile(window, 0.05, method="lower")
+            if k:
+                assert abs(tail.tail_mean - np.sort(window)[:k].mean()) < 1e-12
+            else:
+                assert tail.tail_mean is None
+
+
+def test_rolling_tail_handles_ties_and_small_windows():
+    x = np.round(_returns(3000, seed=5), 3)  # many repeated values
+    for alpha, window in ((0.05, 40), (0.5, 31)):
+        tail = RollingTail(alpha, window=window)
+        for i, v in enumerate(x):
+            tail.add(v)
+            window_values = np.sort(x[max(0, i - window + 1):i + 1])
+            k = int(alpha * len(window_values))
+            assert tail.quantile == np.quantile(window_values, alpha, method="lower")
+            assert tail.tail_mean == (None if not k else pytest.approx(window_values[:k].mean(), abs=1e-12))
+        # Expired values are dropped lazily, but the heaps stay bounded by the window
+        assert len(tail._low) + len(tail._high) <= 3 * window + 128
+
+
+def test_tdigest_tail_accuracy():
+    x = _returns(50_000)
+    digest = TDigest(100)
+    for v in x:
+        digest.add(v)
+    assert abs(digest.quantile(0.05) - np.quantile(x, 0.05)) < 0.02 * x.std()
+    assert abs(digest.tail_mean(0.05) - np.sort(x)[:2500].mean()) < 0.02 * x.std()
+    assert len(digest._centroids) < 1000
+
+
+def test_risk_report_matches_batch_estimators():
+    x = _returns(3000)
+    rm = RiskManager(tdigest_compression=100)
+    for v in x:
+        rm.add_return(v)
+
+    report = rm.risk_report(100_000)
+    assert abs(report["VaR_95"] - rm.value_at_risk(x)) < 1e-12
+    assert abs(report["Expected_Shortfall_95"] - rm.expected_shortfall(x)) < 1e-12
+    assert abs(report["Total_Returns"] - x.sum()) < 1e-12
+    assert report["VaR_95_historical"] == -np.quantile(x, 0.05, method="lower")
+    assert abs(report["VaR_95_tdigest"] - report["VaR_95_historical"]) < 0.05 * x.std()
+
+
+def test_returns_history_is_bounded_by_window():
+    rm = RiskManager(return_window=100)
+    for v in _returns(1000):
+        rm.add_return(v)
+    assert len(rm.returns) == 100
+    assert rm.risk_report(0)["Expected_Shortfall_95"] > 0
@@ -0,0 +1,49 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from core.ai_strategy import AIStrategy
+from core.bar_store import BarBuffer
+from core.strategy.moving_average_strategy import MovingAverageCrossoverStrategy
+
+
+def _prices(level, vol, n=800, seed=0):
+    rng = np.random.default_rng(seed)
+    close = level * np.cumprod(1 + rng.normal(0, vol, n))
+    close[200:260] = close[200]  # a flat stretch for the sideways filter
+    return close, close * (1 + vol / 2), close * (1 - vol / 2)
+
+
+def _ai_strategy(config):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return AIStrategy(None, None, config)
+
+
+@pytest.mark.parametrize("level,vol", [(100, 0.002), (5, 0.01), (1000, 0.001)])
+@pytest.mark.parametrize("config", [{}, {"short_window": 3, "long_window": 30, "rsi_period": 7,
+                                         "bollinger_window": 10}])
+def test_ai_strategy_signals_match_per_bar_path(level, vol, config):
+    close, high, low = _prices(level, vol)
+    strategy = _ai_strategy(config)
+    buffer = BarBuffer("A", capacity=len(close))
+    expected = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(len(close)):
+            buffer.append(i, close[i], high[i], low[i], close[i])
+            expected.append(strategy.evaluate_market(buffer))
+
+    signals = _ai_strategy(config).generate_signals({"close": close, "high": high, "low": low})
+
+    assert signals.tolist() == expected
+
+
+def test_moving_average_signals_match_per_bar_path():
+    close, _, _ = _prices(100, 0.002)
+    strategy = MovingAverageCrossoverStrategy(short_window=5, long_window=20)
+
+    expected = [strategy.generate_signal(list(close[:i + 1])) for i in range(len(close))]
+
+    assert strategy.generate_signals(close).tolist() == expected
+    assert strategy.generate_signals({"close": close}).tolist() == expected
@@ -0,0 +1,87 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from core.backtest import iter_bars
+from core.sweep import SharedBars, param_grid, random_search, run_sweep
+
+
+def _bars(symbol, n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.002, n))
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01 09:15", periods=n, freq="min"),
+        "symbol": symbol,
+        "open": close, "high": close * 1.001, "low": close * 0.999, "close": close,
+        "volume": 1000.0,
+    })
+
+
+def test_shared_bars_round_trip_through_memmap(tmp_path):
+    data = [_bars("A", 50, seed=1), _bars("B", 50, seed=2)]
+    shared = SharedBars.create(data, tmp_path / "bars.f64", chunksize=16)
+
+    clone = pickle.loads(pickle.dumps(shared))
+    assert len(pickle.dumps(shared)) < 500  # the path, not the data
+    assert isinstance(clone.array, np.memmap)
+    assert list(iter_bars(clone, chunksize=7)) == list(iter_bars(data))
+
+
+def test_search_spaces():
+    grid = param_grid({"short_window": [3, 5], "long_window": [20, 30, 40]})
+    assert len(grid) == 6 and grid[0] == {"short_window": 3, "long_window": 20}
+
+    draws = random_search({"rsi_period": (5, 30), "stop_loss_pct": (0.01, 0.05), "bollinger_window": [10, 20]},
+                          n_iter=50, seed=1)
+    assert draws == random_search({"rsi_period": (5, 30), "stop_loss_pct": (0.01, 0.05),
+                                   "bollinger_window": [10, 20]}, n_iter=50, seed=1)
+    assert all(isinstance(d["rsi_period"], int) and 5 <= d["rsi_period"] <= 30 for d in draws)
+    assert all(0.01 <= d["stop_loss_pct"] <= 0.05 for d in draws)
+    assert {d["bollinger_window"] for d in draws} == {10, 20}
+
+
+def test_run_sweep_streams_results_table(tmp_path):
+    space = {"short_window": [3, 5], "long_window": [20, 30]}
+    table = run_sweep(_bars("A", 150, seed=3), space, workdir=tmp_path, results_path=tmp_path / "results.csv",
+                      max_workers=2, base_config={"trade_quantity": 1})
+
+    assert len(table) == 4
+    assert (table["error"] == "").all()
+    assert (table["bars"] == 150).all()
+    assert set(zip(table["short_window"], table["long_window"])) == {(3, 20), (3, 30), (5, 20), (5, 30)}
+    on_disk = pd.read_csv(tmp_path / "results.csv")
+    assert len(on_disk) == 4 and list(on_disk.columns) == list(table.columns)
+
+
+def _startup_environ():
+    # The environment the process was started with, before any module could change it
+    try:
+        with open("/proc/self/environ", "rb") as f:
+            return dict(item.decode().split("=", 1) for item in f.read().split(b"\0") if b"=" in item)
+    except OSError:
+        return dict(os.environ)
+
+
+class _ThreadLimitProbe:
+    """Strategy that fails the run unless the worker process started with single-threaded BLAS."""
+
+    def __init__(self, risk_manager, order_manager, config):
+        environ = _startup_environ()
+        if environ.get("OMP_NUM_THREADS") != "1" or environ.get("OPENBLAS_NUM_THREADS") != "1":
+            raise RuntimeError("worker started without thread limits")
+
+    async def on_market_data(self, market_data):
+        pass
+
+
+def test_workers_start_single_threaded_and_scratch_dir_is_removed(tmp_path, monkeypatch):
+    monkeypatch.delenv("OMP_NUM_THREADS", raising=False)
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    table = run_sweep(_bars("A", 20), {"x": [1, 2]}, max_workers=2,
+                      engine_kwargs={"strategy_factory": _ThreadLimitProbe})
+
+    assert (table["error"] == "").all()
+    assert "OMP_NUM_THREADS" not in os.environ
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,128 @@
+import struct
+import pytest
+from core.market_events import OhlcEvent, QuoteEvent, TradeEvent
+from core.upstox_protobuf_decoder import (
+    FEED_LIVE, FeedDecodeError, FeedDecoder, decode_feed_response, decode_upstox_message,
+)
+
+
+# Minimal protobuf encoder for building V3 FeedResponse frames
+def _varint(value):
+    value &= (1 << 64) - 1
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _int(field, value):
+    return _varint(field << 3) + _varint(value)
+
+
+def _double(field, value):
+    return _varint(field << 3 | 1) + struct.pack("<d", value)
+
+
+def _msg(field, payload):
+    if isinstance(payload, str):
+        payload = payload.encode()
+    return _varint(field << 3 | 2) + _varint(len(payload)) + payload
+
+
+def _ltpc(ltp, ltt, ltq, cp):
+    return _double(1, ltp) + _int(2, ltt) + _int(3, ltq) + _double(4, cp)
+
+
+def _quote(bid_q, bid_p, ask_q, ask_p):
+    return _int(1, bid_q) + _double(2, bid_p) + _int(3, ask_q) + _double(4, ask_p)
+
+
+def _ohlc(interval, o, h, l, c, vol, ts):
+    return (_msg(1, interval) + _double(2, o) + _double(3, h) + _double(4, l)
+            + _double(5, c) + _int(6, vol) + _int(7, ts))
+
+
+def _frame(feeds, frame_type=FEED_LIVE, current_ts=1_700_000_000_500):
+    body = _int(1, frame_type)
+    for key, feed in feeds.items():
+        body += _msg(2, _msg(1, key) + _msg(2, feed))
+    return body + _int(3, current_ts)
+
+
+def _full_market_feed():
+    market_ff = (
+        _msg(1, _ltpc(2500.5, 1_700_000_000_000, 25, 2490.0))
+        + _msg(2, _msg(1, _quote(100, 2500.0, 80, 2501.0)) + _msg(1, _quote(5, 2499.0, 5, 2502.0)))
+        + _msg(3, _double(1, 0.5))  # option greeks: skipped
+        + _msg(4, _msg(1, _ohlc("I1", 2495.0, 2502.0, 2494.0, 2500.5, 1200, 1_699_999_940_000)))
+        + _double(5, 2498.7)  # atp: skipped
+    )
+    return _msg(2, _msg(1, market_ff)) + _int(4, 1)
+
+
+def test_decodes_multi_instrument_frame_into_typed_records():
+    frame = decode_feed_response(_frame({
+        "NSE_EQ|INE002A01018": _full_market_feed(),
+        "NSE_INDEX|Nifty 50": _msg(2, _msg(2, _msg(1, _ltpc(22000.0, 1_700_000_000_100, 0, 21950.0))
+                                             + _msg(2, _msg(1, _ohlc("1d", 1, 2, 0.5, 1.5, 0, 0))))),
+        "NSE_FO|12345": _msg(1, _ltpc(101.25, 1_700_000_000_200, 50, 99.0)),
+        "NSE_FO|67890": _msg(3, _msg(1, _ltpc(55.0, 1_700_000_000_300, 15, 54.0))
+                             + _msg(2, _quote(30, 54.95, 45, 55.05))),
+    }))
+    assert frame.type == FEED_LIVE
+    assert frame.current_ts == 1_700_000_000.5
+
+    by_kind = {}
+    for record in frame.records:
+        by_kind.setdefault((record.event, record.symbol), record)
+
+    trade = by_kind[("trade", "NSE_EQ|INE002A01018")]
+    assert isinstance(trade, TradeEvent)
+    assert (trade.price, trade.quantity, trade.timestamp, trade.close_price) == (2500.5, 25, 1_700_000_000.0, 2490.0)
+
+    quote = by_kind[("quote", "NSE_EQ|INE002A01018")]
+    assert isinstance(quote, QuoteEvent)
+    assert (quote.bid_price, quote.bid_quantity, quote.ask_price, quote.ask_quantity) == (2500.0, 100, 2501.0, 80)
+    # Quotes carry the frame time, not the (possibly old) last trade time
+    assert quote.timestamp == 1_700_000_000.5
+
+    bar = by_kind[("ohlc", "NSE_EQ|INE002A01018")]
+    assert isinstance(bar, OhlcEvent)
+    assert (bar.interval, bar.open, bar.high, bar.low, bar.close, bar.volume) == ("I1", 2495.0, 2502.0, 2494.0, 2500.5, 1200)
+
+    assert by_kind[("ohlc", "NSE_INDEX|Nifty 50")].interval == "1d"
+    assert by_kind[("trade", "NSE_FO|12345")].price == 101.25
+    assert by_kind[("quote", "NSE_FO|67890")].ask_price == 55.05
+    assert by_kind[("quote", "NSE_FO|67890")].timestamp == 1_700_000_000.5
+    assert len(frame.records) == 8
+
+
+def test_kind_filter_and_malformed_frames():
+    raw = _frame({"NSE_EQ|X": _full_market_feed()})
+    bars = decode_upstox_message(raw, "bars")
+    assert [type(r) for r in bars] == [OhlcEvent]
+    assert [type(r) for r in decode_upstox_message(raw, "trades")] == [TradeEvent]
+
+    with pytest.raises(FeedDecodeError):
+        decode_feed_response(raw[:-5])
+    assert decode_upstox_message(raw[:-5]) == []
+
+
+def test_feed_decoder_emits_a_trade_only_when_ltt_or_ltq_changes():
+    decoder = FeedDecoder("trades")
+
+    def frame(ltt, ltq):
+        return _frame({"NSE_FO|1": _msg(1, _ltpc(101.0, ltt, ltq, 99.0))})
+
+    assert len(decoder(frame(1_700_000_000_000, 10))) == 1
+    # Same last trade re-sent with a quote update: not a new trade
+    assert decoder(frame(1_700_000_000_000, 10)) == []
+    assert len(decoder(frame(1_700_000_000_000, 20))) == 1
+    assert len(decoder(frame(1_700_000_001_000, 20))) == 1
+    # The stateless function keeps reporting the snapshot
+    assert len(decode_upstox_message(frame(1_700_000_001_000, 20), "trades")) == 1